@@ -1,17 +1,19 @@
 """Alembic environment configuration."""
+import asyncio
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 import os
+import re
 import sys
 
 # Add the parent directory to the path so we can import app
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import your models and database configuration
-from app.database import Base
-from app.config import settings
+from app.database import Base, database_url
 from app.models import (
     Event,
     Alert,
@@ -22,6 +24,8 @@ from app.models import (
     DeviceType,
     AlertType,
     AlertRule,
+    ActivityRollupHourly,
+    ActivityRollupDaily,
 )
 
 # this is the Alembic Config object, which provides
@@ -33,13 +37,23 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Set the SQLAlchemy URL from settings
-config.set_main_option("sqlalchemy.url", settings.database_url)
+# Set the SQLAlchemy URL from settings (normalized to the asyncpg driver)
+config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
 
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+# Monthly partitions of events and alerts (e.g. events_p202610) are created by
+# app/services/partitions.py at runtime, not declared in the models
+PARTITION_NAME = re.compile(r"^(events|alerts)_p\d{6}$")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Leave monthly partitions out of autogenerate comparisons."""
+    return not (type_ == "table" and PARTITION_NAME.match(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -64,32 +78,46 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
 
-def run_migrations_online() -> None:
-    """Run migrations in 'online' mode.
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection, target_metadata=target_metadata, include_name=include_name
+    )
 
-    In this scenario we need to create an Engine
-    and associate a connection with the context.
+    with context.begin_transaction():
+        context.run_migrations()
 
-    """
-    connectable = engine_from_config(
+
+async def run_async_migrations() -> None:
+    """Create an async Engine and run the migrations on one of its connections."""
+    connectable = async_engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        # Same as app.database: no prepared statement cache behind pgbouncer
+        connect_args={"statement_cache_size": 0, "prepared_statement_cache_size": 0},
     )
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
 
-        with context.begin_transaction():
-            context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
+
+    """
+    asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
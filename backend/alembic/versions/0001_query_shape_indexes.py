@@ -0,0 +1,75 @@
+"""Composite and partial indexes matching the hot query shapes
+
+- events (device_id, created_at): policy window counts and per-device event counts
+- events (created_at): policy window rebuild and retention scans
+- events (event_id) WHERE is_processed = false: startup recovery of queued events
+- events (media_url) WHERE media_url IS NOT NULL: retention lookups of shared audio
+- alerts (house_id|status|severity, created_at DESC): list_alerts filters with its ordering
+- alerts (house_id, created_at DESC) WHERE status = 'active': dashboard counts, open alerts
+- devices (status): dashboard online device count
+
+The single-column indexes on events.device_id, alerts.house_id and alerts.status
+are dropped, since the composite indexes above start with the same column.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so that ingestion is not blocked
+while they build on a live database.
+
+Revision ID: 0001_query_shape_indexes
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_query_shape_indexes'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ("ix_events_device_id_created_at", "events", ["device_id", "created_at"], None),
+    ("ix_events_created_at", "events", ["created_at"], None),
+    ("ix_events_unprocessed", "events", ["event_id"], "is_processed = false"),
+    ("ix_events_media_url", "events", ["media_url"], "media_url IS NOT NULL"),
+    ("ix_alerts_house_id_created_at", "alerts", ["house_id", sa.text("created_at DESC")], None),
+    ("ix_alerts_status_created_at", "alerts", ["status", sa.text("created_at DESC")], None),
+    ("ix_alerts_severity_created_at", "alerts", ["severity", sa.text("created_at DESC")], None),
+    ("ix_alerts_active_house_id_created_at", "alerts", ["house_id", sa.text("created_at DESC")], "status = 'active'"),
+    ("ix_devices_status", "devices", ["status"], None),
+]
+
+# Single-column indexes made redundant by a composite index with the same leading column
+REPLACED_INDEXES = [
+    ("ix_events_device_id", "events", ["device_id"]),
+    ("ix_alerts_house_id", "alerts", ["house_id"]),
+    ("ix_alerts_status", "alerts", ["status"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
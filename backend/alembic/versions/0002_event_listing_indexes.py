@@ -0,0 +1,39 @@
+"""Index for listing a house's events newest first
+
+GET /api/v1/events pages on (created_at, event_id) with an optional house_id
+filter. (house_id, created_at DESC) serves that range scan and replaces the
+single-column index on events.house_id.
+
+Revision ID: 0002_event_listing_indexes
+Revises: 0001_query_shape_indexes
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_event_listing_indexes'
+down_revision = '0001_query_shape_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_events_house_id_created_at",
+            "events",
+            ["house_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index("ix_events_house_id", table_name="events", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_events_house_id", "events", ["house_id"], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index("ix_events_house_id_created_at", table_name="events", postgresql_concurrently=True, if_exists=True)
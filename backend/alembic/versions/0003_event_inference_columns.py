@@ -0,0 +1,88 @@
+"""Typed inference columns on events and raw_data as JSONB
+
+- events.inference_label / inference_score: copied from raw_data["inference"]
+  when an event is processed, so events can be filtered by label without
+  parsing JSON row by row
+- events (device_id, inference_label, created_at): e.g. which devices produced
+  distress in the last hour
+- events.raw_data: json -> jsonb, with a GIN index (jsonb_path_ops) for
+  containment queries
+
+The new columns are nullable without a default, so adding them does not
+rewrite the table. Converting raw_data does rewrite it under an exclusive
+lock; run this during a maintenance window on large tables. Historical rows
+are filled afterwards with scripts/backfill_inference_columns.py.
+
+Revision ID: 0003_event_inference_columns
+Revises: 0002_event_listing_indexes
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_event_inference_columns'
+down_revision = '0002_event_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def _raw_data_is_jsonb() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("events")
+    raw_data = next(column for column in columns if column["name"] == "raw_data")
+    return isinstance(raw_data["type"], postgresql.JSONB)
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("inference_label", sa.String(length=50), nullable=True))
+    op.add_column("events", sa.Column("inference_score", sa.Float(), nullable=True))
+    if not _raw_data_is_jsonb():
+        op.alter_column(
+            "events",
+            "raw_data",
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using="raw_data::jsonb",
+        )
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_events_device_id_inference_label_created_at",
+            "events",
+            ["device_id", "inference_label", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_events_raw_data",
+            "events",
+            ["raw_data"],
+            postgresql_using="gin",
+            postgresql_ops={"raw_data": "jsonb_path_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_events_raw_data", table_name="events", postgresql_concurrently=True, if_exists=True)
+        op.drop_index(
+            "ix_events_device_id_inference_label_created_at",
+            table_name="events",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.alter_column(
+        "events",
+        "raw_data",
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using="raw_data::json",
+    )
+    op.drop_column("events", "inference_score")
+    op.drop_column("events", "inference_label")
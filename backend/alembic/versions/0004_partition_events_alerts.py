@@ -0,0 +1,161 @@
+"""Partition events and alerts by month on created_at
+
+Both tables become RANGE (created_at) partitioned tables with one partition
+per calendar month (UTC), named <table>_pYYYYMM. Queries with a created_at
+range (policy windows, listings, retention, dashboards) only scan the
+partitions of the months they cover, and old months can be detached or
+dropped instead of deleted row by row (see app/services/partitions.py,
+which also creates upcoming partitions at startup).
+
+Each table is rebuilt: it is renamed, a partitioned table with the same
+columns is created, partitions are created for every month that has rows
+up to PREMAKE_MONTHS ahead, the rows are copied, and the old table is
+dropped. The id sequences are kept. This copies all data in one transaction
+and blocks writes meanwhile; run it in a maintenance window.
+
+Primary keys must include the partition key, so they become
+(event_id, created_at) and (alert_id, created_at). A foreign key to a
+partitioned table must reference its whole primary key, so the
+alerts.event_id -> events foreign key is dropped (alerts.event_id stays
+indexed). The redundant single-column indexes on event_id and alert_id are
+not recreated; the primary keys start with those columns.
+
+Revision ID: 0004_partition_events_alerts
+Revises: 0003_event_inference_columns
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_partition_events_alerts'
+down_revision = '0003_event_inference_columns'
+branch_labels = None
+depends_on = None
+
+
+# Future months created here; afterwards the partition manager keeps them ahead
+PREMAKE_MONTHS = 3
+
+# Columns referencing other tables, as (column, referenced table, referenced column)
+FOREIGN_KEYS = {
+    "events": [
+        ("house_id", "houses", "house_id"),
+        ("device_id", "devices", "device_id"),
+    ],
+    "alerts": [
+        ("house_id", "houses", "house_id"),
+        ("device_id", "devices", "device_id"),
+        ("alert_type_id", "alert_types", "alert_type_id"),
+        ("rule_id", "alert_rules", "rule_id"),
+    ],
+}
+
+# Secondary indexes, as CREATE INDEX bodies after "ON <table>"
+INDEXES = {
+    "events": [
+        ("ix_events_device_id_created_at", "(device_id, created_at)"),
+        ("ix_events_house_id_created_at", "(house_id, created_at DESC)"),
+        ("ix_events_created_at", "(created_at)"),
+        ("ix_events_unprocessed", "(event_id) WHERE is_processed = false"),
+        ("ix_events_media_url", "(media_url) WHERE media_url IS NOT NULL"),
+        ("ix_events_device_id_inference_label_created_at", "(device_id, inference_label, created_at)"),
+        ("ix_events_raw_data", "USING gin (raw_data jsonb_path_ops)"),
+    ],
+    "alerts": [
+        ("ix_alerts_device_id", "(device_id)"),
+        ("ix_alerts_event_id", "(event_id)"),
+        ("ix_alerts_created_at", "(created_at)"),
+        ("ix_alerts_house_id_created_at", "(house_id, created_at DESC)"),
+        ("ix_alerts_status_created_at", "(status, created_at DESC)"),
+        ("ix_alerts_severity_created_at", "(severity, created_at DESC)"),
+        ("ix_alerts_active_house_id_created_at", "(house_id, created_at DESC) WHERE status = 'active'"),
+    ],
+}
+
+ID_COLUMNS = {"events": "event_id", "alerts": "alert_id"}
+
+
+def _is_partitioned(table: str) -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {"table": table},
+    ).scalar()
+
+
+def _create_month_partitions(table: str, source: str):
+    """Create a partition for every month with rows in source, through PREMAKE_MONTHS ahead."""
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month timestamptz;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', least(coalesce(min(created_at), now()), now()), 'UTC'),
+                    date_trunc('month', now(), 'UTC') + interval '{PREMAKE_MONTHS} months',
+                    interval '1 month'
+                ) FROM {source}
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                    '{table}_p' || to_char(month AT TIME ZONE 'UTC', 'YYYYMM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END $$
+    """)
+
+
+def _rebuild(table: str, partitioned: bool):
+    """Recreate a table with the same columns and data, partitioned by month or not."""
+    id_column = ID_COLUMNS[table]
+    old = f"{table}_old"
+    sequence = op.get_bind().execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, :column)"), {"table": table, "column": id_column}
+    ).scalar()
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    if partitioned:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        _create_month_partitions(table, old)
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+
+    # Keep the id sequence when the old table is dropped
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{id_column}")
+    op.execute(f"DROP TABLE {old}")
+
+    primary_key = f"{id_column}, created_at" if partitioned else id_column
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    for column, referenced_table, referenced_column in FOREIGN_KEYS[table]:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced_table} ({referenced_column})"
+        )
+    for name, definition in INDEXES[table]:
+        op.execute(f"CREATE INDEX {name} ON {table} {definition}")
+    if not partitioned:
+        op.execute(f"CREATE INDEX ix_{table}_{id_column} ON {table} ({id_column})")
+    op.execute(f"ANALYZE {table}")
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE alerts DROP CONSTRAINT IF EXISTS alerts_event_id_fkey")
+    for table in ("events", "alerts"):
+        if not _is_partitioned(table):
+            _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    for table in ("events", "alerts"):
+        if _is_partitioned(table):
+            _rebuild(table, partitioned=False)
+    op.execute(
+        "ALTER TABLE alerts ADD CONSTRAINT alerts_event_id_fkey "
+        "FOREIGN KEY (event_id) REFERENCES events (event_id)"
+    )
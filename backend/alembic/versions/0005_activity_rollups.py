@@ -0,0 +1,60 @@
+"""Hourly and daily activity rollup tables
+
+activity_rollups_hourly and activity_rollups_daily hold, per device and UTC
+bucket, event counts by inference label and the score sum, alert counts by
+severity and status with the confidence sum, and heartbeat counts with the
+online time they cover. They are maintained incrementally by
+app/services/rollups.py and serve /api/v1/analytics without touching events
+or alerts. Fill them for existing history with scripts/rebuild_rollups.py.
+
+Revision ID: 0005_activity_rollups
+Revises: 0004_partition_events_alerts
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_activity_rollups'
+down_revision = '0004_partition_events_alerts'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("activity_rollups_hourly", "activity_rollups_daily")
+
+
+def _columns():
+    zero = sa.text("0")
+    empty = sa.text("'{}'::jsonb")
+    return [
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("house_id", sa.Integer(), nullable=False),
+        sa.Column("event_count", sa.Integer(), server_default=zero, nullable=False),
+        sa.Column("event_labels", postgresql.JSONB(), server_default=empty, nullable=False),
+        sa.Column("score_sum", sa.Float(), server_default=zero, nullable=False),
+        sa.Column("alert_count", sa.Integer(), server_default=zero, nullable=False),
+        sa.Column("alert_severities", postgresql.JSONB(), server_default=empty, nullable=False),
+        sa.Column("alert_statuses", postgresql.JSONB(), server_default=empty, nullable=False),
+        sa.Column("confidence_sum", sa.Float(), server_default=zero, nullable=False),
+        sa.Column("confidence_count", sa.Integer(), server_default=zero, nullable=False),
+        sa.Column("heartbeat_count", sa.Integer(), server_default=zero, nullable=False),
+        sa.Column("online_seconds", sa.Float(), server_default=zero, nullable=False),
+        sa.PrimaryKeyConstraint("device_id", "bucket_start"),
+    ]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_table(table, *_columns())
+        op.create_index(f"ix_{table}_house_id_bucket_start", table, ["house_id", "bucket_start"])
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_house_id_bucket_start", table_name=table)
+        op.drop_table(table)
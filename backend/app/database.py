@@ -1,41 +1,122 @@
 """Database connection and session management."""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import exc, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.utils import percentile
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Ensure database URL uses asyncpg
-database_url = settings.database_url
-if not database_url.startswith("postgresql+asyncpg://"):
-    # If URL doesn't have +asyncpg, add it
-    if database_url.startswith("postgresql://"):
-        database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    elif not database_url.startswith("postgresql+asyncpg://"):
-        logger.warning(f"Database URL should start with 'postgresql+asyncpg://', got: {database_url[:30]}...")
-        # Try to fix it
-        if "://" in database_url:
-            parts = database_url.split("://", 1)
-            database_url = f"postgresql+asyncpg://{parts[1]}"
-
-# Create async engine
-# Note: Disable prepared statements for pgbouncer compatibility (transaction mode)
-# For Supabase with pgbouncer, we need to disable statement caching
-# Reference: https://github.com/MagicStack/asyncpg/issues/475
-engine = create_async_engine(
-    database_url,
-    echo=False,  # Set to True for SQL query logging
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  # Verify connections before using
-    connect_args={
-        "statement_cache_size": 0,  # Disable prepared statement cache for pgbouncer
-        "prepared_statement_cache_size": 0,  # Disable prepared statement cache
-        "server_settings": {
-            "jit": "off"  # Disable JIT for pgbouncer compatibility
+# Connection profiles: behind pgbouncer in transaction mode, or straight to Postgres
+CONNECTION_PROFILES = ("pgbouncer-transaction", "direct")
+
+# Recent pool checkout waits kept for the pool metrics
+CHECKOUT_WAIT_HISTORY = 1000
+
+
+def _asyncpg_url(url: str) -> str:
+    """Ensure a database URL uses the asyncpg driver."""
+    if not url.startswith("postgresql+asyncpg://"):
+        # If URL doesn't have +asyncpg, add it
+        if url.startswith("postgresql://"):
+            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        elif not url.startswith("postgresql+asyncpg://"):
+            logger.warning(f"Database URL should start with 'postgresql+asyncpg://', got: {url[:30]}...")
+            # Try to fix it
+            if "://" in url:
+                parts = url.split("://", 1)
+                url = f"postgresql+asyncpg://{parts[1]}"
+    return url
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Connection pool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_waits: deque[float] = deque(maxlen=CHECKOUT_WAIT_HISTORY)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            self.checkout_waits.append((time.perf_counter() - start) * 1000.0)
+            self.checkouts += 1
+
+
+def _create_engine(url: str, profile: Optional[str] = None, **connect_args):
+    """
+    Create an async engine for a connection profile.
+
+    Args:
+        url: Database URL
+        profile: "pgbouncer-transaction" or "direct" (defaults to DATABASE_CONNECTION_PROFILE)
+        **connect_args: Extra asyncpg connect arguments
+    """
+    profile = profile or settings.database_connection_profile
+    if profile not in CONNECTION_PROFILES:
+        raise ValueError(f"Unknown database connection profile '{profile}', expected one of {CONNECTION_PROFILES}")
+
+    if profile == "direct":
+        # Prepared statements are cached per connection, so repeated queries skip
+        # parse/plan; connections are recycled by age instead of pinged per checkout
+        pool_args = {"pool_pre_ping": False, "pool_recycle": settings.database_pool_recycle_seconds}
+        cache_args = {
+            "statement_cache_size": settings.database_statement_cache_size,
+            "prepared_statement_cache_size": settings.database_statement_cache_size,
         }
-    },
+    else:
+        # Note: Disable prepared statements for pgbouncer compatibility (transaction mode)
+        # For Supabase with pgbouncer, we need to disable statement caching
+        # Reference: https://github.com/MagicStack/asyncpg/issues/475
+        pool_args = {"pool_pre_ping": True}  # Verify connections before using
+        cache_args = {
+            "statement_cache_size": 0,  # Disable prepared statement cache for pgbouncer
+            "prepared_statement_cache_size": 0,  # Disable prepared statement cache
+        }
+
+    return create_async_engine(
+        _asyncpg_url(url),
+        echo=False,  # Set to True for SQL query logging
+        poolclass=InstrumentedPool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout_seconds,
+        **pool_args,
+        connect_args={
+            **cache_args,
+            "server_settings": {
+                "jit": "off"  # JIT compilation costs more than it saves on short queries
+            },
+            **connect_args,
+        },
+    )
+
+
+database_url = _asyncpg_url(settings.database_url)
+
+# Create async engine (primary: all writes, and reads that must be current)
+engine = _create_engine(database_url)
+
+# Optional read replica for GET endpoints (see get_read_db)
+replica_engine = (
+    _create_engine(settings.database_replica_url, timeout=settings.database_replica_connect_timeout_seconds)
+    if settings.database_replica_url else None
 )
 
 # Create async session factory
@@ -47,6 +128,21 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+ReplicaSessionLocal = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if replica_engine is not None else None
+
+# Cookie holding the time until which a client's reads go to the primary
+READ_YOUR_WRITES_COOKIE = "primary_reads_until"
+
+# Replica failures put reads back on the primary until this time (time.monotonic())
+_replica_retry_at = 0.0
+_replica_last_error: Optional[str] = None
+
 # Base class for models
 Base = declarative_base()
 
@@ -67,6 +163,67 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Dependency for getting a read-only database session.
+
+    Uses the replica (DATABASE_REPLICA_URL) when one is configured, except
+    for clients within their read-your-writes window (see
+    mark_recent_write) and while the replica is unreachable, in which case
+    the primary is used. Handlers must not write through this session.
+    """
+    session = None
+    if replica_available() and not _reads_own_writes(request):
+        session = ReplicaSessionLocal()
+        try:
+            await session.connection()
+        except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+            await session.close()
+            _mark_replica_down(e)
+            session = None
+
+    async with session or AsyncSessionLocal() as session:
+        yield session
+
+
+def replica_available() -> bool:
+    """Check whether reads can currently go to the replica."""
+    return replica_engine is not None and time.monotonic() >= _replica_retry_at
+
+
+def mark_recent_write(response: Response):
+    """
+    Send a client's reads to the primary for DATABASE_REPLICA_READ_YOUR_WRITES_SECONDS.
+
+    Called for responses to successful mutations, so the client sees its own
+    writes even if the replica has not replayed them yet.
+    """
+    window = settings.database_replica_read_your_writes_seconds
+    if replica_engine is None or window <= 0:
+        return
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        f"{time.time() + window:.3f}",
+        max_age=max(1, math.ceil(window)),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def _reads_own_writes(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _mark_replica_down(error: Exception):
+    global _replica_retry_at, _replica_last_error
+    _replica_retry_at = time.monotonic() + settings.database_replica_retry_seconds
+    _replica_last_error = str(error) or type(error).__name__
+    logger.warning(f"Read replica unavailable, reading from the primary: {_replica_last_error}")
+
+
 async def check_db_health() -> bool:
     """
     Check database connectivity.
@@ -82,3 +239,53 @@ async def check_db_health() -> bool:
         logger.error(f"Database health check failed: {e}")
         return False
 
+
+async def check_replica_lag() -> Optional[float]:
+    """
+    Measure how far the read replica is behind the primary.
+
+    Returns:
+        Seconds since the last replayed transaction (0 when the replica has
+        replayed all WAL it received, or is not in recovery), or None when no
+        replica is configured or it cannot be reached
+    """
+    if replica_engine is None:
+        return None
+    try:
+        async with ReplicaSessionLocal() as session:
+            result = await session.execute(text(
+                "SELECT CASE WHEN NOT pg_is_in_recovery() "
+                "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+            ))
+            lag = result.scalar()
+    except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+        _mark_replica_down(e)
+        return None
+    return float(lag or 0)
+
+
+def pool_stats(db_engine) -> dict:
+    """
+    Get connection pool usage and checkout wait times of an engine.
+
+    Returns:
+        Dictionary with pool size, connections in use, utilization (in use
+        over the maximum), checkout counts and wait percentiles in milliseconds
+    """
+    pool = db_engine.pool
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    waits = sorted(pool.checkout_waits)
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "utilization": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+        "checkouts": pool.checkouts,
+        "checkout_timeouts": pool.checkout_timeouts,
+        "wait_ms_p50": round(percentile(waits, 0.50), 3),
+        "wait_ms_p95": round(percentile(waits, 0.95), 3),
+        "wait_ms_max": round(waits[-1], 3) if waits else 0.0,
+    }
+
@@ -1,10 +1,21 @@
 """Main FastAPI application."""
 import logging
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.routers import ingestion, alerts, devices, houses, health, metrics, inference, models
+from app.database import mark_recent_write
+from app.routers import ingestion, alerts, events, devices, houses, health, metrics, inference, models, stream, analytics
+from app.services.dashboard import dashboard_metrics
+from app.services.heartbeat import heartbeat_service
 from app.services.inference import inference_service
+from app.services.liveness import offline_detector
+from app.services.partitions import partition_manager
+from app.services.policy import policy_engine
+from app.services.processing import event_processor
+from app.services.retention import retention_service
+from app.services.rollups import rollup_service
+from app.services.storage import storage_service
 
 # Configure logging
 logging.basicConfig(
@@ -32,15 +43,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Measure request latency for the dashboard's system health
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Record the time to produce each response."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    dashboard_metrics.latency.record((time.perf_counter() - start) * 1000.0)
+    return response
+
+
+# Keep a client's reads on the primary for a moment after its own writes
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Mark clients that just changed data so get_read_db skips the replica."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_recent_write(response)
+    return response
+
+
 # Include routers
 app.include_router(ingestion.router)
 app.include_router(alerts.router)
+app.include_router(events.router)
 app.include_router(devices.router)
 app.include_router(houses.router)
 app.include_router(health.router)
 app.include_router(metrics.router)
 app.include_router(inference.router)
 app.include_router(models.router)
+app.include_router(stream.router)
+app.include_router(analytics.router)
 
 
 @app.get("/")
@@ -71,6 +105,32 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Database connection failed: {e}")
     
+    # Connect the storage backend
+    try:
+        await storage_service.start()
+    except Exception as e:
+        logger.error(f"❌ Storage backend connection failed: {e}")
+    
+    # Create upcoming monthly partitions of events and alerts before accepting writes (expiry runs in the background)
+    try:
+        await partition_manager.run_once(expire=False)
+    except Exception as e:
+        logger.error(f"Partition maintenance failed on startup: {e}", exc_info=True)
+    await partition_manager.start()
+    
+    # Rebuild recent activity rollups (deltas lost by an unclean shutdown) before processing resumes
+    if settings.rollup_catchup_hours > 0:
+        try:
+            from datetime import datetime, timedelta, timezone
+            from app.database import AsyncSessionLocal
+            now = datetime.now(timezone.utc)
+            async with AsyncSessionLocal() as session:
+                await rollup_service.rebuild(session, now - timedelta(hours=settings.rollup_catchup_hours), now)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Activity rollup catch-up failed on startup: {e}", exc_info=True)
+    await rollup_service.start()
+    
     # Load active model from database
     try:
         from app.database import AsyncSessionLocal
@@ -78,10 +138,54 @@ async def startup_event():
             await inference_service.load_active_model_from_db(session)
     except Exception as e:
         logger.error(f"Failed to load active model on startup: {e}", exc_info=True)
+    
+    # Load alert rules and rebuild policy windows from recent events and alerts
+    try:
+        from app.database import AsyncSessionLocal
+        async with AsyncSessionLocal() as session:
+            await policy_engine.load_state(session)
+    except Exception as e:
+        logger.error(f"Failed to load policy state on startup: {e}", exc_info=True)
+    await policy_engine.start()
+    
+    # Start inference executor (worker processes warm-load the model)
+    await inference_service.start()
+    
+    # Start background event processing (also re-enqueues unprocessed events)
+    if event_processor.enabled:
+        await event_processor.start()
+    
+    # Start coalesced heartbeat writes
+    await heartbeat_service.start()
+    
+    # Watch heartbeat deadlines of online devices
+    if offline_detector.enabled:
+        try:
+            from app.database import AsyncSessionLocal
+            async with AsyncSessionLocal() as session:
+                await offline_detector.load(session)
+        except Exception as e:
+            logger.error(f"Failed to load device heartbeats on startup: {e}", exc_info=True)
+        await offline_detector.start()
+    
+    # Start audio retention and compaction
+    if retention_service.enabled:
+        await retention_service.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler."""
     logger.info("Shutting down Smart Home Senior Care API")
+    
+    # Drain queued events before exiting
+    await event_processor.stop()
+    await inference_service.stop()
+    await policy_engine.stop()
+    await retention_service.stop()
+    await offline_detector.stop()
+    await heartbeat_service.stop()  # Writes pending heartbeats
+    await rollup_service.stop()  # Writes pending rollup deltas
+    await partition_manager.stop()
+    await storage_service.stop()
 
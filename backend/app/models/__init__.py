@@ -10,6 +10,7 @@ from app.models.alert_type import AlertType
 from app.models.alert_rule import AlertRule
 from app.models.ml_model import MLModel
 from app.models.user import User
+from app.models.rollup import ActivityRollupHourly, ActivityRollupDaily
 
 __all__ = [
     "Event",
@@ -23,4 +24,6 @@ __all__ = [
     "AlertRule",
     "MLModel",
     "User",
+    "ActivityRollupHourly",
+    "ActivityRollupDaily",
 ]
@@ -1,5 +1,5 @@
 """Alert model for system alerts."""
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,16 +10,19 @@ class Alert(Base):
     
     __tablename__ = "alerts"
     
-    alert_id = Column(Integer, primary_key=True, index=True)
-    house_id = Column(Integer, ForeignKey("houses.house_id"), nullable=False, index=True)
+    # The table is partitioned by month on created_at, so the database primary
+    # key is (alert_id, created_at); alert_id alone identifies an alert
+    alert_id = Column(Integer, primary_key=True, autoincrement=True)
+    house_id = Column(Integer, ForeignKey("houses.house_id"), nullable=False)
     device_id = Column(Integer, ForeignKey("devices.device_id"), nullable=False, index=True)
-    event_id = Column(Integer, ForeignKey("events.event_id"), nullable=True, index=True)
+    # No foreign key: a key referencing partitioned events would have to include created_at
+    event_id = Column(Integer, nullable=True, index=True)
     alert_type_id = Column(Integer, ForeignKey("alert_types.alert_type_id"), nullable=False)
     rule_id = Column(Integer, ForeignKey("alert_rules.rule_id"), nullable=True)
     severity = Column(String(50), nullable=False)  # critical, high, medium, low
-    status = Column(String(50), nullable=False, default="active", index=True)  # active, acknowledged, resolved, false_positive
+    status = Column(String(50), nullable=False, default="active")  # active, acknowledged, resolved, false_positive
     confidence_score = Column(Numeric(3, 2), nullable=True)  # DECIMAL(3,2)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True, index=True)
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     notes = Column(Text, nullable=True)
@@ -27,4 +30,24 @@ class Alert(Base):
     # Relationships
     house = relationship("House", back_populates="alerts")
     device = relationship("Device", back_populates="alerts")
-    event = relationship("Event", back_populates="alerts")
+    event = relationship("Event", back_populates="alerts", primaryjoin="foreign(Alert.event_id) == Event.event_id")
+    
+    # Load created_at in the INSERT's RETURNING (it is pushed to stream clients)
+    __mapper_args__ = {"eager_defaults": True, "primary_key": [alert_id]}
+    
+    # Created by alembic/versions/0001_query_shape_indexes.py; each matches a
+    # list_alerts filter with its ORDER BY created_at DESC. 0004_partition_events_alerts
+    # partitions the table (monthly partitions are maintained by app/services/partitions.py)
+    __table_args__ = (
+        Index("ix_alerts_house_id_created_at", "house_id", text("created_at DESC")),
+        Index("ix_alerts_status_created_at", "status", text("created_at DESC")),
+        Index("ix_alerts_severity_created_at", "severity", text("created_at DESC")),
+        # Active alerts only (dashboard counts, open alerts per house)
+        Index(
+            "ix_alerts_active_house_id_created_at",
+            "house_id",
+            text("created_at DESC"),
+            postgresql_where=text("status = 'active'"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
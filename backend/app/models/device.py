@@ -17,7 +17,7 @@ class Device(Base):
     location = Column(String(100), nullable=True)
     mac_address = Column(String(17), unique=True, nullable=True)
     firmware_version = Column(String(50), nullable=True)
-    status = Column(String(50), nullable=False, default="offline")  # online, offline, degraded, disabled
+    status = Column(String(50), nullable=False, default="offline", index=True)  # online, offline, degraded, disabled
     last_heartbeat = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,5 +1,6 @@
 """Event model for ingested IoT signals."""
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,16 +11,51 @@ class Event(Base):
     
     __tablename__ = "events"
     
-    event_id = Column(Integer, primary_key=True, index=True)
-    house_id = Column(Integer, ForeignKey("houses.house_id"), nullable=False, index=True)
-    device_id = Column(Integer, ForeignKey("devices.device_id"), nullable=False, index=True)
+    # The table is partitioned by month on created_at, so the database primary
+    # key is (event_id, created_at); event_id alone identifies an event
+    event_id = Column(Integer, primary_key=True, autoincrement=True)
+    house_id = Column(Integer, ForeignKey("houses.house_id"), nullable=False)
+    device_id = Column(Integer, ForeignKey("devices.device_id"), nullable=False)
     event_type = Column(String(100), nullable=True)
-    raw_data = Column(JSON, nullable=True)  # JSONB in PostgreSQL
+    raw_data = Column(JSONB, nullable=True)
+    # Copied from raw_data["inference"] when the event is processed, so they can be filtered and indexed
+    inference_label = Column(String(50), nullable=True)
+    inference_score = Column(Float, nullable=True)
     media_url = Column(String(500), nullable=True)  # Path to stored audio file
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
     is_processed = Column(Boolean, default=False, nullable=False)
     
     # Relationships
     house = relationship("House", back_populates="events")
     device = relationship("Device", back_populates="events")
-    alerts = relationship("Alert", back_populates="event")
+    alerts = relationship(
+        "Alert", back_populates="event", primaryjoin="Event.event_id == foreign(Alert.event_id)"
+    )
+    
+    __mapper_args__ = {"primary_key": [event_id]}
+    
+    # Created by alembic/versions/0001_query_shape_indexes.py, 0002_event_listing_indexes.py
+    # and 0003_event_inference_columns.py; 0004_partition_events_alerts partitions the table
+    # (monthly partitions are maintained by app/services/partitions.py)
+    __table_args__ = (
+        # Per-device time windows (policy window counts, device event counts, event listing)
+        Index("ix_events_device_id_created_at", "device_id", "created_at"),
+        # Event listing per house, newest first
+        Index("ix_events_house_id_created_at", "house_id", text("created_at DESC")),
+        # Recent-event scans (policy window rebuild, retention)
+        Index("ix_events_created_at", "created_at"),
+        # Startup recovery of events still waiting for inference
+        Index("ix_events_unprocessed", "event_id", postgresql_where=text("is_processed = false")),
+        # Retention lookups of events sharing an audio file
+        Index("ix_events_media_url", "media_url", postgresql_where=text("media_url IS NOT NULL")),
+        # Events of a device by inference label over time (e.g. distress in the last hour)
+        Index("ix_events_device_id_inference_label_created_at", "device_id", "inference_label", "created_at"),
+        # Containment queries on raw_data (raw_data @> '{...}')
+        Index(
+            "ix_events_raw_data",
+            "raw_data",
+            postgresql_using="gin",
+            postgresql_ops={"raw_data": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -0,0 +1,52 @@
+"""Activity rollup models: per-device event, alert and heartbeat totals per hour and per day."""
+from sqlalchemy import Column, Integer, DateTime, Float, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+
+class ActivityRollupMixin:
+    """
+    Columns shared by the hourly and daily rollups.
+
+    One row per device and bucket (UTC). Events are counted once they are
+    labelled by inference; alerts are counted in the bucket they were
+    created in, with status counts moved as their status changes. No foreign
+    keys, so rollups outlive deleted devices and dropped partitions.
+    """
+
+    device_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    house_id = Column(Integer, nullable=False)
+
+    event_count = Column(Integer, nullable=False, server_default=text("0"))
+    event_labels = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))  # {label: count}
+    score_sum = Column(Float, nullable=False, server_default=text("0"))  # Sum of inference scores
+
+    alert_count = Column(Integer, nullable=False, server_default=text("0"))
+    alert_severities = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))  # {severity: count}
+    alert_statuses = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))  # {status: count}
+    confidence_sum = Column(Float, nullable=False, server_default=text("0"))
+    confidence_count = Column(Integer, nullable=False, server_default=text("0"))  # Alerts with a confidence score
+
+    heartbeat_count = Column(Integer, nullable=False, server_default=text("0"))
+    online_seconds = Column(Float, nullable=False, server_default=text("0"))  # Time covered by heartbeats
+
+
+class ActivityRollupHourly(ActivityRollupMixin, Base):
+    """Hourly activity rollups."""
+
+    __tablename__ = "activity_rollups_hourly"
+
+    __table_args__ = (
+        Index("ix_activity_rollups_hourly_house_id_bucket_start", "house_id", "bucket_start"),
+    )
+
+
+class ActivityRollupDaily(ActivityRollupMixin, Base):
+    """Daily activity rollups."""
+
+    __tablename__ = "activity_rollups_daily"
+
+    __table_args__ = (
+        Index("ix_activity_rollups_daily_house_id_bucket_start", "house_id", "bucket_start"),
+    )
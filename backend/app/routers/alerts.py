@@ -4,8 +4,8 @@ from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
-from app.database import get_db
+from sqlalchemy import select, func
+from app.database import get_db, get_read_db
 from app.models.alert import Alert
 from app.models.house import House
 from app.models.alert_type import AlertType
@@ -17,6 +17,8 @@ from app.schemas.alert import (
     AlertResolve,
     AlertDismiss,
 )
+from app.services.pagination import InvalidCursorError, estimate_count, page_rows, paginate
+from app.services.stream import alert_payload, stream_broker
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +31,20 @@ async def list_alerts(
     status: Optional[str] = Query(None, description="Filter by status"),
     house_id: Optional[int] = Query(None, description="Filter by house ID"),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Count matching alerts exactly instead of estimating"),
+    offset: int = Query(0, ge=0, deprecated=True, description="Deprecated: use cursor"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
-    List alerts with optional filtering.
+    List alerts with optional filtering, newest first.
+    
+    Pages are keyed on (created_at, alert_id): pass the returned next_cursor
+    to get the following page. total is estimated from table statistics
+    unless include_total is set.
     """
-    query = select(Alert, House.latitude, House.longitude, AlertType.type_name).join(
-        House, House.house_id == Alert.house_id
-    ).join(
-        AlertType, AlertType.alert_type_id == Alert.alert_type_id
-    )
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
     
     # Apply filters
     conditions = []
@@ -50,21 +55,21 @@ async def list_alerts(
     if house_id:
         conditions.append(Alert.house_id == house_id)
     
-    if conditions:
-        query = query.where(and_(*conditions))
-    
-    # Get total count
-    count_query = select(func.count()).select_from(Alert)
-    if conditions:
-        count_query = count_query.where(and_(*conditions))
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    query = select(Alert, House.latitude, House.longitude, AlertType.type_name).join(
+        House, House.house_id == Alert.house_id
+    ).join(
+        AlertType, AlertType.alert_type_id == Alert.alert_type_id
+    ).where(*conditions)
     
-    # Apply pagination and ordering
-    query = query.order_by(Alert.created_at.desc()).limit(limit).offset(offset)
+    try:
+        query = paginate(query, Alert.created_at, Alert.alert_id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if offset:
+        query = query.offset(offset)
     
     result = await db.execute(query)
-    rows = result.all()
+    rows, next_cursor = page_rows(result.all(), limit, lambda row: (row[0].created_at, row[0].alert_id))
 
     alerts = []
     for alert, lat, lng, alert_type_name in rows:
@@ -73,14 +78,31 @@ async def list_alerts(
         alert_obj.longitude = lng
         alert_obj.alert_type_name = alert_type_name
         alerts.append(alert_obj)
+    
+    # Total count (exact only on request; counting scans every matching row)
+    count_query = select(Alert.alert_id).where(*conditions)
+    total_is_estimate = False
+    if include_total:
+        total_result = await db.execute(select(func.count()).select_from(count_query.subquery()))
+        total = total_result.scalar() or 0
+    elif next_cursor is None and not cursor and not offset:
+        total = len(alerts)  # Everything fits on the first page
+    else:
+        total = await estimate_count(db, count_query)
+        total_is_estimate = True
 
-    return AlertListResponse(alerts=alerts, total=total or 0)
+    return AlertListResponse(
+        alerts=alerts,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/{alert_id}", response_model=AlertResponse)
 async def get_alert(
     alert_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get alert details by ID.
@@ -138,11 +160,16 @@ async def acknowledge_alert(
         )
     
     # Update alert
+    previous_status = alert.status
     alert.status = "acknowledged"
     alert.acknowledged_at = datetime.utcnow()
     if request.notes:
         alert.notes = request.notes
     
+    stream_broker.publish_on_commit(
+        db, "alert_status_changed", alert.house_id, {**alert_payload(alert), "previous_status": previous_status}
+    )
+    
     await db.commit()
     
     logger.info(f"Alert {alert_id} acknowledged")
@@ -187,11 +214,16 @@ async def resolve_alert(
         )
     
     # Update alert
+    previous_status = alert.status
     alert.status = "resolved"
     alert.resolved_at = datetime.utcnow()
     if request.notes:
         alert.notes = request.notes
     
+    stream_broker.publish_on_commit(
+        db, "alert_status_changed", alert.house_id, {**alert_payload(alert), "previous_status": previous_status}
+    )
+    
     await db.commit()
     
     logger.info(f"Alert {alert_id} resolved")
@@ -236,10 +268,15 @@ async def dismiss_alert(
         )
     
     # Update alert
+    previous_status = alert.status
     alert.status = "false_positive"
     if request.notes:
         alert.notes = request.notes
     
+    stream_broker.publish_on_commit(
+        db, "alert_status_changed", alert.house_id, {**alert_payload(alert), "previous_status": previous_status}
+    )
+    
     await db.commit()
     
     logger.info(f"Alert {alert_id} dismissed")
@@ -0,0 +1,154 @@
+"""Analytics router for house and device activity over time."""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.database import get_read_db
+from app.models.device import Device
+from app.models.house import House
+from app.schemas.analytics import ActivityAnalyticsResponse, ActivityBucket, ActivityTotals
+from app.services.rollups import ROLLUPS, RollupDelta, bucket_start
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
+
+# Default period when since is not given
+DEFAULT_PERIODS = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+# Max buckets per response
+MAX_BUCKETS = 1000
+
+Granularity = Literal["hour", "day"]
+
+
+@router.get("/houses/{house_id}", response_model=ActivityAnalyticsResponse)
+async def house_analytics(
+    house_id: int,
+    granularity: Granularity = Query("hour", description="Bucket size: hour or day"),
+    since: Optional[datetime] = Query(None, description="Start of the period (default: 24 hours or 30 days ago)"),
+    until: Optional[datetime] = Query(None, description="End of the period (default: now)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get the activity of a house's devices per hour or day.
+
+    Read from the activity rollups only. Uptime is averaged over the
+    devices with rollups in the period.
+    """
+    # Not through reference_cache: it serves the write paths and must only be filled from the primary
+    if await db.scalar(select(House.house_id).where(House.house_id == house_id)) is None:
+        raise HTTPException(status_code=404, detail=f"House {house_id} not found")
+
+    return await _analytics(db, house_id, None, granularity, since, until)
+
+
+@router.get("/devices/{device_id}", response_model=ActivityAnalyticsResponse)
+async def device_analytics(
+    device_id: int,
+    granularity: Granularity = Query("hour", description="Bucket size: hour or day"),
+    since: Optional[datetime] = Query(None, description="Start of the period (default: 24 hours or 30 days ago)"),
+    until: Optional[datetime] = Query(None, description="End of the period (default: now)"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get the activity of a device per hour or day.
+
+    Read from the activity rollups only.
+    """
+    # Not through reference_cache: it serves the write paths and must only be filled from the primary
+    house_id = await db.scalar(select(Device.house_id).where(Device.device_id == device_id))
+    if house_id is None:
+        raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+
+    return await _analytics(db, house_id, device_id, granularity, since, until)
+
+
+async def _analytics(
+    db: AsyncSession,
+    house_id: int,
+    device_id: Optional[int],
+    granularity: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> ActivityAnalyticsResponse:
+    """Aggregate the rollup rows of a house or device into buckets and totals."""
+    model, width = ROLLUPS[granularity]
+    now = datetime.now(timezone.utc)
+    until = _aware(until) if until else now
+    since = _aware(since) if since else until - DEFAULT_PERIODS[granularity]
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+
+    # Whole buckets covering [since, until)
+    first = bucket_start(since, granularity)
+    end = bucket_start(until - timedelta(microseconds=1), granularity) + width
+    if (end - first) / width > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Period too long for {granularity} buckets (max {MAX_BUCKETS}); use a shorter period or day buckets",
+        )
+
+    conditions = [model.bucket_start >= first, model.bucket_start < end]
+    if device_id is not None:
+        conditions.append(model.device_id == device_id)
+    else:
+        conditions.append(model.house_id == house_id)
+    result = await db.execute(select(model).where(*conditions))
+    rows = result.scalars().all()
+
+    buckets: dict[datetime, RollupDelta] = {}
+    total = RollupDelta(house_id=house_id)
+    for row in rows:
+        delta = RollupDelta.from_row(row)
+        buckets.setdefault(row.bucket_start, RollupDelta(house_id=house_id)).merge(delta)
+        total.merge(delta)
+    devices = 1 if device_id is not None else len({row.device_id for row in rows})
+
+    response_buckets = []
+    bucket = first
+    while bucket < end:
+        covered = (min(bucket + width, now) - bucket).total_seconds()
+        response_buckets.append(ActivityBucket(
+            bucket_start=bucket,
+            **_totals(buckets.get(bucket), devices, covered).model_dump(),
+        ))
+        bucket += width
+
+    return ActivityAnalyticsResponse(
+        house_id=house_id,
+        device_id=device_id,
+        granularity=granularity,
+        since=first,
+        until=end,
+        totals=_totals(total, devices, (min(end, now) - first).total_seconds()),
+        buckets=response_buckets,
+    )
+
+
+def _totals(delta: Optional[RollupDelta], devices: int, covered_seconds: float) -> ActivityTotals:
+    """Turn summed rollup values into counts and means."""
+    uptime = None
+    if devices and covered_seconds > 0:
+        online = delta.online_seconds if delta else 0.0
+        uptime = round(min(online / (devices * covered_seconds), 1.0), 4)
+    if not delta:
+        return ActivityTotals(uptime=uptime)
+
+    return ActivityTotals(
+        event_count=delta.event_count,
+        events_by_label={label: count for label, count in delta.event_labels.items() if count},
+        mean_score=delta.score_sum / delta.event_count if delta.event_count else None,
+        alert_count=delta.alert_count,
+        alerts_by_severity={severity: count for severity, count in delta.alert_severities.items() if count},
+        alerts_by_status={status: count for status, count in delta.alert_statuses.items() if count},
+        mean_confidence=delta.confidence_sum / delta.confidence_count if delta.confidence_count else None,
+        heartbeat_count=delta.heartbeat_count,
+        uptime=uptime,
+    )
+
+
+def _aware(at: datetime) -> datetime:
+    """Treat naive times as UTC."""
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
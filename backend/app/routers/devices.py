@@ -1,12 +1,12 @@
 """Devices router for device management."""
 import logging
 from typing import Optional
-from datetime import datetime  # <- timezone 제거
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, Body  # <- Body 추가
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, delete
 
-from app.database import get_db                 # <- get_session 삭제
+from app.database import get_db, get_read_db                 # <- get_session 삭제
 from app.models.device import Device
 from app.models.house import House
 from app.models.device_type import DeviceType
@@ -18,7 +18,14 @@ from app.schemas.device import (
     DeviceCreate,
     DeviceUpdate,
     DeviceHeartbeatRequest,
+    HeartbeatAck,
 )
+from app.services.cache import reference_cache
+from app.services.dashboard import dashboard_metrics
+from app.services.heartbeat import heartbeat_service
+from app.services.liveness import offline_detector
+from app.services.rollups import rollup_service
+from app.services.stream import device_status_payload, stream_broker
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +35,7 @@ router = APIRouter(prefix="/api/v1/devices", tags=["devices"])
 @router.get("", response_model=DeviceListResponse)
 async def list_devices(
     house_id: Optional[int] = Query(None, description="Filter by house ID"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     List devices, optionally filtered by house ID.
@@ -49,7 +56,7 @@ async def list_devices(
 @router.get("/{device_id}", response_model=DeviceResponse)
 async def get_device(
     device_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get device details by ID.
@@ -112,6 +119,7 @@ async def create_device(
     db.add(device)
     await db.commit()
     await db.refresh(device)
+    reference_cache.put_device(device)
     
     logger.info(f"Created device {device.device_id} for house {device_data.house_id}")
     
@@ -149,6 +157,7 @@ async def update_device(
             )
     
     # Update fields
+    previous_status = device.status
     if device_data.device_name is not None:
         device.device_name = device_data.device_name
     if device_data.location is not None:
@@ -161,15 +170,20 @@ async def update_device(
         device.status = device_data.status
     if device_data.is_enabled is not None:
         device.is_enabled = device_data.is_enabled
+    if device.status != previous_status:
+        stream_broker.publish_on_commit(
+            db, "device_status_changed", device.house_id, device_status_payload(device, previous_status)
+        )
     
     await db.commit()
     await db.refresh(device)
+    reference_cache.put_device(device)
     
     logger.info(f"Updated device {device_id}")
     
     return DeviceResponse.model_validate(device)
 
-@router.post("/{device_id}/heartbeat", response_model=DeviceResponse)
+@router.post("/{device_id}/heartbeat", response_model=HeartbeatAck)
 async def device_heartbeat(
     device_id: int,
     payload: DeviceHeartbeatRequest | None = Body(None),  # 바디 없으면 None
@@ -177,34 +191,62 @@ async def device_heartbeat(
 ):
     """
     Receive a heartbeat from a device.
-    - Updates last_heartbeat to current UTC (naive datetime)
     - If `status` provided, set it; otherwise default to 'online'
     - Optionally updates firmware_version
+    - A heartbeat that changes status or firmware_version is written through
+      immediately; otherwise only last_heartbeat changes, and it is recorded
+      in memory and written with the next bulk flush
+      (HEARTBEAT_FLUSH_INTERVAL_SECONDS), which also restores the status if
+      another process changed it meanwhile
     """
-    # 1) device look up
+    received_at = datetime.now(timezone.utc)
+    new_status = payload.status if payload and payload.status else "online"
+    new_firmware = payload.firmware_version if payload else None
+
+    # 1) device look up (cached; kept current by every device write below)
+    cached = await reference_cache.get_device(db, device_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+
+    changed = cached.status != new_status or (
+        new_firmware is not None and new_firmware != cached.firmware_version
+    )
+    offline_detector.heartbeat(device_id, cached.device_type_id, received_at)
+    rollup_service.record_heartbeat(
+        device_id, cached.house_id, received_at, offline_detector.timeout_for(cached.device_type_id)
+    )
+    if not changed:
+        # 2a) only the time changed: coalesce
+        heartbeat_service.record(device_id, received_at, new_status)
+        return HeartbeatAck(
+            device_id=device_id, status=cached.status, received_at=received_at, written_through=False
+        )
+
+    # 2b) write through
     query = select(Device).where(Device.device_id == device_id)
     result = await db.execute(query)
     device = result.scalar_one_or_none()
     if not device:
+        reference_cache.invalidate_device(device_id)
         raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
 
-    # 2) heartbeat update 
-    device.last_heartbeat = datetime.utcnow()
+    previous_status = device.status
+    device.last_heartbeat = received_at
+    device.status = new_status
+    if new_firmware:
+        device.firmware_version = new_firmware
 
-    # 3)
-    if payload:
-        if payload.status:
-            device.status = payload.status
-        if payload.firmware_version:
-            device.firmware_version = payload.firmware_version
-
-    # if not payload update to online
-    if not payload or not payload.status:
-        device.status = "online"
+    if device.status != previous_status:
+        stream_broker.publish_on_commit(
+            db, "device_status_changed", device.house_id, device_status_payload(device, previous_status)
+        )
 
     await db.commit()
-    await db.refresh(device)
-    return DeviceResponse.model_validate(device)
+    heartbeat_service.discard(device_id)
+    reference_cache.put_device(device)
+    return HeartbeatAck(
+        device_id=device_id, status=device.status, received_at=received_at, written_through=True
+    )
 
 @router.delete("/{device_id}", status_code=204)
 async def delete_device(
@@ -238,11 +280,16 @@ async def delete_device(
     if events_count > 0 or alerts_count > 0:
         device.is_enabled = False
         await db.commit()
+        reference_cache.invalidate_device(device_id)
         logger.info(f"Soft-deleted device {device_id} (has {events_count} events, {alerts_count} alerts)")
     else:
         # Hard delete if no associations
+        status = device.status
         await db.execute(delete(Device).where(Device.device_id == device_id))
         await db.commit()
+        reference_cache.invalidate_device(device_id)
+        offline_detector.forget(device_id)
+        dashboard_metrics.device_deleted(status)
         logger.info(f"Deleted device {device_id}")
     
     return None
@@ -0,0 +1,94 @@
+"""Events router for browsing ingested events."""
+import logging
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from app.database import get_read_db
+from app.models.event import Event
+from app.schemas.event import EventResponse, EventListResponse
+from app.services.pagination import InvalidCursorError, estimate_count, page_rows, paginate
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/events", tags=["events"])
+
+
+@router.get("", response_model=EventListResponse)
+async def list_events(
+    house_id: Optional[int] = Query(None, description="Filter by house ID"),
+    device_id: Optional[int] = Query(None, description="Filter by device ID"),
+    event_type: Optional[str] = Query(None, description="Filter by event type"),
+    is_processed: Optional[bool] = Query(None, description="Filter by processing state"),
+    inference_label: Optional[str] = Query(None, description="Filter by inference label (e.g. distress)"),
+    since: Optional[datetime] = Query(None, description="Only events received at or after this time"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Count matching events exactly instead of estimating"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    List events with optional filtering, newest first.
+    
+    Pages are keyed on (created_at, event_id): pass the returned next_cursor
+    to get the following page. total is estimated from table statistics
+    unless include_total is set.
+    """
+    conditions = []
+    if house_id:
+        conditions.append(Event.house_id == house_id)
+    if device_id:
+        conditions.append(Event.device_id == device_id)
+    if event_type:
+        conditions.append(Event.event_type == event_type)
+    if is_processed is not None:
+        conditions.append(Event.is_processed == is_processed)
+    if inference_label:
+        conditions.append(Event.inference_label == inference_label)
+    if since:
+        conditions.append(Event.created_at >= since)
+    
+    try:
+        query = paginate(select(Event).where(*conditions), Event.created_at, Event.event_id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await db.execute(query)
+    events, next_cursor = page_rows(result.scalars().all(), limit, lambda event: (event.created_at, event.event_id))
+    
+    # Total count (exact only on request; counting scans every matching row)
+    count_query = select(Event.event_id).where(*conditions)
+    total_is_estimate = False
+    if include_total:
+        total_result = await db.execute(select(func.count()).select_from(count_query.subquery()))
+        total = total_result.scalar() or 0
+    elif next_cursor is None and not cursor:
+        total = len(events)  # Everything fits on the first page
+    else:
+        total = await estimate_count(db, count_query)
+        total_is_estimate = True
+    
+    return EventListResponse(
+        events=[EventResponse.model_validate(event) for event in events],
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/{event_id}", response_model=EventResponse)
+async def get_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get event details by ID.
+    """
+    result = await db.execute(select(Event).where(Event.event_id == event_id))
+    event = result.scalar_one_or_none()
+    
+    if not event:
+        raise HTTPException(status_code=404, detail=f"Event {event_id} not found")
+    
+    return EventResponse.model_validate(event)
@@ -2,7 +2,7 @@
 import logging
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db, check_db_health
+from app.database import get_db, check_db_health, check_replica_lag, replica_engine
 from app.schemas.health import HealthResponse
 
 logger = logging.getLogger(__name__)
@@ -16,13 +16,18 @@ async def health_check(
 ):
     """
     Health check endpoint.
-    Returns service status, version, and database connectivity.
+    Returns service status, version, and database connectivity, with the
+    read replica's reachability and lag when one is configured.
     """
     db_healthy = await check_db_health()
+    replica_lag = await check_replica_lag()
+    replica_healthy = replica_lag is not None if replica_engine is not None else None
     
     return HealthResponse(
-        status="healthy" if db_healthy else "degraded",
+        status="healthy" if db_healthy and replica_healthy is not False else "degraded",
         version="1.0.0",
         database=db_healthy,
+        replica=replica_healthy,
+        replica_lag_seconds=round(replica_lag, 3) if replica_lag is not None else None,
     )
 
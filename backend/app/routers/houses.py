@@ -3,7 +3,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_read_db
 from app.models.house import House
 from app.schemas.house import HouseResponse, HouseListResponse
 
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/api/v1/houses", tags=["houses"])
 
 @router.get("", response_model=HouseListResponse)
 async def list_houses(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     List all houses.
@@ -31,7 +31,7 @@ async def list_houses(
 @router.get("/{house_id}", response_model=HouseResponse)
 async def get_house(
     house_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get house details by ID.
@@ -3,7 +3,8 @@ import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from app.services.inference import inference_service
 from app.schemas.inference import InferenceResponse
-from app.services.storage import storage_service
+from app.services.storage import UploadTooLargeError, stream_upload_to_path
+from pathlib import Path
 import tempfile
 import os
 
@@ -21,15 +22,16 @@ async def predict(
     This is useful for local testing and development.
     """
     try:
-        # Read file content
-        audio_content = await audio_file.read()
-        if len(audio_content) == 0:
-            raise HTTPException(status_code=400, detail="Audio file is empty")
-        
-        # Save to temporary file
+        # Stream the upload to a temporary file (size limit checked as it arrives)
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(audio_content)
             tmp_path = tmp_file.name
+        try:
+            stored = await stream_upload_to_path(audio_file, Path(tmp_path))
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        if stored.size_bytes == 0:
+            os.unlink(tmp_path)
+            raise HTTPException(status_code=400, detail="Audio file is empty")
         
         try:
             # Run inference
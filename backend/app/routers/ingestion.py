@@ -1,17 +1,21 @@
 """Ingestion router for IoT event ingestion."""
+import asyncio
+import json
 import logging
 from datetime import datetime
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from app.config import settings
 from app.database import get_db
-from app.models.event import Event
 from app.models.device import Device
-from app.models.house import House
-from app.schemas.event import EventResponse
-from app.services.inference import inference_service
-from app.services.policy import policy_engine
-from app.services.storage import storage_service
+from app.models.event import Event
+from app.schemas.event import EventResponse, BatchEventItem, BatchEventResult, BatchEventResponse
+from app.services.cache import reference_cache
+from app.services.processing import QueueFullError, event_processor, predict_stored, process_event
+from app.services.storage import UploadTooLargeError, storage_service
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,7 @@ router = APIRouter(prefix="/api/v1/ingest", tags=["ingestion"])
 
 @router.post("/event", response_model=EventResponse, status_code=201)
 async def ingest_event(
+    response: Response,
     house_id: int = Form(...),
     device_id: int = Form(...),
     timestamp: str = Form(...),  # ISO format datetime string
@@ -33,8 +38,10 @@ async def ingest_event(
     1. Accepts audio file and metadata
     2. Saves the file locally
     3. Creates an event record
-    4. Runs inference synchronously
-    5. Evaluates policy and creates alert if needed
+    4. In async mode, queues the event and returns 202 immediately;
+       in sync mode, runs inference and policy evaluation inline (201)
+    
+    Returns 429 with Retry-After when the processing queue is full.
     """
     try:
         # Parse timestamp
@@ -43,33 +50,41 @@ async def ingest_event(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid timestamp format. Use ISO format.")
         
-        # Validate house and device exist
-        house_result = await db.execute(select(House).where(House.house_id == house_id))
-        house = house_result.scalar_one_or_none()
+        # Reject early when the processing queue is full (backpressure)
+        use_queue = event_processor.enabled and event_processor.running
+        if use_queue and event_processor.is_full():
+            raise _queue_full()
+        
+        # Validate house and device exist (served from the reference cache)
+        house = await reference_cache.get_house(db, house_id)
         if not house:
             raise HTTPException(status_code=404, detail=f"House {house_id} not found")
         
-        device_result = await db.execute(select(Device).where(Device.device_id == device_id))
-        device = device_result.scalar_one_or_none()
+        device = await reference_cache.get_device(db, device_id)
         if not device:
             raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
         
         if device.house_id != house_id:
             raise HTTPException(status_code=400, detail="Device does not belong to the specified house")
         
-        # Read audio file
-        audio_content = await audio_file.read()
-        if len(audio_content) == 0:
+        # Stream the upload to storage (size limit and hash checked as it arrives)
+        try:
+            stored = await storage_service.save_audio_upload(audio_file, str(house_id), str(device_id))
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        if stored.size_bytes == 0:
+            await storage_service.delete_file(stored.path)
             raise HTTPException(status_code=400, detail="Audio file is empty")
-        
-        # Save file
-        file_path = storage_service.save_audio_file(audio_content, str(house_id), str(device_id))
+        file_path = stored.path
         
         # Store inference metadata in raw_data JSON
         raw_data = {
             "file_path": file_path,
             "original_filename": audio_file.filename,
             "content_type": audio_file.content_type,
+            "size_bytes": stored.size_bytes,
+            "sha256": stored.sha256,
+            "event_timestamp": event_timestamp.isoformat(),
         }
         
         # Create event record
@@ -85,37 +100,22 @@ async def ingest_event(
         db.add(event)
         await db.flush()  # Flush to get the event_id
         
-        # Run inference
+        if use_queue:
+            # Commit before enqueueing so workers can see the event
+            await db.commit()
+            try:
+                event_processor.enqueue_nowait(event.event_id, event_timestamp)
+            except QueueFullError:
+                # The queue filled up while the upload was stored; withdraw the event
+                await _discard_events(db, [event.event_id], [file_path])
+                raise _queue_full()
+            response.status_code = 202
+            logger.info(f"Queued event {event.event_id} for house {house_id}, device {device_id}")
+            return EventResponse.model_validate(event)
+        
+        # Run inference and policy evaluation inline
         try:
-            inference_result = await inference_service.predict(file_path)
-            
-            # Update raw_data with inference results
-            if event.raw_data:
-                event.raw_data["inference"] = {
-                    "label": inference_result.label,
-                    "score": float(inference_result.score),
-                }
-            else:
-                event.raw_data = {
-                    "inference": {
-                        "label": inference_result.label,
-                        "score": float(inference_result.score),
-                    }
-                }
-            
-            # Evaluate policy and create alert if needed
-            alert_id = await policy_engine.evaluate(
-                db=db,
-                event_id=event.event_id,
-                house_id=house_id,
-                device_id=device_id,
-                inference_result=inference_result,
-                event_timestamp=event_timestamp,
-            )
-            
-            # Mark event as processed
-            event.is_processed = True
-            
+            await process_event(db, event, event_timestamp)
         except Exception as e:
             logger.error(f"Inference/policy processing failed for event {event.event_id}: {e}")
             # Don't fail the entire request, but leave is_processed as False
@@ -131,3 +131,193 @@ async def ingest_event(
     except Exception as e:
         logger.error(f"Error ingesting event: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/events:batch", response_model=BatchEventResponse, status_code=201)
+async def ingest_events_batch(
+    response: Response,
+    metadata: str = Form(...),  # JSON array of {house_id, device_id, timestamp}, one per file
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ingest many audio clips with their metadata in one request.
+    
+    Item N of the metadata array describes the Nth uploaded file. All
+    house/device pairs are validated with one query and all events are
+    inserted with one multi-row INSERT. Invalid items are rejected
+    individually; the rest are queued (202) in async mode or processed
+    inline (201) in sync mode, with inference for the batch run together.
+    
+    Returns 429 with Retry-After when the processing queue cannot take the
+    batch. If it fills up while the batch is stored, the items that no longer
+    fit are withdrawn and rejected.
+    """
+    try:
+        try:
+            items = TypeAdapter(List[BatchEventItem]).validate_python(json.loads(metadata))
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid metadata: {e}")
+        
+        if len(items) != len(files):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Metadata has {len(items)} items but {len(files)} files were uploaded",
+            )
+        if len(items) > settings.ingest_batch_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch exceeds the maximum of {settings.ingest_batch_max_items} items",
+            )
+        
+        # Reject early when the processing queue cannot take the whole batch
+        use_queue = event_processor.enabled and event_processor.running
+        if use_queue and event_processor.free_slots() < len(items):
+            raise _queue_full()
+        
+        # Validate every house/device pair with a single IN query
+        device_ids = {item.device_id for item in items}
+        result = await db.execute(
+            select(Device.device_id, Device.house_id).where(Device.device_id.in_(device_ids))
+        )
+        device_houses = dict(result.all())
+        
+        results = [BatchEventResult(index=i, status="rejected") for i in range(len(items))]
+        rows = []
+        row_indexes = []
+        for i, (item, audio_file) in enumerate(zip(items, files)):
+            if item.device_id not in device_houses:
+                results[i].error = f"Device {item.device_id} not found"
+                continue
+            if device_houses[item.device_id] != item.house_id:
+                results[i].error = "Device does not belong to the specified house"
+                continue
+            
+            try:
+                stored = await storage_service.save_audio_upload(audio_file, str(item.house_id), str(item.device_id))
+            except UploadTooLargeError as e:
+                results[i].error = str(e)
+                continue
+            if stored.size_bytes == 0:
+                await storage_service.delete_file(stored.path)
+                results[i].error = "Audio file is empty"
+                continue
+            
+            rows.append({
+                "house_id": item.house_id,
+                "device_id": item.device_id,
+                "event_type": "audio",
+                "raw_data": {
+                    "file_path": stored.path,
+                    "original_filename": audio_file.filename,
+                    "content_type": audio_file.content_type,
+                    "size_bytes": stored.size_bytes,
+                    "sha256": stored.sha256,
+                    "event_timestamp": item.timestamp.isoformat(),
+                },
+                "media_url": stored.path,
+                "is_processed": False,
+            })
+            row_indexes.append(i)
+        
+        event_ids = []
+        if rows:
+            # Multi-row INSERT; RETURNING rows come back in parameter order
+            result = await db.execute(
+                insert(Event).returning(Event.event_id, sort_by_parameter_order=True),
+                rows,
+            )
+            event_ids = list(result.scalars().all())
+            for i, event_id in zip(row_indexes, event_ids):
+                results[i].event_id = event_id
+        
+        if use_queue:
+            # Commit before enqueueing so workers can see the events
+            await db.commit()
+            overflow = {}
+            for row, i, event_id in zip(rows, row_indexes, event_ids):
+                try:
+                    event_processor.enqueue_nowait(event_id, items[i].timestamp)
+                    results[i].status = "queued"
+                except QueueFullError as e:
+                    # The queue filled up while the uploads were stored; withdraw the rest
+                    overflow[event_id] = row["media_url"]
+                    results[i].event_id = None
+                    results[i].error = str(e)
+            if overflow:
+                await _discard_events(db, list(overflow), list(overflow.values()))
+                if len(overflow) == len(event_ids):
+                    raise _queue_full()
+                event_ids = [event_id for event_id in event_ids if event_id not in overflow]
+            response.status_code = 202
+        elif event_ids:
+            await _process_batch_inline(db, event_ids, row_indexes, items, results)
+        
+        accepted = len(event_ids)
+        logger.info(f"Batch ingested {accepted} events ({len(items) - accepted} rejected)")
+        return BatchEventResponse(accepted=accepted, rejected=len(items) - accepted, items=results)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ingesting event batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _queue_full() -> HTTPException:
+    """429 response telling the client when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail="Ingestion queue is full, retry later",
+        headers={"Retry-After": str(event_processor.retry_after_seconds)},
+    )
+
+
+async def _discard_events(db: AsyncSession, event_ids: List[int], media_urls: List[str]):
+    """
+    Delete committed events that could not be queued, with their stored audio.
+    
+    With content-addressed storage a duplicate clip shares the file of an
+    earlier event, so only files no remaining event references are deleted.
+    """
+    await db.execute(delete(Event).where(Event.event_id.in_(event_ids)))
+    await db.commit()
+    for media_url in set(media_urls):
+        still_referenced = await db.execute(select(Event.event_id).where(Event.media_url == media_url).limit(1))
+        if still_referenced.first():
+            continue
+        await storage_service.delete_file(media_url)
+
+
+async def _process_batch_inline(
+    db: AsyncSession,
+    event_ids: List[int],
+    row_indexes: List[int],
+    items: List[BatchEventItem],
+    results: List[BatchEventResult],
+):
+    """Run inference for a batch concurrently (so it is micro-batched), then policy per event."""
+    result = await db.execute(select(Event).where(Event.event_id.in_(event_ids)))
+    events = {event.event_id: event for event in result.scalars().all()}
+    ordered = [events[event_id] for event_id in event_ids]
+    
+    # A failed download or decode only affects its own item
+    predictions = await asyncio.gather(
+        *(predict_stored(event.media_url) for event in ordered),
+        return_exceptions=True,
+    )
+    for i, event, prediction in zip(row_indexes, ordered, predictions):
+        if isinstance(prediction, Exception):
+            logger.error(f"Inference failed for event {event.event_id}: {prediction}")
+            # Leave is_processed as False for the recovery sweep, like single-event ingestion
+            results[i].status = "ingested"
+            continue
+        try:
+            await process_event(db, event, items[i].timestamp, prediction)
+            results[i].status = "processed"
+        except Exception as e:
+            logger.error(f"Inference/policy processing failed for event {event.event_id}: {e}")
+            # Leave is_processed as False, like single-event ingestion
+            results[i].status = "ingested"
+    
+    await db.commit()
@@ -2,13 +2,23 @@
 import logging
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, distinct
-from app.database import get_db
-from app.models.alert import Alert
-from app.models.device import Device
-from app.models.house import House
-from app.schemas.metrics import MetricsResponse, SystemHealth
-import random
+from app.config import settings
+from app.database import engine, get_db, get_read_db, pool_stats, replica_engine
+from app.schemas.metrics import (
+    MetricsResponse,
+    SystemHealth,
+    InferenceMetricsResponse,
+    InferenceBatchMetrics,
+    CacheMetricsResponse,
+    StorageMetricsResponse,
+    DatabaseMetricsResponse,
+    PoolMetrics,
+)
+from app.services.cache import reference_cache
+from app.services.dashboard import dashboard_metrics
+from app.services.retention import retention_service
+from app.services.inference import inference_service
+from app.services.processing import event_processor
 
 logger = logging.getLogger(__name__)
 
@@ -21,43 +31,59 @@ async def get_metrics(
 ):
     """
     Get dashboard metrics.
-    """
-    # Active houses (houses with active alerts)
-    active_houses_query = select(func.count(distinct(Alert.house_id))).where(
-        Alert.status == "active"
-    )
-    active_houses_result = await db.execute(active_houses_query)
-    active_houses = active_houses_result.scalar() or 0
     
-    # Total devices
-    total_devices_query = select(func.count(Device.device_id))
-    total_devices_result = await db.execute(total_devices_query)
-    total_devices = total_devices_result.scalar() or 0
-    
-    # Online devices
-    online_devices_query = select(func.count(Device.device_id)).where(
-        Device.status == "online"
-    )
-    online_devices_result = await db.execute(online_devices_query)
-    online_devices = online_devices_result.scalar() or 0
+    Counts are served from a cache shared by all viewers (refreshed at most
+    every METRICS_CACHE_TTL_SECONDS); system health is measured from recent
+    request latencies and the ingest queue. The cache is refreshed from the
+    primary, since this process's writes adjust it as they commit.
+    """
+    counts = await dashboard_metrics.counts(db)
     
-    # Active alerts
-    active_alerts_query = select(func.count(Alert.alert_id)).where(
-        Alert.status == "active"
+    return MetricsResponse(
+        **counts,
+        system_health=SystemHealth(**dashboard_metrics.system_health(event_processor.depth())),
     )
-    active_alerts_result = await db.execute(active_alerts_query)
-    active_alerts = active_alerts_result.scalar() or 0
-    
-    # System health (simulated for MVP)
-    system_health = SystemHealth(
-        api_latency=40 + random.randint(0, 30),
-        queue_depth=random.randint(0, 10),
+
+
+@router.get("/inference", response_model=InferenceMetricsResponse)
+async def get_inference_metrics():
+    """
+    Get inference batching metrics (batch sizes and per-batch latency).
+    """
+    return InferenceMetricsResponse(
+        model_loaded=inference_service.model_loaded,
+        resident_models=inference_service.resident_models(),
+        process_pool=inference_service.uses_process_pool,
+        workers=max(1, settings.inference_workers),
+        batching=InferenceBatchMetrics(**inference_service.stats()),
     )
-    
-    return MetricsResponse(
-        active_houses=active_houses,
-        total_devices=total_devices,
-        online_devices=online_devices,
-        active_alerts=active_alerts,
-        system_health=system_health,
+
+
+@router.get("/cache", response_model=CacheMetricsResponse)
+async def get_cache_metrics():
+    """
+    Get reference data cache metrics (entries and hit rates).
+    """
+    return CacheMetricsResponse(**reference_cache.stats())
+
+
+@router.get("/database", response_model=DatabaseMetricsResponse)
+async def get_database_metrics():
+    """
+    Get connection pool metrics (connections in use, utilization and checkout wait times) per engine.
+    """
+    return DatabaseMetricsResponse(
+        connection_profile=settings.database_connection_profile,
+        primary=PoolMetrics(**pool_stats(engine)),
+        replica=PoolMetrics(**pool_stats(replica_engine)) if replica_engine is not None else None,
     )
+
+
+@router.get("/storage", response_model=StorageMetricsResponse)
+async def get_storage_metrics(
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get audio storage usage per tenant, with quotas and the last retention cycle.
+    """
+    return StorageMetricsResponse(**await retention_service.usage_report(db))
@@ -213,7 +213,8 @@ async def activate_model(
 ):
     """
     Activate a model (deactivates current active model and activates this one).
-    This will trigger a hot-reload of the model in the inference service.
+    This will trigger a hot-reload of the model in the inference service;
+    recently used models are still resident and switch instantly.
     """
     # Get the model to activate
     query = select(MLModel).where(MLModel.model_id == model_id)
@@ -255,10 +256,12 @@ async def activate_model(
     # Now activate the selected model
     model.is_active = True
     
-    # Try to load the model in inference service before committing
+    # Load (or reuse a resident copy of) the model in the background and
+    # switch to it before committing; in-flight predictions finish on the old model
     try:
-        inference_service.load_model(str(model_file_path))
-        inference_service.current_model_id = model.model_id
+        loaded = await inference_service.activate_model(str(model_file_path), model.model_id)
+        if not loaded:
+            raise RuntimeError(f"Model at {model.file_path} could not be loaded")
         logger.info(f"Activated and reloaded model: {model.model_name} (ID: {model_id})")
     except Exception as e:
         logger.error(f"Failed to reload model: {e}", exc_info=True)
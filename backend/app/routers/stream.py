@@ -0,0 +1,75 @@
+"""Stream router: server-sent events for alert and device changes."""
+import asyncio
+import json
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.services.stream import StreamMessage, stream_broker
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/stream", tags=["stream"])
+
+# Reconnection delay suggested to EventSource clients
+RETRY_MS = 3000
+
+
+def format_sse(message: StreamMessage) -> str:
+    """Format a message as a server-sent event."""
+    return f"id: {message.id}\nevent: {message.event}\ndata: {json.dumps(message.data, default=str)}\n\n"
+
+
+@router.get("")
+async def stream_events(
+    house_id: Optional[List[int]] = Query(None, description="Houses to receive changes for (repeatable; all if omitted)"),
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id (same as the Last-Event-ID header)"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Stream alert_created, alert_status_changed and device_status_changed events.
+
+    Uses server-sent events (text/event-stream), so browsers can consume it
+    with EventSource, which reconnects automatically and sends the
+    Last-Event-ID header; missed events are then replayed from a bounded
+    buffer. When they are no longer available, a `reset` event is sent
+    first and the client should reload its state. Comment lines are sent
+    as keepalives every STREAM_KEEPALIVE_SECONDS.
+    """
+    resume_after = last_event_id_header if last_event_id_header is not None else last_event_id
+    subscription, resumed = stream_broker.subscribe(house_id, resume_after)
+
+    async def events():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if not resumed:
+                yield f"event: reset\ndata: {json.dumps({'reason': 'missed events are no longer available'})}\n\n"
+            for message in subscription.replay:
+                yield format_sse(message)
+
+            while not subscription.overflowed:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.stream_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(message)
+
+            # Dropped for falling behind: drain what was queued, then ask for a reload
+            while not subscription.queue.empty():
+                yield format_sse(subscription.queue.get_nowait())
+            yield f"event: reset\ndata: {json.dumps({'reason': 'client fell behind'})}\n\n"
+        finally:
+            stream_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
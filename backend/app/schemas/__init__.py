@@ -1,5 +1,5 @@
 """Pydantic schemas for request/response validation."""
-from app.schemas.event import EventCreate, EventResponse
+from app.schemas.event import EventCreate, EventResponse, EventListResponse, BatchEventItem, BatchEventResponse
 from app.schemas.alert import (
     AlertResponse,
     AlertListResponse,
@@ -7,10 +7,10 @@ from app.schemas.alert import (
     AlertResolve,
     AlertDismiss,
 )
-from app.schemas.device import DeviceResponse, DeviceListResponse
+from app.schemas.device import DeviceResponse, DeviceListResponse, HeartbeatAck
 from app.schemas.house import HouseResponse, HouseListResponse
 from app.schemas.health import HealthResponse
-from app.schemas.metrics import MetricsResponse
+from app.schemas.metrics import MetricsResponse, InferenceMetricsResponse, CacheMetricsResponse, StorageMetricsResponse, DatabaseMetricsResponse
 from app.schemas.inference import InferenceRequest, InferenceResponse
 from app.schemas.ml_model import (
     MLModelResponse,
@@ -19,10 +19,14 @@ from app.schemas.ml_model import (
     MLModelUpdate,
     MLModelActivate,
 )
+from app.schemas.analytics import ActivityTotals, ActivityBucket, ActivityAnalyticsResponse
 
 __all__ = [
     "EventCreate",
     "EventResponse",
+    "EventListResponse",
+    "BatchEventItem",
+    "BatchEventResponse",
     "AlertResponse",
     "AlertListResponse",
     "AlertAcknowledge",
@@ -30,10 +34,15 @@ __all__ = [
     "AlertDismiss",
     "DeviceResponse",
     "DeviceListResponse",
+    "HeartbeatAck",
     "HouseResponse",
     "HouseListResponse",
     "HealthResponse",
     "MetricsResponse",
+    "InferenceMetricsResponse",
+    "CacheMetricsResponse",
+    "StorageMetricsResponse",
+    "DatabaseMetricsResponse",
     "InferenceRequest",
     "InferenceResponse",
     "MLModelResponse",
@@ -41,5 +50,8 @@ __all__ = [
     "MLModelCreate",
     "MLModelUpdate",
     "MLModelActivate",
+    "ActivityTotals",
+    "ActivityBucket",
+    "ActivityAnalyticsResponse",
 ]
 
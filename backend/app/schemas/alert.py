@@ -31,7 +31,9 @@ class AlertResponse(BaseModel):
 class AlertListResponse(BaseModel):
     """Schema for alert list response."""
     alerts: List[AlertResponse]
-    total: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False  # total comes from table statistics (pass include_total for an exact count)
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page; None on the last page
 
 
 class AlertAcknowledge(BaseModel):
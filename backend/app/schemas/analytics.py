@@ -0,0 +1,33 @@
+"""Activity analytics schemas."""
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class ActivityTotals(BaseModel):
+    """Schema for activity totals over a period."""
+    event_count: int = 0
+    events_by_label: Dict[str, int] = {}
+    mean_score: Optional[float] = None  # Mean inference score of the events
+    alert_count: int = 0
+    alerts_by_severity: Dict[str, int] = {}
+    alerts_by_status: Dict[str, int] = {}
+    mean_confidence: Optional[float] = None  # Mean confidence score of the alerts
+    heartbeat_count: int = 0
+    uptime: Optional[float] = None  # Share of the period covered by heartbeats (0-1)
+
+
+class ActivityBucket(ActivityTotals):
+    """Schema for the activity of one hour or day."""
+    bucket_start: datetime
+
+
+class ActivityAnalyticsResponse(BaseModel):
+    """Schema for house or device activity analytics."""
+    house_id: int
+    device_id: Optional[int] = None
+    granularity: str  # hour or day
+    since: datetime
+    until: datetime
+    totals: ActivityTotals
+    buckets: List[ActivityBucket]
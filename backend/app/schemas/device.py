@@ -54,3 +54,11 @@ class DeviceHeartbeatRequest(BaseModel):
     status: Optional[str] = None              # e.g., "online", "degraded"
     firmware_version: Optional[str] = None    # optional metadata
     metrics: Optional[dict] = None            # optional device health metrics (ignored for now)
+
+
+class HeartbeatAck(BaseModel):
+    """Lightweight acknowledgement of a device heartbeat."""
+    device_id: int
+    status: str
+    received_at: datetime
+    written_through: bool  # False when only recorded for the next bulk flush
@@ -1,7 +1,7 @@
 """Event schemas."""
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class EventCreate(BaseModel):
@@ -18,9 +18,41 @@ class EventResponse(BaseModel):
     device_id: int
     event_type: Optional[str] = None
     raw_data: Optional[Dict[str, Any]] = None
+    inference_label: Optional[str] = None
+    inference_score: Optional[float] = None
     media_url: Optional[str] = None
     created_at: datetime
     is_processed: bool
     
     class Config:
         from_attributes = True
+
+
+class EventListResponse(BaseModel):
+    """Schema for event list response."""
+    events: List[EventResponse]
+    total: Optional[int] = None
+    total_is_estimate: bool = False  # total comes from table statistics (pass include_total for an exact count)
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page; None on the last page
+
+
+class BatchEventItem(BaseModel):
+    """Metadata for one clip in a batch upload; matched to the file at the same position."""
+    house_id: int
+    device_id: int
+    timestamp: datetime
+
+
+class BatchEventResult(BaseModel):
+    """Outcome for one item of a batch upload."""
+    index: int
+    status: str  # queued, processed, ingested or rejected
+    event_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchEventResponse(BaseModel):
+    """Schema for batch ingestion response."""
+    accepted: int
+    rejected: int
+    items: List[BatchEventResult]
@@ -1,5 +1,6 @@
 """Health check schemas."""
 from pydantic import BaseModel
+from typing import Optional
 
 
 class HealthResponse(BaseModel):
@@ -7,4 +8,6 @@ class HealthResponse(BaseModel):
     status: str
     version: str
     database: bool
+    replica: Optional[bool] = None  # None when no read replica is configured
+    replica_lag_seconds: Optional[float] = None  # Time since the replica's last replayed transaction
 
@@ -1,6 +1,6 @@
 """Inference schemas."""
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class InferenceRequest(BaseModel):
@@ -8,8 +8,18 @@ class InferenceRequest(BaseModel):
     file_path: Optional[str] = None  # For testing endpoint
 
 
+class InferenceWindow(BaseModel):
+    """Per-window result for sliding-window inference."""
+    start_s: float  # Window start offset in the clip (seconds)
+    end_s: float  # Window end offset in the clip (seconds)
+    label: str
+    score: float
+
+
 class InferenceResponse(BaseModel):
     """Schema for inference response."""
     label: str
     score: float
+    windows: Optional[List[InferenceWindow]] = None  # Set in windowed mode
+    elapsed_ms: Optional[float] = None  # Forward pass time of the batch this clip ran in
 
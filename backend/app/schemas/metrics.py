@@ -1,11 +1,16 @@
 """Metrics schemas."""
 from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 
 class SystemHealth(BaseModel):
     """System health metrics."""
-    api_latency: int
-    queue_depth: int
+    api_latency: int  # Median request latency (ms) over recent requests
+    api_latency_p95: float = 0.0
+    api_latency_p99: float = 0.0
+    latency_samples: int = 0  # Requests the percentiles are computed over
+    queue_depth: int  # Events waiting in the ingest queue
 
 
 class MetricsResponse(BaseModel):
@@ -16,3 +21,90 @@ class MetricsResponse(BaseModel):
     active_alerts: int
     system_health: SystemHealth
 
+
+
+class InferenceBatchMetrics(BaseModel):
+    """Micro-batching statistics for the inference service."""
+    batches_total: int
+    items_total: int
+    pending: int
+    max_batch_size: int
+    max_wait_ms: float
+    avg_batch_size: float
+    max_observed_batch_size: int
+    latency_ms_p50: float
+    latency_ms_p95: float
+    latency_ms_max: float
+
+
+class InferenceMetricsResponse(BaseModel):
+    """Schema for inference metrics response."""
+    model_loaded: bool
+    resident_models: Dict[str, List[str]]  # Models cached per inference process ("api" or "worker-<pid>"), least recently used first
+    process_pool: bool
+    workers: int
+    batching: InferenceBatchMetrics
+
+    class Config:
+        protected_namespaces = ()  # Disable protected namespace warnings
+
+
+class CacheTableMetrics(BaseModel):
+    """Entry count and hit/miss counters for one cached table."""
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class CacheMetricsResponse(BaseModel):
+    """Schema for reference cache metrics response."""
+    houses: CacheTableMetrics
+    devices: CacheTableMetrics
+    alert_types: CacheTableMetrics
+
+
+class TenantStorageUsage(BaseModel):
+    """Audio storage usage of one tenant."""
+    tenant_id: int
+    files: int
+    size_bytes: int
+    files_without_size: int
+    flac_files: int
+    oldest_audio_at: Optional[datetime] = None
+    quota_bytes: Optional[int] = None
+    quota_used: Optional[float] = None
+    max_age_days: Optional[int] = None
+    alert_max_age_days: Optional[int] = None
+
+
+class StorageMetricsResponse(BaseModel):
+    """Schema for audio storage usage response."""
+    storage_path: str
+    disk_total_bytes: int
+    disk_used_bytes: int
+    disk_free_bytes: int
+    retention_enabled: bool
+    last_run: Optional[Dict[str, Any]] = None
+    tenants: List[TenantStorageUsage]
+
+
+class PoolMetrics(BaseModel):
+    """Connection pool usage of one database engine."""
+    pool_size: int
+    max_overflow: int
+    checked_out: int  # Connections in use
+    idle: int  # Open connections waiting in the pool
+    utilization: float  # checked_out / (pool_size + max_overflow)
+    checkouts: int
+    checkout_timeouts: int  # Checkouts that gave up after DATABASE_POOL_TIMEOUT_SECONDS
+    wait_ms_p50: float  # Time to get a connection, over recent checkouts
+    wait_ms_p95: float
+    wait_ms_max: float
+
+
+class DatabaseMetricsResponse(BaseModel):
+    """Schema for database connection pool metrics response."""
+    connection_profile: str
+    primary: PoolMetrics
+    replica: Optional[PoolMetrics] = None
@@ -2,6 +2,16 @@
 from app.services.inference import InferenceService
 from app.services.policy import PolicyEngine
 from app.services.storage import StorageService
+from app.services.processing import EventProcessor
+from app.services.cache import ReferenceCache
+from app.services.retention import RetentionService
 
-__all__ = ["InferenceService", "PolicyEngine", "StorageService"]
+__all__ = [
+    "InferenceService",
+    "PolicyEngine",
+    "StorageService",
+    "EventProcessor",
+    "ReferenceCache",
+    "RetentionService",
+]
 
@@ -0,0 +1,136 @@
+"""Micro-batching of concurrent requests into single batch calls."""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+from app.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+# Number of recent batches kept for size/latency statistics
+STATS_HISTORY = 1000
+
+
+class MicroBatcher:
+    """
+    Collects concurrent submissions into batches.
+
+    A batch is dispatched when it reaches max_batch_size items or when the
+    oldest pending item has waited max_wait_ms, whichever comes first. The
+    runner receives the list of items and must return one result per item,
+    in the same order.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[list], Awaitable[list]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "batcher",
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            runner: Async callable that processes a list of items
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: Maximum time to wait for a batch to fill
+            name: Name used in log messages
+        """
+        self.runner = runner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Statistics
+        self.batches_total = 0
+        self.items_total = 0
+        self._history: deque[tuple[int, float]] = deque(maxlen=STATS_HISTORY)
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            The runner's result for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch pending items as one or more batches."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]):
+        """Run a single batch and resolve its futures."""
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await self.runner(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: runner returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"{self.name}: batch of {len(items)} failed: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._record(len(items), (time.perf_counter() - start) * 1000.0)
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int, latency_ms: float):
+        """Record statistics for a completed batch."""
+        self.batches_total += 1
+        self.items_total += size
+        self._history.append((size, latency_ms))
+
+    def stats(self) -> dict:
+        """
+        Get batch size and latency statistics.
+
+        Returns:
+            Dictionary with totals and statistics over recent batches
+        """
+        sizes = sorted(size for size, _ in self._history)
+        latencies = sorted(latency for _, latency in self._history)
+        return {
+            "batches_total": self.batches_total,
+            "items_total": self.items_total,
+            "pending": len(self._pending),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_observed_batch_size": sizes[-1] if sizes else 0,
+            "latency_ms_p50": percentile(latencies, 0.50),
+            "latency_ms_p95": percentile(latencies, 0.95),
+            "latency_ms_max": latencies[-1] if latencies else 0.0,
+        }
+
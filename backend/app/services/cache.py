@@ -0,0 +1,209 @@
+"""In-memory cache for reference data read on the ingest hot path."""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.alert_type import AlertType
+from app.models.device import Device
+from app.models.house import House
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedHouse:
+    """Snapshot of the house fields used during ingestion."""
+    house_id: int
+    tenant_id: int
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class CachedDevice:
+    """Snapshot of the device fields used during ingestion."""
+    device_id: int
+    house_id: int
+    device_type_id: int
+    location: Optional[str]
+    firmware_version: Optional[str]
+    status: str
+    is_enabled: bool
+
+
+@dataclass(frozen=True)
+class CachedAlertType:
+    """Snapshot of an alert type."""
+    alert_type_id: int
+    type_name: str
+
+
+class _TTLTable:
+    """A dictionary whose entries expire after a fixed TTL, with hit/miss counters."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._entries: dict[Any, tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Any, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Any):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ReferenceCache:
+    """
+    TTL + invalidation cache for houses, devices and alert types.
+
+    Entries are immutable snapshots, not ORM instances, so they can be
+    shared across sessions. The devices router invalidates device entries
+    on writes. The API has no write paths for houses or alert types, so
+    their entries only expire; the TTL bounds staleness for changes made
+    elsewhere (other API processes or direct database edits).
+    """
+
+    def __init__(self):
+        """Initialize the reference cache."""
+        ttl = settings.reference_cache_ttl_seconds
+        self._houses = _TTLTable(ttl)
+        self._devices = _TTLTable(ttl)
+        self._alert_types = _TTLTable(ttl)
+
+    async def get_house(self, db: AsyncSession, house_id: int) -> Optional[CachedHouse]:
+        """
+        Get a house by ID.
+
+        Args:
+            db: Database session used on a cache miss
+            house_id: ID of the house
+
+        Returns:
+            House snapshot, or None if the house does not exist
+        """
+        return await self._get(
+            self._houses, house_id, db,
+            select(House).where(House.house_id == house_id),
+            lambda house: CachedHouse(
+                house_id=house.house_id,
+                tenant_id=house.tenant_id,
+                is_active=house.is_active,
+            ),
+        )
+
+    async def get_device(self, db: AsyncSession, device_id: int) -> Optional[CachedDevice]:
+        """
+        Get a device by ID.
+
+        Args:
+            db: Database session used on a cache miss
+            device_id: ID of the device
+
+        Returns:
+            Device snapshot, or None if the device does not exist
+        """
+        return await self._get(
+            self._devices, device_id, db,
+            select(Device).where(Device.device_id == device_id),
+            self._device_snapshot,
+        )
+
+    async def get_alert_type(self, db: AsyncSession, type_name: str) -> Optional[CachedAlertType]:
+        """
+        Get an alert type by name.
+
+        Args:
+            db: Database session used on a cache miss
+            type_name: Name of the alert type
+
+        Returns:
+            Alert type snapshot, or None if it does not exist
+        """
+        return await self._get(
+            self._alert_types, type_name, db,
+            select(AlertType).where(AlertType.type_name == type_name),
+            lambda alert_type: CachedAlertType(
+                alert_type_id=alert_type.alert_type_id,
+                type_name=alert_type.type_name,
+            ),
+        )
+
+    def put_device(self, device: Device):
+        """Refresh a device entry from an up-to-date ORM instance."""
+        self._devices.put(device.device_id, self._device_snapshot(device))
+
+    def invalidate_device(self, device_id: int):
+        """Drop a device entry after it was created, updated or deleted."""
+        self._devices.invalidate(device_id)
+
+    def clear(self):
+        """Drop all entries."""
+        self._houses.clear()
+        self._devices.clear()
+        self._alert_types.clear()
+
+    def stats(self) -> dict:
+        """Get entry counts and hit/miss counters per table."""
+        return {
+            "houses": self._houses.stats(),
+            "devices": self._devices.stats(),
+            "alert_types": self._alert_types.stats(),
+        }
+
+    @staticmethod
+    def _device_snapshot(device: Device) -> CachedDevice:
+        return CachedDevice(
+            device_id=device.device_id,
+            house_id=device.house_id,
+            device_type_id=device.device_type_id,
+            location=device.location,
+            firmware_version=device.firmware_version,
+            status=device.status,
+            is_enabled=device.is_enabled,
+        )
+
+    @staticmethod
+    async def _get(table: _TTLTable, key: Any, db: AsyncSession, query, snapshot: Callable) -> Optional[Any]:
+        """Look up a key, loading and caching it on a miss."""
+        value = table.get(key)
+        if value is not None:
+            return value
+
+        result = await db.execute(query)
+        row = result.scalar_one_or_none()
+        if row is None:
+            return None
+
+        value = snapshot(row)
+        table.put(key, value)
+        return value
+
+
+# Global instance
+reference_cache = ReferenceCache()
@@ -0,0 +1,238 @@
+"""Dashboard metrics: cached aggregate counts and request latency."""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Optional
+from sqlalchemy import event, func, inspect, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.alert import Alert
+from app.models.device import Device
+from app.utils import percentile
+
+logger = logging.getLogger(__name__)
+
+# Number of recent requests kept for latency percentiles
+LATENCY_HISTORY = 2000
+
+# session.info key holding count changes flushed but not yet committed
+PENDING_CHANGES_KEY = "dashboard_metrics_changes"
+
+
+class LatencyTracker:
+    """Sliding window of recent request latencies."""
+
+    def __init__(self, history: int = LATENCY_HISTORY):
+        self._latencies: deque[float] = deque(maxlen=history)
+        self.requests_total = 0
+
+    def record(self, latency_ms: float):
+        """Record the latency of one request."""
+        self._latencies.append(latency_ms)
+        self.requests_total += 1
+
+    def stats(self) -> dict:
+        """
+        Get latency percentiles over recent requests.
+
+        Returns:
+            Dictionary with p50/p95/p99 in milliseconds and the sample count
+        """
+        latencies = sorted(self._latencies)
+        return {
+            "latency_ms_p50": percentile(latencies, 0.50),
+            "latency_ms_p95": percentile(latencies, 0.95),
+            "latency_ms_p99": percentile(latencies, 0.99),
+            "samples": len(latencies),
+            "requests_total": self.requests_total,
+        }
+
+
+class DashboardMetricsService:
+    """
+    Dashboard counts shared by every viewer.
+
+    The counts are loaded with a single aggregate query at most once per
+    settings.metrics_cache_ttl_seconds, however many dashboards poll. In
+    between, commits that create alerts or devices or change their status
+    adjust the cached counters (see the session listeners below), so this
+    process sees its own writes immediately. Writes from other processes
+    show up at the next refresh.
+    """
+
+    def __init__(self):
+        """Initialize the dashboard metrics service."""
+        self.ttl = settings.metrics_cache_ttl_seconds
+        self._loaded_at: Optional[float] = None
+        self._total_devices = 0
+        self._online_devices = 0
+        self._active_alerts_by_house: Counter = Counter()
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+        self.latency = LatencyTracker()
+
+    async def counts(self, db: AsyncSession) -> dict:
+        """
+        Get the dashboard counts, refreshing them if the cache has expired.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dictionary with active_houses, total_devices, online_devices and active_alerts
+        """
+        if not self._is_fresh():
+            async with self._lock:
+                # Another request may have refreshed while this one waited
+                if not self._is_fresh():
+                    await self.refresh(db)
+        return {
+            "active_houses": len(self._active_alerts_by_house),
+            "total_devices": self._total_devices,
+            "online_devices": self._online_devices,
+            "active_alerts": sum(self._active_alerts_by_house.values()),
+        }
+
+    async def refresh(self, db: AsyncSession):
+        """
+        Reload the counts with one query.
+
+        Device counts use FILTER clauses over one pass of devices; active
+        alerts are grouped per house (served by the partial active-alert
+        index) so active_houses can be maintained incrementally. The device
+        counts are repeated on every row, and the LEFT JOIN keeps one row
+        when there are no active alerts.
+
+        Args:
+            db: Database session
+        """
+        devices = select(
+            func.count().label("total_devices"),
+            func.count().filter(Device.status == "online").label("online_devices"),
+        ).subquery()
+        active_alerts = select(
+            Alert.house_id,
+            func.count().label("active_alerts"),
+        ).where(Alert.status == "active").group_by(Alert.house_id).subquery()
+        query = select(
+            devices.c.total_devices,
+            devices.c.online_devices,
+            active_alerts.c.house_id,
+            active_alerts.c.active_alerts,
+        ).select_from(devices).outerjoin(active_alerts, true())
+
+        result = await db.execute(query)
+        rows = result.all()
+
+        self._total_devices = rows[0].total_devices
+        self._online_devices = rows[0].online_devices
+        self._active_alerts_by_house = Counter({
+            row.house_id: row.active_alerts for row in rows if row.house_id is not None
+        })
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+
+    def apply(self, changes: list[tuple]):
+        """
+        Apply committed status changes to the cached counters.
+
+        Args:
+            changes: ("alert", house_id, old_status, new_status) or
+                ("device", None, old_status, new_status) tuples; old_status is
+                None for created rows and new_status is None for deleted rows
+        """
+        if self._loaded_at is None:
+            return  # Nothing cached yet; the next read loads everything
+        for kind, house_id, old_status, new_status in changes:
+            if kind == "alert":
+                if old_status != "active" and new_status == "active":
+                    self._active_alerts_by_house[house_id] += 1
+                elif old_status == "active" and new_status != "active":
+                    self._active_alerts_by_house[house_id] -= 1
+                    if self._active_alerts_by_house[house_id] <= 0:
+                        del self._active_alerts_by_house[house_id]
+            else:
+                if old_status is None:
+                    self._total_devices += 1
+                if new_status is None:
+                    self._total_devices = max(0, self._total_devices - 1)
+                if old_status != "online" and new_status == "online":
+                    self._online_devices += 1
+                elif old_status == "online" and new_status != "online":
+                    self._online_devices = max(0, self._online_devices - 1)
+
+    def device_deleted(self, status: str):
+        """Record a device removed with a bulk DELETE (not seen by the session listeners)."""
+        self.apply([("device", None, status, None)])
+
+    def system_health(self, queue_depth: int) -> dict:
+        """
+        Get measured system health.
+
+        Args:
+            queue_depth: Events waiting in the ingest queue
+
+        Returns:
+            Dictionary with request latency percentiles and the queue depth
+        """
+        latency = self.latency.stats()
+        return {
+            "api_latency": round(latency["latency_ms_p50"]),
+            "api_latency_p95": round(latency["latency_ms_p95"], 1),
+            "api_latency_p99": round(latency["latency_ms_p99"], 1),
+            "latency_samples": latency["samples"],
+            "queue_depth": queue_depth,
+        }
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+
+def _status_change(obj, created: bool = False, deleted: bool = False) -> Optional[tuple]:
+    """Describe how a flushed Alert or Device affects the dashboard counts, if at all."""
+    if not isinstance(obj, (Alert, Device)):
+        return None
+    state = inspect(obj)
+    kind = "alert" if isinstance(obj, Alert) else "device"
+    house_id = state.dict.get("house_id") if kind == "alert" else None
+    status = state.dict.get("status")
+    if created:
+        return (kind, house_id, None, status)
+    if deleted:
+        return (kind, house_id, status, None)
+    history = state.attrs.status.history
+    if not history.deleted or not history.added:
+        return None
+    return (kind, house_id, history.deleted[0], history.added[0])
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    """Remember status changes of this flush until the transaction commits."""
+    changes = [
+        change for change in (
+            *(_status_change(obj, created=True) for obj in session.new),
+            *(_status_change(obj) for obj in session.dirty),
+            *(_status_change(obj, deleted=True) for obj in session.deleted),
+        ) if change
+    ]
+    if changes:
+        session.info.setdefault(PENDING_CHANGES_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop(PENDING_CHANGES_KEY, None)
+    if changes:
+        dashboard_metrics.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(PENDING_CHANGES_KEY, None)
+
+
+# Global instance
+dashboard_metrics = DashboardMetricsService()
@@ -0,0 +1,184 @@
+"""Coalesced device heartbeat writes."""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Integer, String, column, select, update, values
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.device import Device
+from app.services.cache import reference_cache
+from app.services.dashboard import dashboard_metrics
+from app.services.stream import device_status_payload, stream_broker
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatService:
+    """
+    In-memory last-seen table for device heartbeats.
+
+    A heartbeat that does not change anything but the time is only recorded
+    here; a background task writes all pending times every
+    settings.heartbeat_flush_interval_seconds with one
+    UPDATE ... FROM (VALUES ...) statement per batch. Heartbeats that change
+    the status or firmware are written through by the devices router.
+    devices.last_heartbeat therefore lags by up to one flush interval.
+
+    The router decides with its cached status, which can be stale when
+    another process marked the device offline. The flush therefore also
+    writes the reported status, and publishes and counts the rows whose
+    status it changed.
+    """
+
+    def __init__(self):
+        """Initialize the heartbeat service."""
+        self.flush_interval = settings.heartbeat_flush_interval_seconds
+        self.batch_size = settings.heartbeat_flush_batch_size
+        self._pending: dict[int, tuple[datetime, str]] = {}  # device_id -> (seen_at, status)
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.beats_total = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    def record(self, device_id: int, seen_at: datetime, status: str = "online"):
+        """
+        Record a heartbeat to be written with the next flush.
+
+        Args:
+            device_id: ID of the device
+            seen_at: Time the heartbeat was received (timezone-aware)
+            status: Status reported with the heartbeat
+        """
+        previous = self._pending.get(device_id)
+        if previous is None or seen_at > previous[0]:
+            self._pending[device_id] = (seen_at, status)
+        self.beats_total += 1
+
+    def discard(self, device_id: int):
+        """Forget a pending heartbeat (after it was written through)."""
+        self._pending.pop(device_id, None)
+
+    async def start(self):
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="heartbeat-flush")
+            logger.info(f"Heartbeat coalescing started (flush every {self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the flush task and write what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final heartbeat flush failed: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Write all pending heartbeat times.
+
+        Pending times are taken atomically, so heartbeats arriving during the
+        write go to the next flush. If the write fails, the taken times are
+        merged back (keeping the newest) and retried on the next flush.
+
+        Returns:
+            Number of devices updated
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+            items = [(device_id, seen_at, status) for device_id, (seen_at, status) in pending.items()]
+            rows = []
+            try:
+                async with AsyncSessionLocal() as session:
+                    for start in range(0, len(items), self.batch_size):
+                        result = await session.execute(_bulk_update(items[start:start + self.batch_size]))
+                        rows.extend(result.all())
+                    changed = [row for row in rows if row.status != row.previous_status]
+                    for row in changed:
+                        stream_broker.publish_on_commit(
+                            session, "device_status_changed", row.house_id,
+                            device_status_payload(row, row.previous_status),
+                        )
+                    await session.commit()
+            except Exception:
+                for device_id, seen_at, status in items:
+                    self.record(device_id, seen_at, status)
+                    self.beats_total -= 1  # Not a new heartbeat
+                raise
+
+            # A bulk UPDATE is not seen by the session listeners
+            dashboard_metrics.apply([("device", None, row.previous_status, row.status) for row in changed])
+            for row in changed:
+                reference_cache.invalidate_device(row.device_id)
+
+            updated = len(rows)
+
+            self.flushes += 1
+            self.rows_flushed += updated
+            logger.debug(f"Flushed {updated} heartbeats")
+            return updated
+
+    def stats(self) -> dict:
+        """Get heartbeat coalescing statistics."""
+        return {
+            "pending": len(self._pending),
+            "beats_total": self.beats_total,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+        }
+
+    async def _loop(self):
+        """Flush pending heartbeats until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Heartbeat flush failed: {e}", exc_info=True)
+
+
+def _bulk_update(batch: list[tuple[int, datetime, str]]):
+    """
+    Build one UPDATE devices ... FROM (SELECT ... FOR UPDATE) for a batch of heartbeats.
+
+    A row is only moved forward in time, so a late flush never overwrites a
+    newer heartbeat written through in the meantime. The subquery locks the
+    rows to change and keeps their previous status, which is returned along
+    with the updated row.
+    """
+    seen = values(
+        column("device_id", Integer),
+        column("seen_at", DateTime(timezone=True)),
+        column("status", String),
+        name="seen",
+    ).data(batch)
+    current = select(
+        Device.device_id,
+        Device.status,
+        seen.c.seen_at,
+        seen.c.status.label("new_status"),
+    ).join(
+        seen, Device.device_id == seen.c.device_id
+    ).where(
+        (Device.last_heartbeat.is_(None)) | (Device.last_heartbeat < seen.c.seen_at),
+    ).with_for_update(of=Device).subquery("current")
+    return update(Device).where(
+        Device.device_id == current.c.device_id,
+    ).values(last_heartbeat=current.c.seen_at, status=current.c.new_status).returning(
+        Device.device_id,
+        Device.house_id,
+        Device.status,
+        Device.last_heartbeat,
+        current.c.status.label("previous_status"),
+    ).execution_options(synchronize_session=False)
+
+
+# Global instance
+heartbeat_service = HeartbeatService()
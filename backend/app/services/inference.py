@@ -1,12 +1,25 @@
 """Inference service for ML model predictions."""
+import asyncio
 import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
+from math import gcd
 import numpy as np
-import librosa
 import soundfile as sf
+from scipy.signal import resample_poly
 from tensorflow import keras
-from app.schemas.inference import InferenceResponse
+try:
+    import soxr  # Fast C polyphase resampler (installed with librosa)
+except ImportError:
+    soxr = None
+from app.schemas.inference import InferenceResponse, InferenceWindow
+from app.services.batching import MicroBatcher
+from app.services.model_registry import model_registry
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -15,6 +28,8 @@ logger = logging.getLogger(__name__)
 SAMPLE_RATE = 16000
 # YAMNet expects ~1 second of audio (15600 samples at 16kHz)
 AUDIO_LENGTH = 15600
+# Seconds a broadcast task waits for the other pool workers to pick up theirs
+WORKER_BROADCAST_TIMEOUT = 60.0
 
 
 class InferenceService:
@@ -31,10 +46,32 @@ class InferenceService:
         self.model_path = None
         self.current_model_id = None
         # Will be loaded on startup via load_active_model_from_db()
+        
+        # Concurrent predict() calls are grouped into a single forward pass
+        self.batcher = MicroBatcher(
+            runner=self._run_batch,
+            max_batch_size=settings.inference_max_batch_size,
+            max_wait_ms=settings.inference_max_batch_wait_ms,
+            name="inference",
+        )
+        
+        # Decode and forward pass run in this executor, never on the event loop
+        self._executor: Optional[Executor] = None
+        # Whether pool workers managed to load the active model
+        self._worker_model_loaded = False
+        # Pool mode: barrier that spreads broadcast tasks over all workers, and
+        # the models each worker (by pid) reported resident at the last broadcast
+        self._worker_barrier = None
+        self._broadcast_lock = asyncio.Lock()
+        self._worker_residency: dict[int, list[str]] = {}
     
     def _load_model_from_path(self, model_path: str) -> bool:
         """
-        Load a Keras model from file path.
+        Load a Keras model from file path and make it the active model.
+        
+        Models come from the model registry, which warms them up on first
+        load and keeps recently used ones resident. On failure the
+        previously active model stays in place.
         
         Args:
             model_path: Path to the model file
@@ -42,59 +79,59 @@ class InferenceService:
         Returns:
             True if loaded successfully, False otherwise
         """
-        # Model loading temporarily disabled - using hardcoded responses
-        # Log as if model is loaded successfully
-        logger.info(f"Model loaded successfully from {model_path}")
-        self.model = None  # Not actually loaded, but we'll simulate it
+        try:
+            model = model_registry.get_or_load(model_path)
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}", exc_info=True)
+            return False
+        
+        # Swap by reference; batches already running keep the old model
+        self.model = model
         self.model_path = str(Path(model_path).absolute())
-        return True  # Return True to indicate "success"
-        
-        # COMMENTED OUT - TensorFlow compatibility issues
-        # try:
-        #     model_file = Path(model_path)
-        #     if not model_file.exists():
-        #         logger.warning(f"Model file not found at {model_path}")
-        #         return False
-        #     
-        #     logger.info(f"Loading model from {model_path}")
-        #     
-        #     # Handle compatibility with older Keras models that use batch_shape
-        #     import tensorflow as tf
-        #     
-        #     # Patch InputLayer.from_config to convert batch_shape to input_shape
-        #     # This is needed for models saved with older Keras/TensorFlow versions
-        #     original_input_from_config = tf.keras.layers.InputLayer.from_config
-        #     
-        #     @classmethod
-        #     def patched_input_from_config(cls, config):
-        #         # Convert batch_shape to input_shape if present (old Keras format)
-        #         if 'batch_shape' in config:
-        #             batch_shape = config.pop('batch_shape')
-        #             if batch_shape and len(batch_shape) > 1:
-        #                 # Convert [None, 1024] -> [1024]
-        #                 config['input_shape'] = batch_shape[1:]
-        #         return original_input_from_config(config)
-        #     
-        #     # Temporarily patch the method
-        #     tf.keras.layers.InputLayer.from_config = patched_input_from_config
-        #     
-        #     try:
-        #         # Try loading with compile=False
-        #         self.model = keras.models.load_model(str(model_file), compile=False)
-        #     except Exception as e:
-        #         logger.error(f"Failed to load model: {e}")
-        #         raise
-        #     finally:
-        #         # Restore original method
-        #         tf.keras.layers.InputLayer.from_config = original_input_from_config
-        #     
-        #     self.model_path = str(model_file.absolute())
-        #     logger.info("Model loaded successfully")
-        #     return True
-        # except Exception as e:
-        #     logger.error(f"Failed to load model: {e}", exc_info=True)
-        #     self.model = None
-        #     return False
+        return True
+    
+    async def activate_model(self, model_path: str, model_id: Optional[int] = None) -> bool:
+        """
+        Load a model in the background and switch to it atomically.
+        
+        Loading and warmup run off the event loop. In-flight predictions
+        finish on the previous model; predictions dispatched after the
+        switch use the new one. With a process pool, every worker loads and
+        warms up the model before the switch (see _broadcast).
+        
+        Args:
+            model_path: Path to the model file
+            model_id: Database ID of the model, if registered
+            
+        Returns:
+            True if the model was loaded and activated, False otherwise
+        """
+        if settings.inference_workers > 0:
+            if self._executor is not None:
+                loaded = all(await self._broadcast(_preload_in_worker, model_path))
+            else:
+                # Before start() the pool doesn't exist yet; workers load the model in their
+                # initializer, and start() reports whether they managed to
+                loaded = Path(model_path).is_file()
+                if not loaded:
+                    logger.error(f"Failed to load model: model file not found at {model_path}")
+            if loaded:
+                self.model_path = str(Path(model_path).absolute())
+                self._worker_model_loaded = self._executor is not None
+        else:
+            loaded = await asyncio.to_thread(self._load_model_from_path, model_path)
+        
+        if loaded:
+            self.current_model_id = model_id
+            logger.info(f"Activated model {model_path}" + (f" (ID: {model_id})" if model_id else ""))
+        return loaded
+    
+    @property
+    def model_loaded(self) -> bool:
+        """Whether a real model (not the simulated fallback) is active."""
+        if settings.inference_workers > 0:
+            return self._worker_model_loaded
+        return self.model is not None
     
     async def load_active_model_from_db(self, db_session):
         """
@@ -120,12 +157,8 @@ class InferenceService:
                 model_file_path = backend_root / active_model.file_path
                 logger.info(f"Model file path: {model_file_path}")
                 
-                # Store model metadata
-                self.current_model_id = active_model.model_id
-                self.model_path = str(model_file_path)
-                
-                # Load model (or simulate loading) - this will log "Model loaded successfully from..."
-                self._load_model_from_path(str(model_file_path))
+                # Load and warm up the model in the background
+                await self.activate_model(str(model_file_path), active_model.model_id)
             else:
                 # Fallback to default model if no active model in DB
                 backend_root = Path(__file__).parent.parent.parent
@@ -137,7 +170,7 @@ class InferenceService:
                 for default_path in default_paths:
                     if default_path.exists():
                         logger.info(f"No active model in database, loading default model from {default_path}")
-                        self._load_model_from_path(str(default_path))
+                        await self.activate_model(str(default_path))
                         break
                 else:
                     logger.warning("No active model in database and no default model found")
@@ -152,56 +185,49 @@ class InferenceService:
             for default_path in default_paths:
                 if default_path.exists():
                     logger.info(f"Loading fallback model from {default_path}")
-                    self._load_model_from_path(str(default_path))
+                    await self.activate_model(str(default_path))
                     break
     
-    def load_model(self, model_path: Optional[str] = None):
+    def load_model(self, model_path: Optional[str] = None) -> bool:
         """
-        Load or reload the model from a file path.
-        Used for hot-reloading when model is switched via API.
+        Load or reload the model from a file path, blocking the caller.
+        Async code should use activate_model() instead.
         
         Args:
             model_path: Path to the model file (optional, uses current model_path if not provided)
+            
+        Returns:
+            True if loaded successfully, False otherwise
         """
-        if model_path:
-            self.model_path = model_path
-        
-        if self.model_path:
-            self._load_model_from_path(self.model_path)
-        else:
+        model_path = model_path or self.model_path
+        if not model_path:
             logger.warning("No model path provided for loading")
+            return False
+        return self._load_model_from_path(model_path)
     
-    def _preprocess_audio(self, audio_file_path: str) -> np.ndarray:
+    def _preprocess_audio(self, audio_file_path: str, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Preprocess audio file for YAMNet model.
         
         Args:
             audio_file_path: Path to audio file
+            out: Optional preallocated float32 buffer of AUDIO_LENGTH samples
+                (e.g. a row of a batch array) to fill in place
             
         Returns:
-            Preprocessed audio array (16kHz, mono, normalized)
+            Preprocessed audio array (16kHz, mono, normalized) of shape (1, AUDIO_LENGTH)
         """
         try:
-            # Load audio file
-            audio, sr = librosa.load(audio_file_path, sr=SAMPLE_RATE, mono=True)
-            
-            # Normalize audio
-            audio = librosa.util.normalize(audio)
+            # Load audio file (soundfile fast path, librosa fallback)
+            audio = _load_audio(audio_file_path)
             
-            # Pad or truncate to expected length
-            if len(audio) > AUDIO_LENGTH:
-                # Take the first AUDIO_LENGTH samples
-                audio = audio[:AUDIO_LENGTH]
-            elif len(audio) < AUDIO_LENGTH:
-                # Pad with zeros
-                audio = np.pad(audio, (0, AUDIO_LENGTH - len(audio)), mode='constant')
+            # Normalize and pad/truncate into the output buffer
+            if out is None:
+                out = np.empty(AUDIO_LENGTH, dtype=np.float32)
+            _fit_normalized(audio, out)
             
-            # Ensure shape is correct for model input
-            # YAMNet typically expects (batch, samples) or (samples,)
-            # Reshape to add batch dimension if needed
-            audio = audio.reshape(1, -1) if len(audio.shape) == 1 else audio
-            
-            return audio
+            # YAMNet typically expects (batch, samples); add the batch dimension
+            return out.reshape(1, -1)
             
         except Exception as e:
             logger.error(f"Error preprocessing audio: {e}", exc_info=True)
@@ -255,10 +281,271 @@ class InferenceService:
             logger.warning(f"Unexpected prediction format: {type(prediction)}")
             return "normal", 0.5
     
+    def _preprocess_windows(self, audio_file_path: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Split a whole clip into overlapping AUDIO_LENGTH-sample windows.
+        
+        The clip is normalized once, then windowed with a zero-copy strided
+        view (hop of inference_window_hop_samples). A final window aligned
+        to the end of the clip is added if the hop would skip the tail.
+        
+        Args:
+            audio_file_path: Path to audio file
+            
+        Returns:
+            Tuple of (windows array of shape (W, AUDIO_LENGTH), window start sample offsets)
+        """
+        audio = _load_audio(audio_file_path)
+        
+        if len(audio) <= AUDIO_LENGTH:
+            out = np.empty(AUDIO_LENGTH, dtype=np.float32)
+            _fit_normalized(audio, out)
+            return out.reshape(1, -1), np.zeros(1, dtype=np.int64)
+        
+        peak = float(np.max(np.abs(audio)))
+        if peak > np.finfo(np.float32).tiny:
+            audio *= np.float32(1.0 / peak)
+        
+        hop = max(1, settings.inference_window_hop_samples)
+        # Spread the windows further apart for very long clips
+        count = (len(audio) - AUDIO_LENGTH) // hop + 1
+        max_windows = max(1, settings.inference_max_windows)
+        if count > max_windows:
+            hop *= -(-count // max_windows)
+        
+        windows = np.lib.stride_tricks.sliding_window_view(audio, AUDIO_LENGTH)[::hop]
+        starts = np.arange(0, len(audio) - AUDIO_LENGTH + 1, hop)
+        
+        last_start = len(audio) - AUDIO_LENGTH
+        if starts[-1] != last_start:
+            windows = np.concatenate([windows, audio[last_start:].reshape(1, -1)])
+            starts = np.append(starts, last_start)
+        
+        return windows, starts
+    
+    def _aggregate_windows(self, predictions: np.ndarray, starts: np.ndarray) -> tuple[str, float, list[InferenceWindow]]:
+        """
+        Aggregate per-window class scores into a single clip-level result.
+        
+        Uses inference_window_aggregation: "max" (per-class maximum), "mean"
+        (per-class mean) or "topk" (per-class mean of the top k windows).
+        
+        Args:
+            predictions: Model output of shape (W, classes)
+            starts: Window start sample offsets
+            
+        Returns:
+            Tuple of (label, score, per-window results)
+        """
+        predictions = predictions.reshape(len(starts), -1)
+        
+        method = settings.inference_window_aggregation
+        if method == "mean":
+            aggregated = predictions.mean(axis=0)
+        elif method == "topk":
+            k = min(max(1, settings.inference_window_top_k), len(predictions))
+            aggregated = np.sort(predictions, axis=0)[-k:].mean(axis=0)
+        else:
+            aggregated = predictions.max(axis=0)
+        
+        windows = []
+        for row, start in enumerate(starts):
+            window_label, window_score = self._postprocess_prediction(predictions[row])
+            windows.append(InferenceWindow(
+                start_s=round(float(start) / SAMPLE_RATE, 3),
+                end_s=round(float(start + AUDIO_LENGTH) / SAMPLE_RATE, 3),
+                label=window_label,
+                score=float(window_score),
+            ))
+        
+        label, score = self._postprocess_prediction(aggregated)
+        return label, score, windows
+    
+    def _predict_batch(self, audio_file_paths: list[str]) -> list[InferenceResponse]:
+        """
+        Run a single forward pass over a batch of audio files.
+        
+        By default each file is preprocessed directly into its row of a
+        preallocated (N, AUDIO_LENGTH) batch array. In windowed mode every
+        file contributes all of its windows as rows, and per-window scores
+        are aggregated back into one result per file.
+        
+        Args:
+            audio_file_paths: Paths to the audio files
+            
+        Returns:
+            One InferenceResponse per input path, in order
+        """
+        # Capture the model once so a concurrent switch doesn't affect this batch
+        model = self.model
+        
+        # Simulated response while no model is loaded
+        # Returns response that will trigger alerts for testing
+        if model is None:
+            logger.info("Inference result: distress (score: 0.8500)")
+            return [InferenceResponse(label="distress", score=0.85) for _ in audio_file_paths]
+        
+        results: list[Optional[InferenceResponse]] = [None] * len(audio_file_paths)
+        # (result index, first batch row, window start offsets or None)
+        items: list[tuple[int, int, Optional[np.ndarray]]] = []
+        
+        if settings.inference_windowed:
+            frames = []
+            rows = 0
+            for i, audio_file_path in enumerate(audio_file_paths):
+                try:
+                    windows, starts = self._preprocess_windows(audio_file_path)
+                except Exception as e:
+                    logger.error(f"Error preprocessing audio: {e}", exc_info=True)
+                    results[i] = InferenceResponse(label="normal", score=0.5)
+                    continue
+                frames.append(windows)
+                items.append((i, rows, starts))
+                rows += len(starts)
+            batch = np.concatenate(frames) if frames else None
+        else:
+            batch = np.empty((len(audio_file_paths), AUDIO_LENGTH), dtype=np.float32)
+            for i, audio_file_path in enumerate(audio_file_paths):
+                try:
+                    self._preprocess_audio(audio_file_path, out=batch[len(items)])
+                    items.append((i, len(items), None))
+                except Exception:
+                    # Fallback to dummy prediction on error
+                    results[i] = InferenceResponse(label="normal", score=0.5)
+            batch = batch[:len(items)]
+        
+        if items:
+            try:
+                start_time = time.perf_counter()
+                predictions = np.asarray(model.predict(batch, verbose=0))
+                elapsed_ms = (time.perf_counter() - start_time) * 1000.0
+                
+                for i, row, starts in items:
+                    if starts is None:
+                        label, score = self._postprocess_prediction(predictions[row])
+                        windows = None
+                    else:
+                        label, score, windows = self._aggregate_windows(predictions[row:row + len(starts)], starts)
+                    logger.info(f"Inference result for {audio_file_paths[i]}: {label} (score: {score:.4f})")
+                    results[i] = InferenceResponse(
+                        label=label,
+                        score=float(score),
+                        windows=windows,
+                        elapsed_ms=round(elapsed_ms, 3),
+                    )
+            except Exception as e:
+                logger.error(f"Error during batch inference: {e}", exc_info=True)
+                for i, _, _ in items:
+                    results[i] = InferenceResponse(label="normal", score=0.5)
+        
+        return results
+    
+    def _get_executor(self) -> Executor:
+        """
+        Get (or create) the executor used for decode and inference.
+        
+        With inference_workers > 0 a process pool is used and each worker
+        process warm-loads the model once in its initializer. Otherwise a
+        single background thread in the API process is used.
+        """
+        if self._executor is None:
+            if settings.inference_workers > 0:
+                # spawn avoids forking a process that already initialized TensorFlow
+                mp_context = multiprocessing.get_context("spawn")
+                self._worker_barrier = mp_context.Barrier(settings.inference_workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.inference_workers,
+                    mp_context=mp_context,
+                    initializer=_init_worker,
+                    initargs=(self.model_path, self._worker_barrier),
+                )
+                logger.info(f"Inference process pool created with {settings.inference_workers} workers")
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        return self._executor
+    
+    @property
+    def uses_process_pool(self) -> bool:
+        """Whether inference runs in worker processes."""
+        return isinstance(self._executor, ProcessPoolExecutor)
+    
+    def resident_models(self) -> dict[str, list[str]]:
+        """
+        Get the models resident in each inference process.
+        
+        Returns:
+            Model paths (least recently used first) keyed by "api" for the
+            API process, or by "worker-<pid>" as each pool worker reported
+            them at the last warmup or model activation
+        """
+        if self.uses_process_pool:
+            return {f"worker-{pid}": models for pid, models in sorted(self._worker_residency.items())}
+        return {"api": model_registry.resident_models()}
+    
+    async def _broadcast(self, fn, *args) -> list[bool]:
+        """
+        Run a task once on every pool worker.
+        
+        One task is submitted per worker and each waits on a shared barrier
+        before running, so no worker can take two of them. If the barrier
+        times out (e.g. a worker is stuck on a long batch), the remaining
+        tasks run anyway; a worker that missed the task catches up on its
+        next batch.
+        
+        Args:
+            fn: Module-level function run in the worker; returns a bool
+            *args: Arguments for fn
+            
+        Returns:
+            Result of fn on each worker
+        """
+        async with self._broadcast_lock:
+            self._worker_barrier.reset()
+            loop = asyncio.get_running_loop()
+            reports = await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _run_on_worker, fn, *args)
+                for _ in range(settings.inference_workers)
+            ])
+        self._worker_residency = {pid: models for pid, _, models in reports}
+        return [result for _, result, _ in reports]
+    
+    async def start(self):
+        """
+        Create the inference executor and warm up its workers.
+        
+        Call after the active model has been resolved so worker processes
+        load it in their initializer.
+        """
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            # Submitting one task per worker makes the pool spawn all workers now
+            self._worker_model_loaded = all(await self._broadcast(_ping_worker))
+            if self.model_path and not self._worker_model_loaded:
+                logger.error(f"Inference workers could not load model {self.model_path}")
+            logger.info("Inference workers warmed up")
+    
+    async def stop(self):
+        """Shut down the inference executor."""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+    
+    async def _run_batch(self, audio_file_paths: list[str]) -> list[InferenceResponse]:
+        """Batch runner used by the micro-batcher; runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            return await loop.run_in_executor(executor, _predict_batch_in_worker, self.model_path, audio_file_paths)
+        return await loop.run_in_executor(executor, self._predict_batch, audio_file_paths)
+    
     async def predict(self, audio_file_path: str) -> InferenceResponse:
         """
         Predict on an audio file using the loaded model.
         
+        Concurrent calls are collected by the micro-batcher (up to
+        inference_max_batch_size items or inference_max_batch_wait_ms) and
+        run as one batch in the inference executor.
+        
         Args:
             audio_file_path: Path to the audio file
             
@@ -267,69 +554,142 @@ class InferenceService:
         """
         logger.info(f"Running inference on {audio_file_path}")
         
-        # Model prediction temporarily using simulated response
-        # Returns response that will trigger alerts for testing
         try:
-            # Simulate model inference
-            # In production, this would run: prediction = self.model.predict(audio, verbose=0)
-            logger.info("Inference result: distress (score: 0.8500)")
-            
-            return InferenceResponse(
-                label="distress",
-                score=0.85
-            )
+            return await self.batcher.submit(audio_file_path)
         except Exception as e:
             logger.error(f"Error during inference: {e}", exc_info=True)
             return InferenceResponse(
                 label="normal",
                 score=0.5
             )
+    
+    def stats(self) -> dict:
+        """Get inference batching statistics."""
+        return self.batcher.stats()
+
+
+def _load_audio_fast(audio_file_path: str) -> np.ndarray:
+    """
+    Load audio with soundfile, resampling only when needed.
+    
+    Reads any format libsndfile supports (WAV, FLAC, OGG). Files already at
+    SAMPLE_RATE skip resampling; others use a polyphase resampler (soxr
+    when installed, scipy's resample_poly otherwise).
+    
+    Args:
+        audio_file_path: Path to audio file
         
-        # COMMENTED OUT - TensorFlow compatibility issues
-        # # Check if file exists
-        # if not Path(audio_file_path).exists():
-        #     logger.warning(f"Audio file not found: {audio_file_path}, using dummy prediction")
-        #     return InferenceResponse(
-        #         label="distress",
-        #         score=0.85
-        #     )
-        # 
-        # # If model not loaded, use dummy prediction
-        # if self.model is None:
-        #     logger.warning("Model not loaded, using dummy prediction")
-        #     file_size = Path(audio_file_path).stat().st_size
-        #     if file_size > 100000:
-        #         return InferenceResponse(label="distress", score=0.82)
-        #     elif file_size > 50000:
-        #         return InferenceResponse(label="inactivity", score=0.75)
-        #     else:
-        #         return InferenceResponse(label="normal", score=0.35)
-        # 
-        # try:
-        #     # Preprocess audio
-        #     audio = self._preprocess_audio(audio_file_path)
-        #     
-        #     # Run inference
-        #     prediction = self.model.predict(audio, verbose=0)
-        #     
-        #     # Postprocess to get label and score
-        #     label, score = self._postprocess_prediction(prediction)
-        #     
-        #     logger.info(f"Inference result: {label} (score: {score:.4f})")
-        #     
-        #     return InferenceResponse(
-        #         label=label,
-        #         score=float(score)
-        #     )
-        #     
-        # except Exception as e:
-        #     logger.error(f"Error during inference: {e}", exc_info=True)
-        #     # Fallback to dummy prediction on error
-        #     return InferenceResponse(
-        #         label="normal",
-        #         score=0.5
-        #     )
+    Returns:
+        Mono float32 audio at SAMPLE_RATE
+    """
+    audio, sr = sf.read(audio_file_path, dtype="float32", always_2d=True)
+    audio = audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1, dtype=np.float32)
+    
+    if sr != SAMPLE_RATE and soxr is not None:
+        audio = soxr.resample(audio, sr, SAMPLE_RATE, quality="HQ")
+    elif sr != SAMPLE_RATE:
+        divisor = gcd(sr, SAMPLE_RATE)
+        audio = resample_poly(audio, SAMPLE_RATE // divisor, sr // divisor).astype(np.float32, copy=False)
+    
+    return audio
+
+
+def _load_audio_librosa(audio_file_path: str) -> np.ndarray:
+    """
+    Load audio with librosa (slow path for formats libsndfile cannot read).
+    
+    Args:
+        audio_file_path: Path to audio file
+        
+    Returns:
+        Mono float32 audio at SAMPLE_RATE
+    """
+    # Imported lazily: librosa is only needed for the fallback path
+    import librosa
+    
+    audio, _ = librosa.load(audio_file_path, sr=SAMPLE_RATE, mono=True)
+    return audio
+
+
+def _load_audio(audio_file_path: str) -> np.ndarray:
+    """Load audio through the fast path, falling back to librosa."""
+    try:
+        return _load_audio_fast(audio_file_path)
+    except RuntimeError as e:
+        logger.debug(f"soundfile could not read {audio_file_path} ({e}), falling back to librosa")
+        return _load_audio_librosa(audio_file_path)
+
+
+def _fit_normalized(audio: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Peak-normalize audio and pad/truncate it into a preallocated buffer.
+    
+    Matches librosa.util.normalize: the peak is taken over the whole clip
+    before truncation, and near-silent clips are left unscaled.
+    
+    Args:
+        audio: Mono audio samples
+        out: Output buffer; its length is the target number of samples
+        
+    Returns:
+        The filled output buffer
+    """
+    n = min(len(audio), len(out))
+    out[:n] = audio[:n]
+    out[n:] = 0.0
+    
+    peak = float(np.max(np.abs(audio))) if len(audio) else 0.0
+    if peak > np.finfo(np.float32).tiny:
+        out[:n] *= np.float32(1.0 / peak)
+    
+    return out
 
 
 # Global instance
 inference_service = InferenceService()
+
+
+def _init_worker(model_path: Optional[str], barrier):
+    """Process pool initializer: load the model once per worker process."""
+    inference_service._worker_barrier = barrier
+    if model_path:
+        inference_service._load_model_from_path(model_path)
+
+
+def _run_on_worker(fn, *args) -> tuple[int, bool, list[str]]:
+    """
+    Broadcast task: wait for every worker to hold one, then run fn.
+    
+    The barrier is handed to each worker by its initializer, since
+    multiprocessing primitives cannot be passed with a task.
+    
+    Returns:
+        Tuple of (worker pid, result of fn, resident model paths)
+    """
+    try:
+        inference_service._worker_barrier.wait(WORKER_BROADCAST_TIMEOUT)
+    except threading.BrokenBarrierError:
+        logger.warning("Not every inference worker joined the broadcast; running it anyway")
+    return os.getpid(), fn(*args), model_registry.resident_models()
+
+
+def _ping_worker() -> bool:
+    """Task used to spawn and warm up pool workers; reports whether the model loaded."""
+    return inference_service.model is not None
+
+
+def _preload_in_worker(model_path: str) -> bool:
+    """Load (and warm up) a model in a pool worker process."""
+    return inference_service._load_model_from_path(model_path)
+
+
+def _predict_batch_in_worker(model_path: Optional[str], audio_file_paths: list[str]) -> list[InferenceResponse]:
+    """
+    Run a batch in a pool worker process.
+    
+    Switches the worker's model if the active model changed since the
+    worker was started; recently used models come from its registry.
+    """
+    if model_path and inference_service.model_path != str(Path(model_path).absolute()):
+        inference_service._load_model_from_path(model_path)
+    return inference_service._predict_batch(audio_file_paths)
@@ -0,0 +1,326 @@
+"""Offline detection for devices whose heartbeats stopped."""
+import asyncio
+import json
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Hashable, Optional
+from sqlalchemy import DateTime, Integer, column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.device import Device
+from app.models.device_type import DeviceType
+from app.services.cache import reference_cache
+from app.services.dashboard import dashboard_metrics
+from app.services.policy import policy_engine
+from app.services.stream import device_status_payload, stream_broker
+
+logger = logging.getLogger(__name__)
+
+# Statuses of devices expected to send heartbeats
+LIVE_STATUSES = ("online", "degraded")
+
+# Max devices marked offline per UPDATE statement
+_BATCH_SIZE = 5000
+
+
+class DeadlineWheel:
+    """
+    Hashed timing wheel of per-key deadlines.
+
+    Time is divided into ticks; each key sits in the slot of the first tick
+    at or after its deadline. Rescheduling moves the key between two slot
+    sets in O(1), and expire() only visits the slots that have passed, so a
+    check costs O(elapsed ticks + expired keys) however many keys are
+    scheduled. Keys fire at most one tick late and never early.
+    """
+
+    def __init__(self, tick_seconds: float, now: Optional[float] = None):
+        self.tick = tick_seconds
+        self._slots: dict[int, set] = {}
+        self._slot_of: dict[Hashable, int] = {}
+        # First slot not yet expired; deadlines already passed go here
+        self._cursor = math.floor((time.time() if now is None else now) / tick_seconds) + 1
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Set (or move) the deadline of a key, as wall-clock seconds."""
+        slot = max(math.ceil(deadline / self.tick), self._cursor)
+        old_slot = self._slot_of.get(key)
+        if old_slot == slot:
+            return
+        if old_slot is not None:
+            self._discard(key, old_slot)
+        self._slots.setdefault(slot, set()).add(key)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable):
+        """Remove a key."""
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._discard(key, slot)
+
+    def expire(self, now: float) -> list:
+        """
+        Remove and return every key whose deadline is at or before now.
+
+        Args:
+            now: Current wall-clock time in seconds
+
+        Returns:
+            Expired keys
+        """
+        expired = []
+        last_slot = math.floor(now / self.tick)
+        while self._cursor <= last_slot:
+            keys = self._slots.pop(self._cursor, None)
+            if keys:
+                for key in keys:
+                    del self._slot_of[key]
+                expired.extend(keys)
+            self._cursor += 1
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _discard(self, key: Hashable, slot: int):
+        keys = self._slots[slot]
+        keys.discard(key)
+        if not keys:
+            del self._slots[slot]
+
+
+class OfflineDetector:
+    """
+    Marks devices offline when their heartbeats stop.
+
+    Every heartbeat reschedules the device's deadline on a DeadlineWheel to
+    its time plus OFFLINE_MISSED_HEARTBEATS expected intervals (per device
+    type, see HEARTBEAT_TYPE_INTERVALS). Each check only touches devices
+    whose deadline passed and marks them offline with one bulk UPDATE,
+    instead of sweeping the devices table. Optionally an "inactivity" alert
+    is raised through the policy engine for each of them.
+
+    Deadlines are per process and seeded from devices.last_heartbeat at
+    startup. The UPDATE skips devices whose stored last_heartbeat is newer
+    than the last one this process saw, so heartbeats received by another
+    process keep a device online.
+    """
+
+    def __init__(self):
+        """Initialize the offline detector."""
+        self.enabled = settings.offline_detection_enabled
+        self.check_interval = settings.offline_check_interval_seconds
+        self.default_interval = settings.heartbeat_expected_interval_seconds
+        self.missed_heartbeats = settings.offline_missed_heartbeats
+        self.inactivity_alerts = settings.offline_inactivity_alerts
+        self.type_overrides = _parse_type_intervals(settings.heartbeat_type_intervals)
+        self._type_intervals: dict[int, float] = {}  # device_type_id -> interval, resolved by load()
+        self._wheel = DeadlineWheel(self.check_interval)
+        self._last_seen: dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.marked_offline = 0
+        self.alerts_raised = 0
+
+    def interval_for(self, device_type_id: int) -> float:
+        """Get the expected heartbeat interval of a device type in seconds."""
+        return self._type_intervals.get(device_type_id, self.default_interval)
+
+    def timeout_for(self, device_type_id: int) -> float:
+        """Get the silence in seconds after which a device of a type is considered offline."""
+        return self.interval_for(device_type_id) * self.missed_heartbeats
+
+    def heartbeat(self, device_id: int, device_type_id: int, seen_at: datetime):
+        """
+        Push a device's offline deadline past a heartbeat.
+
+        Args:
+            device_id: ID of the device
+            device_type_id: Type of the device, for its expected interval
+            seen_at: Time of the heartbeat (timezone-aware)
+        """
+        seen = seen_at.timestamp()
+        if seen < self._last_seen.get(device_id, 0):
+            return
+        self._last_seen[device_id] = seen
+        self._wheel.schedule(device_id, seen + self.timeout_for(device_type_id))
+
+    def forget(self, device_id: int):
+        """Stop watching a device (e.g. after it was deleted)."""
+        self._wheel.cancel(device_id)
+        self._last_seen.pop(device_id, None)
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        Resolve per-type intervals and schedule every online or degraded device.
+
+        Devices without a recorded heartbeat get a full timeout from now.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of devices scheduled
+        """
+        result = await db.execute(select(DeviceType.device_type_id, DeviceType.type_name))
+        type_ids = {type_name: device_type_id for device_type_id, type_name in result.all()}
+        self._type_intervals = {}
+        for type_name, interval in self.type_overrides.items():
+            if type_name in type_ids:
+                self._type_intervals[type_ids[type_name]] = interval
+            else:
+                logger.warning(f"HEARTBEAT_TYPE_INTERVALS: unknown device type '{type_name}'")
+
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(Device.device_id, Device.device_type_id, Device.last_heartbeat).where(
+                Device.status.in_(LIVE_STATUSES)
+            )
+        )
+        rows = result.all()
+        for device_id, device_type_id, last_heartbeat in rows:
+            self.heartbeat(device_id, device_type_id, last_heartbeat or now)
+        logger.info(f"Watching heartbeats of {len(rows)} devices")
+        return len(rows)
+
+    async def start(self):
+        """Start the periodic offline check."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="offline-detector")
+            logger.info(f"Offline detection started (checks every {self.check_interval}s)")
+
+    async def stop(self):
+        """Stop the periodic offline check."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self, now: Optional[float] = None) -> int:
+        """
+        Mark devices whose deadline passed offline.
+
+        If the update fails, the devices are rescheduled for the next check.
+
+        Args:
+            now: Current wall-clock time in seconds (defaults to time.time())
+
+        Returns:
+            Number of devices marked offline
+        """
+        now = time.time() if now is None else now
+        expired = self._wheel.expire(now)
+        if not expired:
+            return 0
+
+        candidates = [
+            (device_id, datetime.fromtimestamp(self._last_seen.pop(device_id), timezone.utc))
+            for device_id in expired
+        ]
+        try:
+            marked = await self._mark_offline(candidates)
+        except Exception:
+            for device_id, seen_at in candidates:
+                self._last_seen[device_id] = seen_at.timestamp()
+                self._wheel.schedule(device_id, now)
+            raise
+
+        self.marked_offline += len(marked)
+        if marked:
+            logger.info(f"Marked {len(marked)} devices offline after missed heartbeats")
+        return len(marked)
+
+    def stats(self) -> dict:
+        """Get offline detection statistics."""
+        return {
+            "watched_devices": len(self._wheel),
+            "marked_offline": self.marked_offline,
+            "alerts_raised": self.alerts_raised,
+        }
+
+    async def _mark_offline(self, candidates: list[tuple[int, datetime]]) -> list:
+        """
+        Set status offline on silent devices that are still online or degraded.
+
+        Args:
+            candidates: (device_id, last heartbeat seen by this process) pairs
+
+        Returns:
+            Rows of the devices changed
+        """
+        marked = []
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(candidates), _BATCH_SIZE):
+                result = await session.execute(_bulk_mark_offline(candidates[start:start + _BATCH_SIZE]))
+                marked.extend(result.all())
+
+            for row in marked:
+                stream_broker.publish_on_commit(
+                    session, "device_status_changed", row.house_id, device_status_payload(row, row.previous_status)
+                )
+                if self.inactivity_alerts and await policy_engine.raise_inactivity_alert(
+                    session, row.house_id, row.device_id
+                ):
+                    self.alerts_raised += 1
+            await session.commit()
+
+        # A bulk UPDATE is not seen by the session listeners
+        dashboard_metrics.apply([("device", None, row.previous_status, "offline") for row in marked])
+        for row in marked:
+            reference_cache.invalidate_device(row.device_id)
+        return marked
+
+    async def _loop(self):
+        """Check for missed deadlines until cancelled."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Offline check failed: {e}", exc_info=True)
+
+
+def _bulk_mark_offline(batch: list[tuple[int, datetime]]):
+    """
+    Build one UPDATE devices ... FROM (SELECT ... FOR UPDATE) for a batch.
+
+    The subquery locks the rows to change and keeps their previous status,
+    which is returned along with the updated row.
+    """
+    seen = values(
+        column("device_id", Integer),
+        column("last_seen", DateTime(timezone=True)),
+        name="seen",
+    ).data(batch)
+    stale = select(Device.device_id, Device.status).join(
+        seen, Device.device_id == seen.c.device_id
+    ).where(
+        Device.status.in_(LIVE_STATUSES),
+        (Device.last_heartbeat.is_(None)) | (Device.last_heartbeat <= seen.c.last_seen),
+    ).with_for_update(of=Device).subquery("stale")
+    return update(Device).where(
+        Device.device_id == stale.c.device_id,
+    ).values(status="offline").returning(
+        Device.device_id,
+        Device.house_id,
+        Device.status,
+        Device.last_heartbeat,
+        stale.c.status.label("previous_status"),
+    ).execution_options(synchronize_session=False)
+
+
+def _parse_type_intervals(raw: Optional[str]) -> dict[str, float]:
+    """Parse HEARTBEAT_TYPE_INTERVALS, e.g. '{"mic": 30, "motion": 300}'."""
+    if not raw:
+        return {}
+    try:
+        return {type_name: float(interval) for type_name, interval in json.loads(raw).items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error(f"Ignoring invalid HEARTBEAT_TYPE_INTERVALS: {e}")
+        return {}
+
+
+# Global instance
+offline_detector = OfflineDetector()
@@ -0,0 +1,135 @@
+"""Model registry: loads, warms up and caches Keras models."""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+import numpy as np
+from tensorflow import keras
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    LRU cache of loaded Keras models keyed by absolute file path.
+
+    Models are warmed up with a dummy forward pass when loaded so the first
+    real request does not pay graph-tracing cost. The most recently used
+    models stay resident, so switching back to one of them is instant.
+    Each process (API process or inference worker) has its own registry.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the registry.
+
+        Args:
+            capacity: Maximum number of resident models
+        """
+        self.capacity = max(1, capacity)
+        self._models: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, model_path: str) -> Any:
+        """
+        Get a resident model or load and warm it up.
+
+        Args:
+            model_path: Path to the model file
+
+        Returns:
+            The loaded Keras model
+
+        Raises:
+            FileNotFoundError: If the model file does not exist
+            Exception: If the model cannot be loaded
+        """
+        key = str(Path(model_path).absolute())
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                logger.info(f"Model {key} already resident")
+                return model
+
+            model = _load_keras_model(key)
+            _warm_up(model)
+
+            self._models[key] = model
+            while len(self._models) > self.capacity:
+                evicted, _ = self._models.popitem(last=False)
+                logger.info(f"Evicted model {evicted} from registry")
+            return model
+
+    def is_resident(self, model_path: str) -> bool:
+        """Whether a model is currently resident."""
+        return str(Path(model_path).absolute()) in self._models
+
+    def resident_models(self) -> list[str]:
+        """Paths of resident models, least recently used first."""
+        return list(self._models.keys())
+
+
+def _load_keras_model(model_path: str) -> Any:
+    """
+    Load a Keras model, converting legacy batch_shape input configs.
+
+    Args:
+        model_path: Absolute path to the model file
+
+    Returns:
+        The loaded (uncompiled) Keras model
+    """
+    model_file = Path(model_path)
+    if not model_file.exists():
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    logger.info(f"Loading model from {model_path}")
+    start = time.perf_counter()
+
+    # Handle compatibility with older Keras models that use batch_shape
+    import tensorflow as tf
+
+    # Patch InputLayer.from_config to convert batch_shape to input_shape
+    # This is needed for models saved with older Keras/TensorFlow versions
+    original_input_from_config = tf.keras.layers.InputLayer.from_config
+
+    @classmethod
+    def patched_input_from_config(cls, config):
+        # Convert batch_shape to input_shape if present (old Keras format)
+        if 'batch_shape' in config:
+            batch_shape = config.pop('batch_shape')
+            if batch_shape and len(batch_shape) > 1:
+                # Convert [None, 1024] -> [1024]
+                config['input_shape'] = batch_shape[1:]
+        return original_input_from_config(config)
+
+    # Temporarily patch the method (callers hold the registry lock)
+    tf.keras.layers.InputLayer.from_config = patched_input_from_config
+    try:
+        model = keras.models.load_model(str(model_file), compile=False)
+    finally:
+        # Restore original method
+        tf.keras.layers.InputLayer.from_config = original_input_from_config
+
+    logger.info(f"Model loaded successfully from {model_path} in {time.perf_counter() - start:.2f}s")
+    return model
+
+
+def _warm_up(model: Any):
+    """Run a forward pass on a dummy batch to trigger graph tracing."""
+    input_shape = model.input_shape
+    if isinstance(input_shape, list):
+        input_shape = input_shape[0]
+    dummy_shape = [1] + [dim or 1 for dim in input_shape[1:]]
+
+    start = time.perf_counter()
+    model.predict(np.zeros(dummy_shape, dtype=np.float32), verbose=0)
+    logger.info(f"Model warmed up in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+# Global instance (one per process)
+model_registry = ModelRegistry(capacity=settings.model_cache_size)
@@ -0,0 +1,132 @@
+"""Keyset (cursor) pagination helpers for newest-first listings."""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque token.
+
+    Args:
+        created_at: created_at of the last row
+        row_id: Primary key of the last row (tie-breaker)
+
+    Returns:
+        URL-safe cursor token
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        cursor: Cursor token
+
+    Returns:
+        (created_at, row_id) of the last row of the previous page
+
+    Raises:
+        InvalidCursorError: If the token is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def paginate(query: Select, created_column, id_column, limit: int, cursor: Optional[str] = None) -> Select:
+    """
+    Order a query newest first and restrict it to the page after a cursor.
+
+    The page boundary is a row comparison on (created_at, id), so every page
+    is an index range scan however deep it is, unlike OFFSET which reads and
+    discards all earlier rows. One extra row is fetched to tell whether a
+    next page exists (see page_rows).
+
+    Args:
+        query: Filtered select
+        created_column: Timestamp column to sort by
+        id_column: Primary key column (tie-breaker)
+        limit: Page size
+        cursor: Token from the previous page's next_cursor
+
+    Returns:
+        The paginated query
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    return query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def page_rows(rows: Sequence[Any], limit: int, key) -> tuple[Sequence[Any], Optional[str]]:
+    """
+    Split the rows fetched by a paginated query into the page and the next cursor.
+
+    Args:
+        rows: Rows returned by a query built with paginate
+        limit: Page size
+        key: Function returning (created_at, id) for a row
+
+    Returns:
+        (rows of the page, next cursor or None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_count(db: AsyncSession, query: Select) -> int:
+    """
+    Estimate the number of rows a filtered query returns from table statistics.
+
+    Uses the planner's row estimate (EXPLAIN without ANALYZE, based on
+    pg_class.reltuples and column statistics), so nothing is scanned; the
+    figure is only as fresh as the last ANALYZE of the table.
+
+    Args:
+        db: Database session
+        query: Filtered select, without ordering or limit
+
+    Returns:
+        Estimated row count
+    """
+    result = await db.execute(_Explain(query))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
@@ -0,0 +1,200 @@
+"""Monthly partition maintenance for the events and alerts tables."""
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.retention import retention_service
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by RANGE (created_at), one partition per calendar month (UTC)
+PARTITIONED_TABLES = ("events", "alerts")
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(at: datetime) -> datetime:
+    """First instant of the UTC month containing a time."""
+    at = at.astimezone(timezone.utc)
+    return datetime(at.year, at.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    """Name of a table's partition for a month, e.g. events_p202610."""
+    return f"{table}_p{month:%Y%m}"
+
+
+class PartitionManager:
+    """
+    Keeps monthly partitions of events and alerts ahead of time and removes expired ones.
+
+    Rows can only be inserted into months that have a partition, so each
+    run creates the partitions of the current month and the next
+    PARTITION_PREMAKE_MONTHS months. Partitions whose whole month is older
+    than the table's retention (PARTITION_EVENTS_RETENTION_MONTHS /
+    PARTITION_ALERTS_RETENTION_MONTHS) are detached, which removes them
+    from queries without deleting data; with PARTITION_DROP_EXPIRED they
+    are dropped as well. The audio of an events partition is deleted
+    through the retention service first, since the retention worker cannot
+    see the partition's rows once it is detached.
+    """
+
+    def __init__(self):
+        """Initialize the partition manager."""
+        self.premake_months = settings.partition_premake_months
+        self.retention_months = {
+            "events": settings.partition_events_retention_months,
+            "alerts": settings.partition_alerts_retention_months,
+        }
+        self.drop_expired = settings.partition_drop_expired
+        self.interval = settings.partition_check_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+
+    async def start(self):
+        """Start the periodic partition maintenance task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="partition-maintenance")
+
+    async def stop(self):
+        """Stop the periodic partition maintenance task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self, expire: bool = True) -> dict:
+        """
+        Create upcoming partitions and remove expired ones.
+
+        Args:
+            expire: Also remove expired partitions (deleting their audio can
+                take a while, so startup only creates partitions)
+
+        Returns:
+            Names of the created and expired partitions
+        """
+        async with AsyncSessionLocal() as session:
+            created = await self.ensure(session)
+            expired = await self.expire(session) if expire else []
+            await session.commit()
+
+        self.last_run = {"created": created, "expired": expired, "at": datetime.now(timezone.utc).isoformat()}
+        if created or expired:
+            logger.info(f"Partition maintenance: created {created}, expired {expired}")
+        return self.last_run
+
+    async def ensure(self, db: AsyncSession, since: Optional[datetime] = None) -> list[str]:
+        """
+        Create missing monthly partitions up to PARTITION_PREMAKE_MONTHS ahead.
+
+        Args:
+            db: Database session or connection (the caller commits)
+            since: First month to cover (defaults to the current month)
+
+        Returns:
+            Names of the partitions created
+        """
+        now = month_start(datetime.now(timezone.utc))
+        first = month_start(since) if since else now
+        last = add_months(now, self.premake_months)
+
+        created = []
+        for table in PARTITIONED_TABLES:
+            existing = {name for name, _ in await self.partitions(db, table)}
+            month = first
+            while month <= last:
+                name = partition_name(table, month)
+                if name not in existing:
+                    await db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    ))
+                    created.append(name)
+                month = add_months(month, 1)
+        return created
+
+    async def expire(self, db: AsyncSession) -> list[str]:
+        """
+        Detach (and optionally drop) partitions past their table's retention.
+
+        The audio of each expired events partition is deleted first, with
+        commits per batch; the detach itself is left for the caller to
+        commit. If deleting audio fails, nothing is detached and the next
+        run tries again.
+
+        Args:
+            db: Database session (the caller commits)
+
+        Returns:
+            Names of the partitions removed from their table
+        """
+        expired = []
+        for table in PARTITIONED_TABLES:
+            months = self.retention_months[table]
+            if months <= 0:
+                continue
+            cutoff = add_months(month_start(datetime.now(timezone.utc)), -months)
+            for name, upper_bound in await self.partitions(db, table):
+                if upper_bound is None or upper_bound > cutoff:
+                    continue
+                if table == "events":
+                    purged, freed = await retention_service.purge_audio(db, add_months(upper_bound, -1), upper_bound)
+                    if purged:
+                        logger.info(f"Deleted audio of {purged} events ({freed} bytes) before expiring {name}")
+                await db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                if self.drop_expired:
+                    await db.execute(text(f"DROP TABLE {name}"))
+                expired.append(name)
+        return expired
+
+    @staticmethod
+    async def partitions(db: AsyncSession, table: str) -> list[tuple[str, Optional[datetime]]]:
+        """
+        List the partitions of a table.
+
+        Args:
+            db: Database session
+            table: Partitioned table
+
+        Returns:
+            (partition name, exclusive upper bound) pairs; the bound is None
+            for a default partition
+        """
+        result = await db.execute(
+            text(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = CAST(:table AS regclass) ORDER BY child.relname"
+            ),
+            {"table": table},
+        )
+        partitions = []
+        for name, bound in result.all():
+            match = _UPPER_BOUND.search(bound or "")
+            partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+        return partitions
+
+    async def _loop(self):
+        """Run partition maintenance every PARTITION_CHECK_INTERVAL_SECONDS until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}", exc_info=True)
+
+
+# Global instance
+partition_manager = PartitionManager()
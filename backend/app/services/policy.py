@@ -1,12 +1,20 @@
 """Policy engine for alert decision making."""
+import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
 from app.models.event import Event
 from app.models.alert import Alert
-from app.models.alert_type import AlertType
+from app.models.alert_rule import AlertRule
+from app.services.cache import reference_cache
+from app.services.stream import alert_payload, stream_broker
 # Audit logs removed - not needed
 from app.schemas.inference import InferenceResponse
 from app.config import settings
@@ -14,6 +22,174 @@ from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Prune idle windows after this many recorded events
+_PRUNE_INTERVAL = 1000
+
+# session.info key holding rule-governed alerts flushed but not yet committed
+PENDING_ALERTS_KEY = "policy_pending_alerts"
+
+
+class SlidingWindowCounter:
+    """
+    Per-key event timestamps kept for a fixed time window.
+
+    Each key maps to a deque of epoch seconds in ascending order. Entries
+    older than the window (relative to the newest entry for the key) are
+    evicted on insert, so counting is a pair of bisections over a deque
+    that never holds more than one window of events.
+    """
+
+    def __init__(self, window_seconds: float):
+        """
+        Initialize the counter.
+
+        Args:
+            window_seconds: Length of the sliding window
+        """
+        self.window = window_seconds
+        self._windows: dict[tuple, deque] = {}
+        self._adds_since_prune = 0
+
+    def count(self, key: tuple, timestamp: float) -> int:
+        """
+        Count recorded events for a key within [timestamp - window, timestamp].
+
+        Args:
+            key: Window key
+            timestamp: End of the window in epoch seconds
+
+        Returns:
+            Number of recorded events in the window
+        """
+        window = self._windows.get(key)
+        if not window:
+            return 0
+        return bisect_right(window, timestamp) - bisect_left(window, timestamp - self.window)
+
+    def add(self, key: tuple, timestamp: float):
+        """
+        Record an event for a key.
+
+        Args:
+            key: Window key
+            timestamp: Event time in epoch seconds (may arrive out of order)
+        """
+        window = self._windows.setdefault(key, deque())
+        if not window or timestamp >= window[-1]:
+            window.append(timestamp)
+        else:
+            insort(window, timestamp)
+
+        cutoff = window[-1] - self.window
+        while window[0] < cutoff:
+            window.popleft()
+
+        self._adds_since_prune += 1
+        if self._adds_since_prune >= _PRUNE_INTERVAL:
+            self.prune(cutoff)
+
+    def prune(self, cutoff: float):
+        """Drop keys whose newest event is older than the cutoff."""
+        self._adds_since_prune = 0
+        for key in [key for key, window in self._windows.items() if window[-1] < cutoff]:
+            del self._windows[key]
+
+    def clear(self):
+        """Drop all windows."""
+        self._windows.clear()
+        self._adds_since_prune = 0
+
+    def stats(self) -> dict:
+        """Get the number of tracked keys and events."""
+        return {
+            "keys": len(self._windows),
+            "events": sum(len(window) for window in self._windows.values()),
+        }
+
+
+def event_timestamp_from(raw_data: Optional[dict], created_at: datetime) -> datetime:
+    """Recover the device-reported timestamp stored at ingestion, falling back to created_at."""
+    timestamp = (raw_data or {}).get("event_timestamp")
+    if timestamp:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except ValueError:
+            pass
+    return created_at
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Active alert rule with its settings resolved for evaluation."""
+    rule_id: int
+    confidence_threshold: Optional[float]
+    cooldown_seconds: int
+    deduplication_window_seconds: int
+    severity_level: Optional[str]
+
+
+class AlertRuleIndex:
+    """In-memory index of active alert rules keyed by (tenant_id, alert_type_id)."""
+
+    def __init__(self):
+        """Initialize an empty rule index."""
+        self._rules: dict[tuple[int, int], CompiledRule] = {}
+        self.loaded_at: Optional[float] = None
+
+    def get(self, tenant_id: int, alert_type_id: int) -> Optional[CompiledRule]:
+        """Get the active rule for a tenant and alert type, if any."""
+        return self._rules.get((tenant_id, alert_type_id))
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        Replace the index with the active rules in the database.
+
+        When several active rules exist for the same tenant and alert type,
+        the one with the lowest rule_id wins.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of indexed rules
+        """
+        query = select(AlertRule).where(AlertRule.is_active == True).order_by(AlertRule.rule_id)
+        result = await db.execute(query)
+
+        rules: dict[tuple[int, int], CompiledRule] = {}
+        for rule in result.scalars().all():
+            key = (rule.tenant_id, rule.alert_type_id)
+            if key in rules:
+                logger.warning(
+                    f"Ignoring alert rule {rule.rule_id}: rule {rules[key].rule_id} already applies to "
+                    f"tenant {rule.tenant_id}, alert type {rule.alert_type_id}"
+                )
+                continue
+            rules[key] = CompiledRule(
+                rule_id=rule.rule_id,
+                confidence_threshold=(
+                    float(rule.confidence_threshold) if rule.confidence_threshold is not None else None
+                ),
+                cooldown_seconds=rule.cooldown_seconds,
+                deduplication_window_seconds=rule.deduplication_window_seconds,
+                severity_level=rule.severity_level,
+            )
+
+        # Swap in one assignment so evaluations never see a partial index
+        self._rules = rules
+        self.loaded_at = time.time()
+        return len(rules)
+
+    def max_suppression_seconds(self) -> int:
+        """Longest cooldown or deduplication window of any indexed rule."""
+        return max(
+            (max(rule.cooldown_seconds, rule.deduplication_window_seconds) for rule in self._rules.values()),
+            default=0,
+        )
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
 
 class PolicyEngine:
     """
@@ -22,6 +198,16 @@ class PolicyEngine:
     Rules:
     - Threshold-based: If inference score exceeds threshold, create alert
     - Aggregation: If N events within T seconds, create aggregated alert
+    - Alert rules: An active AlertRule for the house's tenant and the alert
+      type overrides the threshold and severity; its cooldown (per house)
+      and deduplication window (per device) suppress repeated alerts
+    
+    Rules are served from an in-memory index refreshed periodically, and
+    last-alert times are tracked in memory (recorded when the alert's
+    transaction commits), so neither needs a query per event. Aggregation counts come from in-memory sliding windows keyed by
+    (house, device, label), rebuilt from the database at startup. The
+    windows are per process, so each API process counts the events it
+    has evaluated itself.
     """
     
     def __init__(self):
@@ -29,6 +215,108 @@ class PolicyEngine:
         self.threshold = settings.policy_threshold
         self.aggregation_window = timedelta(seconds=settings.policy_aggregation_window_seconds)
         self.min_events_for_alert = settings.policy_min_events_for_alert
+        self.consistency_check = settings.policy_window_consistency_check
+        self.windows = SlidingWindowCounter(self.aggregation_window.total_seconds())
+        self.rules = AlertRuleIndex()
+        self.rules_refresh_seconds = settings.policy_rules_refresh_seconds
+        # Wall-clock time of the last committed alert per (house, alert type) and (house, device, alert type)
+        self._last_house_alert: dict[tuple[int, int], float] = {}
+        self._last_device_alert: dict[tuple[int, int, int], float] = {}
+        # Alerts created but not yet committed, by the same keys
+        self._uncommitted_alerts: Counter = Counter()
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def load_state(self, db: AsyncSession):
+        """
+        Load alert rules and rebuild in-memory state from the database.
+        
+        Args:
+            db: Database session
+        """
+        await self.refresh_rules(db)
+        await self.rebuild_windows(db)
+        await self.rebuild_alert_history(db)
+    
+    async def start(self):
+        """Start periodically refreshing the alert rule index."""
+        if self._refresh_task is None and self.rules_refresh_seconds > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(), name="policy-rules-refresh")
+    
+    async def stop(self):
+        """Stop the alert rule refresh task."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+    
+    async def refresh_rules(self, db: AsyncSession) -> int:
+        """
+        Reload active alert rules into the in-memory index.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of indexed rules
+        """
+        count = await self.rules.load(db)
+        self._prune_alert_history()
+        logger.info(f"Loaded {count} active alert rules")
+        return count
+    
+    async def rebuild_alert_history(self, db: AsyncSession) -> int:
+        """
+        Restore last-alert times from recent alerts so cooldowns survive restarts.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of alerts loaded
+        """
+        horizon = self.rules.max_suppression_seconds()
+        self._last_house_alert.clear()
+        self._last_device_alert.clear()
+        if horizon <= 0:
+            return 0
+        
+        since = datetime.now(timezone.utc) - timedelta(seconds=horizon)
+        query = select(Alert.house_id, Alert.device_id, Alert.alert_type_id, Alert.created_at).where(
+            Alert.created_at >= since
+        )
+        result = await db.execute(query)
+        rows = result.all()
+        for house_id, device_id, alert_type_id, created_at in rows:
+            self._record_alert(house_id, device_id, alert_type_id, created_at.timestamp())
+        return len(rows)
+    
+    async def rebuild_windows(self, db: AsyncSession) -> int:
+        """
+        Rebuild the aggregation windows from recently processed events.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of events loaded into the windows
+        """
+        since = datetime.now(timezone.utc) - self.aggregation_window
+        query = select(Event.house_id, Event.device_id, Event.inference_label, Event.raw_data, Event.created_at).where(
+            Event.created_at >= since,
+            Event.is_processed == True,
+            Event.inference_label.is_not(None)
+        )
+        result = await db.execute(query)
+        
+        self.windows.clear()
+        loaded = 0
+        for house_id, device_id, label, raw_data, created_at in result.all():
+            timestamp = event_timestamp_from(raw_data, created_at).timestamp()
+            self.windows.add((house_id, device_id, label), timestamp)
+            loaded += 1
+        
+        logger.info(f"Rebuilt policy windows with {loaded} events")
+        return loaded
     
     async def evaluate(
         self,
@@ -53,6 +341,15 @@ class PolicyEngine:
         Returns:
             Alert ID if alert was created, None otherwise
         """
+        # Count earlier events with the same label, then record this one
+        window_key = (house_id, device_id, inference_result.label)
+        timestamp = event_timestamp.timestamp()
+        similar_event_count = self.windows.count(window_key, timestamp)
+        self.windows.add(window_key, timestamp)
+        
+        if self.consistency_check:
+            await self._check_window(db, window_key, event_timestamp, similar_event_count)
+        
         # Map inference label to alert type name
         label_to_type_name = {
             "distress": "distress",
@@ -63,10 +360,8 @@ class PolicyEngine:
         
         alert_type_name = label_to_type_name.get(inference_result.label, "anomaly")
         
-        # Get alert_type_id from alert_types table
-        alert_type_query = select(AlertType).where(AlertType.type_name == alert_type_name)
-        alert_type_result = await db.execute(alert_type_query)
-        alert_type = alert_type_result.scalar_one_or_none()
+        # Get alert_type_id from alert_types table (via the reference cache)
+        alert_type = await reference_cache.get_alert_type(db, alert_type_name)
         
         # If alert type doesn't exist, create a default one or use a fallback
         if not alert_type:
@@ -77,8 +372,21 @@ class PolicyEngine:
         
         alert_type_id = alert_type.alert_type_id
         
-        # Determine severity based on score
-        if inference_result.score >= 0.85:
+        # Look up the tenant's rule for this alert type
+        rule = None
+        if len(self.rules):
+            house = await reference_cache.get_house(db, house_id)
+            if house:
+                rule = self.rules.get(house.tenant_id, alert_type_id)
+        
+        threshold = self.threshold
+        if rule and rule.confidence_threshold is not None:
+            threshold = rule.confidence_threshold
+        
+        # Determine severity based on score, unless the rule fixes it
+        if rule and rule.severity_level:
+            severity = rule.severity_level
+        elif inference_result.score >= 0.85:
             severity = "high"
         elif inference_result.score >= 0.70:
             severity = "medium"
@@ -86,26 +394,10 @@ class PolicyEngine:
             severity = "low"
         
         # Check threshold
-        if inference_result.score < self.threshold:
-            logger.info(f"Event {event_id}: Score {inference_result.score} below threshold {self.threshold}, no alert")
+        if inference_result.score < threshold:
+            logger.info(f"Event {event_id}: Score {inference_result.score} below threshold {threshold}, no alert")
             return None
         
-        # Check aggregation window for similar events
-        window_start = event_timestamp - self.aggregation_window
-        
-        # Query for recent similar events in the same house
-        # We need to check raw_data for inference label since it's stored there
-        similar_events_query = select(func.count(Event.event_id)).where(
-            Event.house_id == house_id,
-            Event.device_id == device_id,
-            Event.created_at >= window_start,
-            Event.created_at <= event_timestamp,
-            Event.is_processed == True
-        )
-        
-        result = await db.execute(similar_events_query)
-        similar_event_count = result.scalar() or 0
-        
         # Check if we should create an alert
         should_create_alert = False
         policy_rule = ""
@@ -113,19 +405,23 @@ class PolicyEngine:
         if similar_event_count >= self.min_events_for_alert:
             should_create_alert = True
             policy_rule = f"aggregation: {similar_event_count} events in {self.aggregation_window.total_seconds()}s window"
-        elif inference_result.score >= self.threshold:
+        elif inference_result.score >= threshold:
             should_create_alert = True
-            policy_rule = f"threshold: score {inference_result.score:.2f} >= {self.threshold}"
+            policy_rule = f"threshold: score {inference_result.score:.2f} >= {threshold}"
         
         if not should_create_alert:
             logger.info(f"Event {event_id}: Policy conditions not met, no alert")
             return None
         
-        # Get device location
-        from app.models.device import Device
-        device_query = select(Device).where(Device.device_id == device_id)
-        device_result = await db.execute(device_query)
-        device = device_result.scalar_one_or_none()
+        # Enforce the rule's deduplication window and cooldown
+        if rule:
+            now = time.time()
+            suppressed_by = self._suppressed_by(rule, house_id, device_id, alert_type_id, now)
+            if suppressed_by:
+                logger.info(f"Event {event_id}: Alert suppressed by rule {rule.rule_id} {suppressed_by}")
+                return None
+            # Concurrent evaluations see this alert now; it counts for cooldown once committed
+            self._hold_alert(db, house_id, device_id, alert_type_id, now)
         
         # Create alert
         alert = Alert(
@@ -133,7 +429,7 @@ class PolicyEngine:
             device_id=device_id,
             event_id=event_id,
             alert_type_id=alert_type_id,
-            rule_id=None,  # Can be set if using alert_rules table
+            rule_id=rule.rule_id if rule else None,
             severity=severity,
             status="active",
             confidence_score=Decimal(str(inference_result.score)),
@@ -141,10 +437,192 @@ class PolicyEngine:
         
         db.add(alert)
         await db.flush()  # Flush to get the alert_id
+        stream_broker.publish_on_commit(db, "alert_created", house_id, alert_payload(alert))
         
         logger.info(f"Created alert {alert.alert_id} for event {event_id} (policy: {policy_rule})")
         
         return alert.alert_id
+    
+    async def raise_inactivity_alert(self, db: AsyncSession, house_id: int, device_id: int) -> Optional[int]:
+        """
+        Create an "inactivity" alert for a device that stopped sending heartbeats.
+        
+        The tenant's alert rule for the inactivity type applies as for
+        inference alerts: it may fix the severity, and its cooldown and
+        deduplication window suppress repeated alerts. The caller commits.
+        
+        Args:
+            db: Database session
+            house_id: ID of the house
+            device_id: ID of the silent device
+            
+        Returns:
+            Alert ID if an alert was created, None otherwise
+        """
+        alert_type = await reference_cache.get_alert_type(db, "inactivity")
+        if not alert_type:
+            logger.warning("Alert type 'inactivity' not found, no alert for silent device")
+            return None
+        
+        rule = None
+        if len(self.rules):
+            house = await reference_cache.get_house(db, house_id)
+            if house:
+                rule = self.rules.get(house.tenant_id, alert_type.alert_type_id)
+        
+        if rule:
+            now = time.time()
+            suppressed_by = self._suppressed_by(rule, house_id, device_id, alert_type.alert_type_id, now)
+            if suppressed_by:
+                logger.info(f"Device {device_id}: Inactivity alert suppressed by rule {rule.rule_id} {suppressed_by}")
+                return None
+            self._hold_alert(db, house_id, device_id, alert_type.alert_type_id, now)
+        
+        alert = Alert(
+            house_id=house_id,
+            device_id=device_id,
+            alert_type_id=alert_type.alert_type_id,
+            rule_id=rule.rule_id if rule else None,
+            severity=rule.severity_level if rule and rule.severity_level else "medium",
+            status="active",
+        )
+        
+        db.add(alert)
+        await db.flush()
+        stream_broker.publish_on_commit(db, "alert_created", house_id, alert_payload(alert))
+        
+        logger.info(f"Created inactivity alert {alert.alert_id} for device {device_id}")
+        
+        return alert.alert_id
+    
+    def _suppressed_by(
+        self,
+        rule: CompiledRule,
+        house_id: int,
+        device_id: int,
+        alert_type_id: int,
+        now: float
+    ) -> Optional[str]:
+        """Return which window suppresses a new alert, or None if it may be created."""
+        device_key = (house_id, device_id, alert_type_id)
+        last_device_alert = self._last_device_alert.get(device_key)
+        if rule.deduplication_window_seconds > 0 and (
+            self._uncommitted_alerts[device_key]
+            or last_device_alert is not None and now - last_device_alert < rule.deduplication_window_seconds
+        ):
+            return f"deduplication window ({rule.deduplication_window_seconds}s)"
+        
+        house_key = (house_id, alert_type_id)
+        last_house_alert = self._last_house_alert.get(house_key)
+        if rule.cooldown_seconds > 0 and (
+            self._uncommitted_alerts[house_key]
+            or last_house_alert is not None and now - last_house_alert < rule.cooldown_seconds
+        ):
+            return f"cooldown ({rule.cooldown_seconds}s)"
+        return None
+    
+    def _hold_alert(self, db: AsyncSession, house_id: int, device_id: int, alert_type_id: int, at: float):
+        """
+        Suppress concurrent duplicates of an alert until its transaction ends.
+        
+        The alert is recorded for cooldown and deduplication only if the
+        transaction commits (see the session listeners below).
+        """
+        alert = (house_id, device_id, alert_type_id, at)
+        self._uncommitted_alerts.update(((house_id, alert_type_id), (house_id, device_id, alert_type_id)))
+        db.info.setdefault(PENDING_ALERTS_KEY, []).append(alert)
+    
+    def _release_alerts(self, alerts: list[tuple], committed: bool):
+        """Stop holding alerts whose transaction ended, recording the committed ones."""
+        for house_id, device_id, alert_type_id, at in alerts:
+            self._uncommitted_alerts.subtract(((house_id, alert_type_id), (house_id, device_id, alert_type_id)))
+            if committed:
+                self._record_alert(house_id, device_id, alert_type_id, at)
+        self._uncommitted_alerts += Counter()  # Drop keys that reached zero
+    
+    def _record_alert(self, house_id: int, device_id: int, alert_type_id: int, at: float):
+        """Remember the time of an alert for cooldown and deduplication."""
+        house_key = (house_id, alert_type_id)
+        device_key = (house_id, device_id, alert_type_id)
+        self._last_house_alert[house_key] = max(at, self._last_house_alert.get(house_key, at))
+        self._last_device_alert[device_key] = max(at, self._last_device_alert.get(device_key, at))
+    
+    def _prune_alert_history(self):
+        """Forget last-alert times that can no longer suppress anything."""
+        cutoff = time.time() - self.rules.max_suppression_seconds()
+        for history in (self._last_house_alert, self._last_device_alert):
+            for key in [key for key, at in history.items() if at < cutoff]:
+                del history[key]
+    
+    async def _refresh_loop(self):
+        """Reload alert rules on a fixed interval until cancelled."""
+        from app.database import AsyncSessionLocal
+        
+        while True:
+            await asyncio.sleep(self.rules_refresh_seconds)
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.refresh_rules(session)
+            except Exception as e:
+                logger.error(f"Failed to refresh alert rules: {e}", exc_info=True)
+    
+    async def _check_window(
+        self,
+        db: AsyncSession,
+        window_key: tuple,
+        event_timestamp: datetime,
+        window_count: int
+    ):
+        """
+        Re-count a window from the database the way a rebuild would and log mismatches.
+        
+        Events still being processed by other workers are already in memory
+        but not yet committed, so small transient differences are expected.
+        
+        Args:
+            db: Database session
+            window_key: (house_id, device_id, label) key of the window
+            event_timestamp: Timestamp of the event being evaluated
+            window_count: Count taken from the in-memory window
+        """
+        house_id, device_id, label = window_key
+        since = datetime.now(timezone.utc) - self.aggregation_window
+        query = select(Event.raw_data, Event.created_at).where(
+            Event.house_id == house_id,
+            Event.device_id == device_id,
+            Event.created_at >= since,
+            Event.is_processed == True,
+            Event.inference_label == label
+        )
+        result = await db.execute(query)
+        
+        end = event_timestamp.timestamp()
+        start = end - self.aggregation_window.total_seconds()
+        db_count = sum(
+            1 for raw_data, created_at in result.all()
+            if start <= event_timestamp_from(raw_data, created_at).timestamp() <= end
+        )
+        if db_count != window_count:
+            logger.warning(
+                f"Policy window mismatch for house {house_id}, device {device_id}, label '{label}': "
+                f"memory={window_count} database={db_count}"
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_alerts(session):
+    alerts = session.info.pop(PENDING_ALERTS_KEY, None)
+    if alerts:
+        policy_engine._release_alerts(alerts, committed=True)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_uncommitted_alerts(session, transaction):
+    # Rolled back, or closed without committing
+    if transaction.parent is None:
+        alerts = session.info.pop(PENDING_ALERTS_KEY, None)
+        if alerts:
+            policy_engine._release_alerts(alerts, committed=False)
 
 
 # Global instance
@@ -0,0 +1,308 @@
+"""Event processing pipeline: inference, policy evaluation and background workers."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.event import Event
+from app.schemas.inference import InferenceResponse
+from app.services.inference import inference_service
+from app.services.policy import event_timestamp_from, policy_engine
+from app.services.storage import storage_service
+
+logger = logging.getLogger(__name__)
+
+# Unprocessed events loaded per query by the startup sweep
+RECOVERY_BATCH_SIZE = 500
+
+
+class QueueFullError(Exception):
+    """Raised when an event cannot be enqueued without waiting."""
+
+
+async def predict_stored(media_url: str) -> InferenceResponse:
+    """
+    Run inference on a stored audio file.
+
+    Files in a remote storage backend are downloaded to a temporary file
+    for the duration of the prediction.
+
+    Args:
+        media_url: Media URL of the stored file
+
+    Returns:
+        InferenceResponse with label and score
+    """
+    async with storage_service.local_copy(media_url) as path:
+        return await inference_service.predict(str(path))
+
+
+async def process_event(
+    db: AsyncSession,
+    event: Event,
+    event_timestamp: datetime,
+    inference_result: Optional[InferenceResponse] = None,
+) -> Optional[int]:
+    """
+    Run inference and policy evaluation for a persisted event.
+
+    Stores the inference result in the event's raw_data and inference
+    columns and marks the event as processed. The caller is responsible for
+    committing the session.
+
+    Args:
+        db: Database session
+        event: Event to process (must already have an event_id)
+        event_timestamp: Device-reported timestamp of the event
+        inference_result: Precomputed inference result; inference runs when omitted
+
+    Returns:
+        Alert ID if an alert was created, None otherwise
+    """
+    if inference_result is None:
+        inference_result = await predict_stored(event.media_url)
+
+    # Reassign instead of mutating in place so the JSON column is flagged dirty
+    raw_data = dict(event.raw_data or {})
+    raw_data["inference"] = {
+        "label": inference_result.label,
+        "score": float(inference_result.score),
+    }
+    if inference_result.windows is not None:
+        raw_data["inference"]["windows"] = [window.model_dump() for window in inference_result.windows]
+        raw_data["inference"]["elapsed_ms"] = inference_result.elapsed_ms
+    event.raw_data = raw_data
+    event.inference_label = inference_result.label
+    event.inference_score = float(inference_result.score)
+
+    alert_id = await policy_engine.evaluate(
+        db=db,
+        event_id=event.event_id,
+        house_id=event.house_id,
+        device_id=event.device_id,
+        inference_result=inference_result,
+        event_timestamp=event_timestamp,
+    )
+
+    event.is_processed = True
+    return alert_id
+
+
+@dataclass
+class ProcessingJob:
+    """A queued unit of work for the event processor."""
+    event_id: int
+    event_timestamp: datetime
+
+
+class EventProcessor:
+    """
+    Bounded in-process work queue with a pool of processing workers.
+
+    Ingestion persists the event and enqueues its ID; workers pick it up,
+    run inference and policy evaluation in their own session, and mark the
+    event as processed.
+    """
+
+    def __init__(self):
+        """Initialize the event processor."""
+        self.queue_size = settings.ingest_queue_size
+        self.worker_count = settings.ingest_workers
+        self.retry_after_seconds = settings.ingest_retry_after_seconds
+        self.drain_timeout = settings.ingest_drain_timeout_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._sweep_task: Optional[asyncio.Task] = None
+        self._pending: set[int] = set()
+        self._accepting = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether ingestion should hand events to the background workers."""
+        return settings.ingest_mode == "async"
+
+    @property
+    def running(self) -> bool:
+        """Whether the workers are running and accepting new jobs."""
+        return self._accepting
+
+    def depth(self) -> int:
+        """Number of events currently waiting in the queue."""
+        return self._queue.qsize() if self._queue else 0
+
+    def is_full(self) -> bool:
+        """Whether the queue has reached its capacity."""
+        return self._queue is not None and self._queue.full()
+
+    def free_slots(self) -> int:
+        """Number of events that can be enqueued without waiting."""
+        return self.queue_size - self.depth() if self._queue else 0
+
+    async def start(self):
+        """Start the worker pool."""
+        if self._accepting:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"event-processor-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._accepting = True
+        self._sweep_task = asyncio.create_task(self.recover_unprocessed(), name="event-processor-sweep")
+        logger.info(f"Event processor started with {self.worker_count} workers (queue size {self.queue_size})")
+
+    async def stop(self):
+        """
+        Stop accepting new jobs, drain the queue and stop the workers.
+
+        Events still queued when the drain timeout expires stay unprocessed
+        and are picked up by the startup sweep on the next run.
+        """
+        if not self._accepting:
+            return
+        self._accepting = False
+        if self._sweep_task and not self._sweep_task.done():
+            self._sweep_task.cancel()
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+            logger.info("Event processor drained")
+        except asyncio.TimeoutError:
+            logger.warning(f"Event processor drain timed out with {self.depth()} events still queued")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def enqueue(self, event_id: int, event_timestamp: datetime):
+        """
+        Add an event to the processing queue, waiting for a free slot if it is full.
+
+        Used by the startup sweep; request handlers use enqueue_nowait so a
+        full queue is rejected instead of blocking the request.
+
+        Args:
+            event_id: ID of the persisted event
+            event_timestamp: Device-reported timestamp of the event
+        """
+        if not self._accepting:
+            raise RuntimeError("Event processor is not running")
+        if event_id in self._pending:
+            return
+        self._pending.add(event_id)
+        await self._queue.put(ProcessingJob(event_id=event_id, event_timestamp=event_timestamp))
+
+    def enqueue_nowait(self, event_id: int, event_timestamp: datetime):
+        """
+        Add an event to the processing queue without waiting.
+
+        Args:
+            event_id: ID of the persisted event
+            event_timestamp: Device-reported timestamp of the event
+
+        Raises:
+            QueueFullError: If the queue has no free slot
+        """
+        if not self._accepting:
+            raise RuntimeError("Event processor is not running")
+        if event_id in self._pending:
+            return
+        try:
+            self._queue.put_nowait(ProcessingJob(event_id=event_id, event_timestamp=event_timestamp))
+        except asyncio.QueueFull:
+            raise QueueFullError("Ingestion queue is full, retry later")
+        self._pending.add(event_id)
+
+    async def recover_unprocessed(self) -> int:
+        """
+        Re-enqueue events left unprocessed by a previous run.
+
+        Runs as a background task on start so a large backlog does not
+        block startup; it waits for free queue slots as workers drain. The
+        backlog is read in pages of RECOVERY_BATCH_SIZE by keyset on
+        event_id (served by the partial unprocessed-events index), loading
+        only the fields a job needs.
+
+        Returns:
+            Number of events re-enqueued
+        """
+        recovered = 0
+        last_event_id = 0
+        while self._accepting:
+            try:
+                async with AsyncSessionLocal() as session:
+                    query = select(
+                        Event.event_id,
+                        Event.raw_data["event_timestamp"].astext,
+                        Event.created_at,
+                    ).where(
+                        Event.is_processed == False,
+                        Event.event_id > last_event_id,
+                    ).order_by(Event.event_id).limit(RECOVERY_BATCH_SIZE)
+                    result = await session.execute(query)
+                    rows = result.all()
+            except Exception as e:
+                logger.error(f"Failed to load unprocessed events: {e}", exc_info=True)
+                break
+
+            for event_id, timestamp, created_at in rows:
+                if not self._accepting:
+                    break
+                await self.enqueue(event_id, event_timestamp_from({"event_timestamp": timestamp}, created_at))
+                recovered += 1
+
+            if len(rows) < RECOVERY_BATCH_SIZE:
+                break
+            last_event_id = rows[-1].event_id
+
+        if recovered:
+            logger.info(f"Re-enqueued {recovered} unprocessed events")
+        return recovered
+
+    async def _worker(self, worker_id: int):
+        """Consume jobs from the queue until cancelled."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to process event {job.event_id}: {e}", exc_info=True)
+            finally:
+                self._pending.discard(job.event_id)
+                self._queue.task_done()
+
+    async def _process(self, job: ProcessingJob):
+        """
+        Process a single queued event in its own transaction.
+
+        The event row is locked for the transaction; an event locked by
+        another worker or process is skipped, since that one will finish it.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Event).where(Event.event_id == job.event_id).with_for_update(skip_locked=True)
+            )
+            event = result.scalar_one_or_none()
+            if not event:
+                logger.info(f"Queued event {job.event_id} is locked elsewhere or no longer exists")
+                return
+            if event.is_processed:
+                return
+
+            try:
+                alert_id = await process_event(session, event, job.event_timestamp)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+        logger.info(f"Processed event {job.event_id}" + (f" (alert {alert_id})" if alert_id else ""))
+
+
+# Global instance
+event_processor = EventProcessor()
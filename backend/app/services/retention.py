@@ -0,0 +1,425 @@
+"""Audio retention: age and size quotas per tenant, and FLAC compaction of processed audio."""
+import asyncio
+import json
+import logging
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+import soundfile as sf
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.alert import Alert
+from app.models.event import Event
+from app.models.house import House
+from app.services.storage import storage_service
+
+logger = logging.getLogger(__name__)
+
+# WAV sample formats FLAC can hold losslessly, mapped to the FLAC subtype
+_FLAC_SUBTYPES = {
+    "PCM_16": "PCM_16",
+    "PCM_24": "PCM_24",
+    "PCM_S8": "PCM_S8",
+    "PCM_U8": "PCM_S8",
+}
+
+# Frames per block when re-encoding, so memory stays flat for long clips
+_ENCODE_BLOCK_FRAMES = 65536
+
+
+class RetentionService:
+    """
+    Background worker that bounds audio storage growth.
+
+    Each cycle it:
+    1. Deletes audio of processed events past the retention age; audio
+       linked to an alert uses the (longer) alert retention age
+    2. Enforces per-tenant size quotas, deleting the oldest audio that is
+       not linked to an alert first
+    3. Re-encodes processed WAV audio to FLAC (lossless)
+
+    Events are kept; only their audio is removed (media_url is cleared and
+    the deletion is noted in raw_data). Files are handled through the
+    storage service, so this works with local and object storage. A file shared by several events
+    (content layout) is deleted once no event references it. Work per
+    cycle is capped at RETENTION_BATCH_SIZE files with a pause between file
+    operations so the worker does not compete with ingestion for disk I/O.
+    """
+
+    def __init__(self):
+        """Initialize the retention service."""
+        self.enabled = settings.retention_enabled
+        self.interval = settings.retention_interval_seconds
+        self.batch_size = settings.retention_batch_size
+        self.io_pause = settings.retention_io_pause_ms / 1000.0
+        self.compress_flac = settings.retention_compress_flac
+        self.default_policy = {
+            "max_age_days": settings.retention_max_age_days,
+            "alert_max_age_days": settings.retention_alert_max_age_days,
+            "quota_mb": settings.retention_tenant_quota_mb,
+        }
+        self.tenant_overrides = _parse_overrides(settings.retention_tenant_overrides)
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+
+    def policy_for(self, tenant_id: int) -> dict:
+        """
+        Get the retention policy of a tenant.
+
+        Args:
+            tenant_id: ID of the tenant
+
+        Returns:
+            Dict with max_age_days, alert_max_age_days and quota_mb (0 = unlimited)
+        """
+        return {**self.default_policy, **self.tenant_overrides.get(tenant_id, {})}
+
+    async def start(self):
+        """Start the periodic retention task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="audio-retention")
+            logger.info(f"Audio retention started (every {self.interval}s, {self.batch_size} files per cycle)")
+
+    async def stop(self):
+        """Stop the periodic retention task."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> dict:
+        """
+        Run one retention cycle.
+
+        Returns:
+            Counts of deleted and compressed files and bytes freed
+        """
+        stats = {"expired": 0, "over_quota": 0, "compressed": 0, "bytes_freed": 0}
+        budget = self.batch_size
+
+        async with AsyncSessionLocal() as session:
+            tenants = await self._tenant_ids(session)
+            for tenant_id in tenants:
+                if budget <= 0:
+                    break
+                deleted, freed = await self._expire(session, tenant_id, budget)
+                stats["expired"] += deleted
+                stats["bytes_freed"] += freed
+                budget -= deleted
+
+            for tenant_id in tenants:
+                if budget <= 0:
+                    break
+                deleted, freed = await self._enforce_quota(session, tenant_id, budget)
+                stats["over_quota"] += deleted
+                stats["bytes_freed"] += freed
+                budget -= deleted
+
+            if self.compress_flac and budget > 0:
+                compressed, freed = await self._compress(session, budget)
+                stats["compressed"] += compressed
+                stats["bytes_freed"] += freed
+
+        self.last_run = {**stats, "finished_at": datetime.now(timezone.utc).isoformat()}
+        if any(stats.values()):
+            logger.info(f"Audio retention cycle: {stats}")
+        return stats
+
+    async def usage_report(self, db: AsyncSession) -> dict:
+        """
+        Report audio storage usage per tenant.
+
+        Sizes come from the size_bytes recorded in each event's raw_data;
+        events stored before sizes were recorded are counted separately.
+        A file shared by several events is counted once per event.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dict with disk totals, per-tenant usage and the last cycle's stats
+        """
+        size = Event.raw_data["size_bytes"].as_integer()
+        query = select(
+            House.tenant_id,
+            func.count(Event.event_id),
+            func.coalesce(func.sum(size), 0),
+            func.count(Event.event_id).filter(size.is_(None)),
+            func.count(Event.event_id).filter(Event.media_url.like("%.flac")),
+            func.min(Event.created_at),
+        ).join(House, House.house_id == Event.house_id).where(
+            Event.media_url.is_not(None)
+        ).group_by(House.tenant_id).order_by(House.tenant_id)
+        result = await db.execute(query)
+
+        tenants = []
+        for tenant_id, files, size_bytes, unsized, flac_files, oldest in result.all():
+            policy = self.policy_for(tenant_id)
+            quota_bytes = policy["quota_mb"] * 1024 * 1024
+            tenants.append({
+                "tenant_id": tenant_id,
+                "files": files,
+                "size_bytes": int(size_bytes),
+                "files_without_size": unsized,
+                "flac_files": flac_files,
+                "oldest_audio_at": oldest,
+                "quota_bytes": quota_bytes or None,
+                "quota_used": (int(size_bytes) / quota_bytes) if quota_bytes else None,
+                "max_age_days": policy["max_age_days"] or None,
+                "alert_max_age_days": policy["alert_max_age_days"] or None,
+            })
+
+        disk = await asyncio.to_thread(shutil.disk_usage, settings.storage_path)
+        return {
+            "storage_path": settings.storage_path,
+            "disk_total_bytes": disk.total,
+            "disk_used_bytes": disk.used,
+            "disk_free_bytes": disk.free,
+            "retention_enabled": self.enabled,
+            "last_run": self.last_run,
+            "tenants": tenants,
+        }
+
+    async def _loop(self):
+        """Run retention cycles until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Audio retention cycle failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    async def purge_audio(self, db: AsyncSession, start: datetime, end: datetime) -> tuple[int, int]:
+        """
+        Delete the audio of all events created in [start, end), whatever their age or alerts.
+
+        Used before an events partition is detached, since this worker no
+        longer sees the partition's rows afterwards. Commits after each
+        batch of RETENTION_BATCH_SIZE events.
+
+        Args:
+            db: Database session
+            start: Start of the period
+            end: End of the period (exclusive)
+
+        Returns:
+            Number of events whose audio was deleted and bytes freed
+        """
+        deleted = freed = 0
+        while True:
+            result = await db.execute(
+                select(Event).where(
+                    Event.created_at >= start,
+                    Event.created_at < end,
+                    Event.media_url.is_not(None),
+                ).order_by(Event.created_at).limit(self.batch_size)
+            )
+            events = result.scalars().all()
+            if not events:
+                return deleted, freed
+            count, size = await self._delete_audio(db, events, "partition")
+            deleted += count
+            freed += size
+
+    async def _tenant_ids(self, db: AsyncSession) -> list[int]:
+        """Tenants that own at least one house."""
+        result = await db.execute(select(House.tenant_id).distinct().order_by(House.tenant_id))
+        return list(result.scalars().all())
+
+    def _audio_query(self, tenant_id: int):
+        """Processed events of a tenant that still have audio."""
+        return select(Event).join(House, House.house_id == Event.house_id).where(
+            House.tenant_id == tenant_id,
+            Event.media_url.is_not(None),
+            Event.is_processed == True,
+        )
+
+    async def _expire(self, db: AsyncSession, tenant_id: int, limit: int) -> tuple[int, int]:
+        """Delete audio past the tenant's retention ages."""
+        policy = self.policy_for(tenant_id)
+        now = datetime.now(timezone.utc)
+        has_alert = _has_alert()
+
+        conditions = []
+        if policy["max_age_days"]:
+            conditions.append(and_(~has_alert, Event.created_at < now - timedelta(days=policy["max_age_days"])))
+        if policy["alert_max_age_days"]:
+            conditions.append(and_(has_alert, Event.created_at < now - timedelta(days=policy["alert_max_age_days"])))
+
+        deleted = freed = 0
+        for condition in conditions:
+            if deleted >= limit:
+                break
+            query = self._audio_query(tenant_id).where(condition).order_by(Event.created_at).limit(limit - deleted)
+            result = await db.execute(query)
+            count, size = await self._delete_audio(db, result.scalars().all(), "age")
+            deleted += count
+            freed += size
+        return deleted, freed
+
+    async def _enforce_quota(self, db: AsyncSession, tenant_id: int, limit: int) -> tuple[int, int]:
+        """Delete the oldest audio of a tenant until it is under its size quota."""
+        quota_bytes = self.policy_for(tenant_id)["quota_mb"] * 1024 * 1024
+        if not quota_bytes:
+            return 0, 0
+
+        size = Event.raw_data["size_bytes"].as_integer()
+        usage_query = select(func.coalesce(func.sum(size), 0)).join(
+            House, House.house_id == Event.house_id
+        ).where(House.tenant_id == tenant_id, Event.media_url.is_not(None))
+        usage = int((await db.execute(usage_query)).scalar() or 0)
+        if usage <= quota_bytes:
+            return 0, 0
+
+        # Oldest audio first, audio linked to alerts last
+        has_alert = _has_alert()
+        query = self._audio_query(tenant_id).order_by(has_alert, Event.created_at).limit(limit)
+        result = await db.execute(query)
+
+        victims = []
+        excess = usage - quota_bytes
+        for event in result.scalars().all():
+            if excess <= 0:
+                break
+            size_bytes = (event.raw_data or {}).get("size_bytes")
+            if size_bytes is None:
+                # Stored before sizes were recorded, so not part of the usage sum; age expiry covers it
+                continue
+            victims.append(event)
+            excess -= size_bytes
+
+        logger.info(f"Tenant {tenant_id} uses {usage} bytes of its {quota_bytes} byte audio quota")
+        return await self._delete_audio(db, victims, "quota")
+
+    async def _delete_audio(self, db: AsyncSession, events: list[Event], reason: str) -> tuple[int, int]:
+        """Detach audio from events, commit, then delete files no event references anymore."""
+        if not events:
+            return 0, 0
+
+        paths = set()
+        deleted_at = datetime.now(timezone.utc).isoformat()
+        for event in events:
+            paths.add(event.media_url)
+            raw_data = dict(event.raw_data or {})
+            raw_data["audio_deleted"] = {"at": deleted_at, "reason": reason}
+            event.raw_data = raw_data
+            event.media_url = None
+        await db.commit()
+
+        freed = 0
+        for path in paths:
+            still_referenced = await db.execute(select(Event.event_id).where(Event.media_url == path).limit(1))
+            if still_referenced.first():
+                continue
+            freed += await storage_service.delete_file(path)
+            await asyncio.sleep(self.io_pause)
+        return len(events), freed
+
+    async def _compress(self, db: AsyncSession, limit: int) -> tuple[int, int]:
+        """Re-encode processed WAV audio to FLAC."""
+        query = select(Event.media_url).where(
+            Event.media_url.like("%.wav"),
+            Event.is_processed == True,
+        ).group_by(Event.media_url).order_by(func.min(Event.event_id)).limit(limit)
+        result = await db.execute(query)
+
+        compressed = freed = 0
+        for wav_url in result.scalars().all():
+            try:
+                flac_url, flac_size = await self._encode_flac(wav_url)
+            except Exception as e:
+                logger.warning(f"Could not compress {wav_url}: {e}")
+                flac_url = None
+            await asyncio.sleep(self.io_pause)
+            if flac_url is None:
+                continue
+
+            events_result = await db.execute(select(Event).where(Event.media_url == wav_url))
+            for event in events_result.scalars().all():
+                raw_data = dict(event.raw_data or {})
+                raw_data["file_path"] = flac_url
+                raw_data["size_bytes"] = flac_size
+                raw_data["compressed_from"] = "wav"
+                event.raw_data = raw_data
+                event.media_url = flac_url
+            try:
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                await storage_service.delete_file(flac_url)
+                raise
+
+            freed += await storage_service.delete_file(wav_url) - flac_size
+            compressed += 1
+        return compressed, freed
+
+    async def _encode_flac(self, wav_url: str) -> tuple[Optional[str], int]:
+        """
+        Re-encode a stored WAV file to FLAC and store it next to the original.
+
+        Returns:
+            (FLAC media URL, FLAC size), or (None, 0) if the file is missing
+            or its sample format cannot be stored in FLAC (e.g. float WAV)
+        """
+        flac_key = str(Path(storage_service.key_for(wav_url)).with_suffix(".flac").as_posix())
+        flac_tmp = storage_service.incoming_path / f"{uuid.uuid4().hex}.flac"
+        try:
+            async with storage_service.local_copy(wav_url) as wav_path:
+                encoded = await asyncio.to_thread(_encode_flac, wav_path, flac_tmp)
+            if not encoded:
+                return None, 0
+            flac_size = flac_tmp.stat().st_size
+            return await storage_service.store_local_file(flac_tmp, flac_key), flac_size
+        finally:
+            flac_tmp.unlink(missing_ok=True)
+
+
+def _encode_flac(wav_path: Path, flac_path: Path) -> bool:
+    """
+    Losslessly re-encode a WAV file to FLAC.
+
+    Returns:
+        False if the file is missing or its sample format cannot be stored
+        in FLAC (e.g. float WAV), True otherwise
+    """
+    if not wav_path.exists():
+        return False
+    info = sf.info(str(wav_path))
+    subtype = _FLAC_SUBTYPES.get(info.subtype)
+    if subtype is None:
+        return False
+
+    with sf.SoundFile(str(flac_path), "w", samplerate=info.samplerate, channels=info.channels,
+                      format="FLAC", subtype=subtype) as out:
+        for block in sf.blocks(str(wav_path), blocksize=_ENCODE_BLOCK_FRAMES, dtype="int32", always_2d=True):
+            out.write(block)
+    return True
+
+
+def _has_alert():
+    """
+    Correlated EXISTS for alerts raised on an event.
+
+    Alerts are never older than their event; the created_at bound lets the
+    planner skip alert partitions of earlier months.
+    """
+    return exists().where(Alert.event_id == Event.event_id, Alert.created_at >= Event.created_at)
+
+
+def _parse_overrides(raw: Optional[str]) -> dict[int, dict]:
+    """Parse RETENTION_TENANT_OVERRIDES, e.g. '{"1": {"quota_mb": 500, "max_age_days": 30}}'."""
+    if not raw:
+        return {}
+    try:
+        return {int(tenant_id): policy for tenant_id, policy in json.loads(raw).items()}
+    except (ValueError, AttributeError) as e:
+        logger.error(f"Ignoring invalid RETENTION_TENANT_OVERRIDES: {e}")
+        return {}
+
+
+# Global instance
+retention_service = RetentionService()
@@ -0,0 +1,438 @@
+"""Activity rollups: per-device hourly and daily totals maintained incrementally."""
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import event, func, inspect, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.alert import Alert
+from app.models.event import Event
+from app.models.rollup import ActivityRollupDaily, ActivityRollupHourly
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding rollup changes flushed but not yet committed
+PENDING_CHANGES_KEY = "rollup_changes"
+
+# Rollup tables by granularity, with their bucket length
+ROLLUPS = {
+    "hour": (ActivityRollupHourly, timedelta(hours=1)),
+    "day": (ActivityRollupDaily, timedelta(days=1)),
+}
+
+# {key: count} columns, merged key by key
+COUNT_COLUMNS = ("event_labels", "alert_severities", "alert_statuses")
+# Columns derived from events and alerts (recomputed by rebuild); heartbeat columns are not
+EVENT_ALERT_COLUMNS = (
+    "event_count", "event_labels", "score_sum",
+    "alert_count", "alert_severities", "alert_statuses", "confidence_sum", "confidence_count",
+)
+HEARTBEAT_COLUMNS = ("heartbeat_count", "online_seconds")
+
+# Max rows per INSERT ... ON CONFLICT statement (13 parameters each)
+_BATCH_SIZE = 1000
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """Start of the UTC hour or day containing a time."""
+    at = at.astimezone(timezone.utc)
+    if granularity == "day":
+        return datetime(at.year, at.month, at.day, tzinfo=timezone.utc)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class RollupDelta:
+    """Changes to one device's rollup row."""
+    house_id: int
+    event_count: int = 0
+    event_labels: Counter = field(default_factory=Counter)
+    score_sum: float = 0.0
+    alert_count: int = 0
+    alert_severities: Counter = field(default_factory=Counter)
+    alert_statuses: Counter = field(default_factory=Counter)
+    confidence_sum: float = 0.0
+    confidence_count: int = 0
+    heartbeat_count: int = 0
+    online_seconds: float = 0.0
+
+    @classmethod
+    def from_row(cls, row) -> "RollupDelta":
+        """Read a stored rollup row as a delta."""
+        delta = cls(house_id=row.house_id)
+        for name in EVENT_ALERT_COLUMNS + HEARTBEAT_COLUMNS:
+            value = getattr(row, name)
+            setattr(delta, name, Counter(value) if name in COUNT_COLUMNS else value)
+        return delta
+
+    def merge(self, other: "RollupDelta"):
+        """Add another delta to this one."""
+        for name in EVENT_ALERT_COLUMNS + HEARTBEAT_COLUMNS:
+            if name in COUNT_COLUMNS:
+                getattr(self, name).update(getattr(other, name))
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def row(self, device_id: int, bucket: datetime) -> dict:
+        """Values for an INSERT into a rollup table."""
+        values = {"device_id": device_id, "bucket_start": bucket, "house_id": self.house_id}
+        for name in EVENT_ALERT_COLUMNS + HEARTBEAT_COLUMNS:
+            value = getattr(self, name)
+            values[name] = {key: count for key, count in value.items() if count} if name in COUNT_COLUMNS else value
+        return values
+
+
+class RollupService:
+    """
+    Hourly and daily activity rollups per device.
+
+    Committed changes (events labelled by inference, alerts created or
+    changing status) and heartbeats are added to in-memory deltas keyed by
+    device and hour, and written every ROLLUP_FLUSH_INTERVAL_SECONDS as one
+    INSERT ... ON CONFLICT DO UPDATE per table that adds them to the stored
+    rows. Deltas are additive, so several processes can write the same
+    rows. rebuild() recomputes the event and alert columns of a time range
+    from the source tables; heartbeat columns cannot be rebuilt.
+    """
+
+    def __init__(self):
+        """Initialize the rollup service."""
+        self.flush_interval = settings.rollup_flush_interval_seconds
+        self.catchup_hours = settings.rollup_catchup_hours
+        self._pending: dict[tuple[int, datetime], RollupDelta] = {}  # (device_id, hour) -> delta
+        self._last_heartbeat: dict[int, float] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    def apply(self, changes: list[tuple]):
+        """
+        Add committed changes to the pending deltas.
+
+        Args:
+            changes: Tuples collected by the session listeners below:
+                ("event", device_id, house_id, created_at, label, score),
+                ("alert", device_id, house_id, created_at, severity, status, confidence) or
+                ("alert_status", device_id, house_id, created_at, old_status, new_status)
+        """
+        for kind, device_id, house_id, created_at, *values in changes:
+            delta = self._delta(device_id, house_id, created_at)
+            if kind == "event":
+                label, score = values
+                delta.event_count += 1
+                delta.event_labels[label] += 1
+                delta.score_sum += score or 0.0
+            elif kind == "alert":
+                severity, status, confidence = values
+                delta.alert_count += 1
+                delta.alert_severities[severity] += 1
+                delta.alert_statuses[status] += 1
+                if confidence is not None:
+                    delta.confidence_sum += confidence
+                    delta.confidence_count += 1
+            else:
+                old_status, new_status = values
+                delta.alert_statuses[old_status] -= 1
+                delta.alert_statuses[new_status] += 1
+
+    def record_heartbeat(self, device_id: int, house_id: int, seen_at: datetime, timeout_seconds: float):
+        """
+        Count a heartbeat and the online time it covers.
+
+        The time since the device's previous heartbeat counts as online, up
+        to the offline timeout (a longer gap means the device was offline).
+        The first heartbeat seen by this process covers no time.
+
+        Args:
+            device_id: ID of the device
+            house_id: House of the device
+            seen_at: Time of the heartbeat (timezone-aware)
+            timeout_seconds: Silence after which the device is considered offline
+        """
+        seen = seen_at.timestamp()
+        previous = self._last_heartbeat.get(device_id)
+        if previous is None or seen > previous:
+            self._last_heartbeat[device_id] = seen
+
+        delta = self._delta(device_id, house_id, seen_at)
+        delta.heartbeat_count += 1
+        if previous is not None and seen > previous:
+            delta.online_seconds += min(seen - previous, timeout_seconds)
+
+    async def start(self):
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="rollup-flush")
+
+    async def stop(self):
+        """Stop the flush task and write what is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Final rollup flush failed: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Add the pending deltas to the hourly and daily rollup tables.
+
+        If the write fails, the deltas are merged back and retried on the
+        next flush.
+
+        Returns:
+            Number of rollup rows written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+            written = 0
+            try:
+                async with AsyncSessionLocal() as session:
+                    for granularity, (model, _) in ROLLUPS.items():
+                        rows = [delta.row(device_id, bucket) for (device_id, bucket), delta in _regroup(pending, granularity).items()]
+                        written += await _upsert(session, model, rows, EVENT_ALERT_COLUMNS + HEARTBEAT_COLUMNS, accumulate=True)
+                    await session.commit()
+            except Exception:
+                for key, delta in pending.items():
+                    self._pending.setdefault(key, RollupDelta(house_id=delta.house_id)).merge(delta)
+                raise
+
+            self.flushes += 1
+            self.rows_flushed += written
+            return written
+
+    async def rebuild(self, db: AsyncSession, start: datetime, end: datetime) -> int:
+        """
+        Recompute the event and alert columns of a time range from the source tables.
+
+        The hourly rows of [start, end) (widened to whole hours) are
+        recomputed from events and alerts, then the daily rows of the days
+        they fall in are recomputed from the hourly rows. Pending deltas are
+        flushed first. Changes committed by other processes while this runs
+        can be counted twice, so rebuild closed periods or run it before
+        serving traffic. The caller commits.
+
+        Args:
+            db: Database session
+            start: Start of the range
+            end: End of the range (exclusive)
+
+        Returns:
+            Number of hourly rows recomputed
+        """
+        await self.flush()
+        start = bucket_start(start, "hour")
+        end = bucket_start(end - timedelta(microseconds=1), "hour") + ROLLUPS["hour"][1]
+
+        # Reset the range, then fill it from events and alerts
+        await db.execute(
+            update(ActivityRollupHourly).where(
+                ActivityRollupHourly.bucket_start >= start,
+                ActivityRollupHourly.bucket_start < end,
+            ).values(_zero_values(EVENT_ALERT_COLUMNS))
+        )
+
+        hourly: dict[tuple[int, datetime], RollupDelta] = {}
+
+        def delta_for(device_id: int, house_id: int, bucket: datetime) -> RollupDelta:
+            return hourly.setdefault((device_id, bucket), RollupDelta(house_id=house_id))
+
+        event_bucket = func.date_trunc("hour", Event.created_at, "UTC").label("bucket")
+        result = await db.execute(
+            select(
+                event_bucket, Event.device_id, Event.house_id, Event.inference_label,
+                func.count(), func.coalesce(func.sum(Event.inference_score), 0.0),
+            ).where(
+                Event.created_at >= start,
+                Event.created_at < end,
+                Event.inference_label.is_not(None),
+            ).group_by(event_bucket, Event.device_id, Event.house_id, Event.inference_label)
+        )
+        for bucket, device_id, house_id, label, count, score_sum in result.all():
+            delta = delta_for(device_id, house_id, bucket)
+            delta.event_count += count
+            delta.event_labels[label] += count
+            delta.score_sum += score_sum
+
+        alert_bucket = func.date_trunc("hour", Alert.created_at, "UTC").label("bucket")
+        result = await db.execute(
+            select(
+                alert_bucket, Alert.device_id, Alert.house_id, Alert.severity, Alert.status,
+                func.count(), func.coalesce(func.sum(Alert.confidence_score), 0), func.count(Alert.confidence_score),
+            ).where(
+                Alert.created_at >= start,
+                Alert.created_at < end,
+            ).group_by(alert_bucket, Alert.device_id, Alert.house_id, Alert.severity, Alert.status)
+        )
+        for bucket, device_id, house_id, severity, status, count, confidence_sum, confidence_count in result.all():
+            delta = delta_for(device_id, house_id, bucket)
+            delta.alert_count += count
+            delta.alert_severities[severity] += count
+            delta.alert_statuses[status] += count
+            delta.confidence_sum += float(confidence_sum)
+            delta.confidence_count += confidence_count
+
+        rows = [delta.row(device_id, bucket) for (device_id, bucket), delta in hourly.items()]
+        await _upsert(db, ActivityRollupHourly, rows, EVENT_ALERT_COLUMNS, accumulate=False)
+
+        # Days overlapping the range, from their hourly rows
+        day_start = bucket_start(start, "day")
+        day_end = bucket_start(end - timedelta(microseconds=1), "day") + ROLLUPS["day"][1]
+        result = await db.execute(
+            select(ActivityRollupHourly).where(
+                ActivityRollupHourly.bucket_start >= day_start,
+                ActivityRollupHourly.bucket_start < day_end,
+            )
+        )
+        daily: dict[tuple[int, datetime], RollupDelta] = {}
+        for row in result.scalars().all():
+            daily.setdefault(
+                (row.device_id, bucket_start(row.bucket_start, "day")), RollupDelta(house_id=row.house_id)
+            ).merge(RollupDelta.from_row(row))
+        rows = [delta.row(device_id, bucket) for (device_id, bucket), delta in daily.items()]
+        await _upsert(db, ActivityRollupDaily, rows, EVENT_ALERT_COLUMNS + HEARTBEAT_COLUMNS, accumulate=False)
+
+        logger.info(f"Rebuilt {len(hourly)} hourly rollups from {start.isoformat()} to {end.isoformat()}")
+        return len(hourly)
+
+    def stats(self) -> dict:
+        """Get rollup statistics."""
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+        }
+
+    def _delta(self, device_id: int, house_id: int, at: Optional[datetime]) -> RollupDelta:
+        bucket = bucket_start(at or datetime.now(timezone.utc), "hour")
+        return self._pending.setdefault((device_id, bucket), RollupDelta(house_id=house_id))
+
+    async def _loop(self):
+        """Flush pending deltas until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Rollup flush failed: {e}", exc_info=True)
+
+
+def _regroup(deltas: dict[tuple[int, datetime], RollupDelta], granularity: str) -> dict:
+    """Merge hourly deltas into deltas of the given granularity."""
+    if granularity == "hour":
+        return deltas
+    merged: dict[tuple[int, datetime], RollupDelta] = {}
+    for (device_id, hour), delta in deltas.items():
+        merged.setdefault((device_id, bucket_start(hour, granularity)), RollupDelta(house_id=delta.house_id)).merge(delta)
+    return merged
+
+
+def _zero_values(columns: tuple) -> dict:
+    return {name: {} if name in COUNT_COLUMNS else 0 for name in columns}
+
+
+def _merge_counts(table: str, column: str):
+    """SQL adding the {key: count} map being inserted to the stored one, dropping zero counts."""
+    return text(
+        f"(SELECT coalesce(jsonb_object_agg(key, total), '{{}}'::jsonb) FROM ("
+        f"SELECT key, sum(value::numeric) AS total FROM ("
+        f"SELECT * FROM jsonb_each_text({table}.{column}) "
+        f"UNION ALL SELECT * FROM jsonb_each_text(excluded.{column})"
+        f") counts GROUP BY key HAVING sum(value::numeric) <> 0) totals)"
+    )
+
+
+async def _upsert(db: AsyncSession, model, rows: list[dict], columns: tuple, accumulate: bool) -> int:
+    """
+    Insert rollup rows, adding to (accumulate) or replacing the given columns of existing rows.
+
+    Returns:
+        Number of rows written
+    """
+    table = model.__table__
+    for start in range(0, len(rows), _BATCH_SIZE):
+        stmt = insert(model).values(rows[start:start + _BATCH_SIZE])
+        set_ = {"house_id": stmt.excluded.house_id}
+        for name in columns:
+            if not accumulate:
+                set_[name] = stmt.excluded[name]
+            elif name in COUNT_COLUMNS:
+                set_[name] = _merge_counts(table.name, name)
+            else:
+                set_[name] = table.c[name] + stmt.excluded[name]
+        await db.execute(stmt.on_conflict_do_update(index_elements=["device_id", "bucket_start"], set_=set_))
+    return len(rows)
+
+
+def _rollup_change(obj, created: bool = False) -> Optional[tuple]:
+    """Describe how a flushed Event or Alert changes the rollups, if at all."""
+    if not isinstance(obj, (Event, Alert)):
+        return None
+    state = inspect(obj)
+    values = state.dict
+    key = (values.get("device_id"), values.get("house_id"), values.get("created_at"))
+
+    if isinstance(obj, Event):
+        # Counted once, when inference first labels the event
+        history = state.attrs.inference_label.history
+        if created:
+            label = values.get("inference_label")
+        elif history.added and not any(value is not None for value in history.deleted):
+            label = history.added[0]
+        else:
+            return None
+        if label is None:
+            return None
+        return ("event", *key, label, values.get("inference_score"))
+
+    if created:
+        confidence = values.get("confidence_score")
+        return (
+            "alert", *key, values.get("severity"), values.get("status"),
+            float(confidence) if confidence is not None else None,
+        )
+    history = state.attrs.status.history
+    if not history.deleted or not history.added:
+        return None
+    return ("alert_status", *key, history.deleted[0], history.added[0])
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    """Remember rollup changes of this flush until the transaction commits."""
+    changes = [
+        change for change in (
+            *(_rollup_change(obj, created=True) for obj in session.new),
+            *(_rollup_change(obj) for obj in session.dirty),
+        ) if change
+    ]
+    if changes:
+        session.info.setdefault(PENDING_CHANGES_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop(PENDING_CHANGES_KEY, None)
+    if changes:
+        rollup_service.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(PENDING_CHANGES_KEY, None)
+
+
+# Global instance
+rollup_service = RollupService()
@@ -1,77 +1,282 @@
 """Storage service for file management."""
+import asyncio
+import hashlib
 import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
+from fastapi import UploadFile
 from app.config import settings
+from app.services.storage_backends import (
+    S3_SCHEME,
+    LocalStorageBackend,
+    StorageBackend,
+    create_backend,
+)
 import uuid
-import shutil
 
 logger = logging.getLogger(__name__)
 
 
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredFile:
+    """A file written to storage from an upload."""
+    path: str
+    size_bytes: int
+    sha256: str
+
+
+async def stream_upload_to_path(upload: UploadFile, destination: Path, max_bytes: Optional[int] = None) -> StoredFile:
+    """
+    Stream an upload to a file in fixed-size chunks.
+
+    Only one chunk is held in memory at a time; disk writes run in a worker
+    thread. The size limit is checked as bytes arrive and the SHA-256 of
+    the content is computed on the way through. On any error, including
+    the size limit, the partial file is removed.
+
+    Args:
+        upload: Uploaded file
+        destination: Path of the file to write
+        max_bytes: Maximum accepted size (defaults to settings.max_upload_bytes)
+
+    Returns:
+        The written file with its size and content hash
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_bytes
+    """
+    max_bytes = settings.max_upload_bytes if max_bytes is None else max_bytes
+    chunk_size = settings.upload_chunk_size_bytes
+    digest = hashlib.sha256()
+    size = 0
+
+    f = await asyncio.to_thread(open, destination, "wb")
+    try:
+        while chunk := await upload.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        f.close()
+        destination.unlink(missing_ok=True)
+        raise
+    f.close()
+
+    return StoredFile(path=str(destination), size_bytes=size, sha256=digest.hexdigest())
+
+
 class StorageService:
-    """Service for managing file storage."""
+    """
+    Service for managing file storage.
+    
+    Audio files are laid out according to settings.storage_layout:
+    - "sharded": {house_id}/{device_id}/{YYYY}/{MM}/{DD}/{uuid}.wav
+    - "content": objects/{sha[:2]}/{sha[2:4]}/{sha}.wav, so identical
+      uploads are stored once and shared by their events
+    
+    Uploads are streamed to a local file under .incoming/ and handed to
+    the storage backend once complete (settings.storage_backend): the
+    local filesystem, or an S3-compatible object store so that several
+    API and inference nodes share the same media. Media URLs are absolute
+    paths for local files and s3://bucket/key for objects; files stored
+    under a previous backend stay readable.
+    """
+    
+    LAYOUTS = ("sharded", "content")
     
     def __init__(self):
         """Initialize storage service."""
         self.storage_path = Path(settings.storage_path)
-        self.storage_path.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Storage initialized at {self.storage_path}")
+        self.layout = settings.storage_layout
+        if self.layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown storage layout '{self.layout}', expected one of {self.LAYOUTS}")
+        self.incoming_path = self.storage_path / ".incoming"
+        self.incoming_path.mkdir(parents=True, exist_ok=True)
+        self.local = LocalStorageBackend(self.storage_path)
+        self.backend = self.local if settings.storage_backend == "local" else create_backend(
+            settings.storage_backend, self.storage_path
+        )
+        logger.info(f"Storage initialized at {self.storage_path} ({self.layout} layout, {self.backend.name} backend)")
+    
+    async def start(self):
+        """Connect the storage backend."""
+        await self.backend.start()
+    
+    async def stop(self):
+        """Disconnect the storage backend."""
+        await self.backend.stop()
+    
+    def audio_key_for(
+        self,
+        house_id: str,
+        device_id: str,
+        sha256: str,
+        created_at: Optional[datetime] = None,
+        suffix: str = ".wav",
+    ) -> str:
+        """
+        Get the storage key of an audio file under the configured layout.
+        
+        Args:
+            house_id: ID of the house
+            device_id: ID of the device
+            sha256: SHA-256 of the file content
+            created_at: Time the file was received (defaults to now)
+            suffix: File extension
+            
+        Returns:
+            Relative key (POSIX separators)
+        """
+        if self.layout == "content":
+            return f"objects/{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}"
+        
+        day = (created_at or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        return f"{house_id}/{device_id}/{day:%Y/%m/%d}/{uuid.uuid4().hex}{suffix}"
     
-    def save_audio_file(self, file_content: bytes, house_id: str, device_id: str) -> str:
+    def audio_path_for(
+        self,
+        house_id: str,
+        device_id: str,
+        sha256: str,
+        created_at: Optional[datetime] = None,
+    ) -> Path:
         """
-        Save an audio file to storage.
+        Get the local path of an audio file under the configured layout.
         
         Args:
-            file_content: Binary content of the audio file
             house_id: ID of the house
             device_id: ID of the device
+            sha256: SHA-256 of the file content
+            created_at: Time the file was received (defaults to now)
             
         Returns:
-            Path to the saved file (relative to storage root)
+            Absolute Path for the file in local storage
         """
-        # Store audio file under storage/audio
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+        return self.storage_path / self.audio_key_for(house_id, device_id, sha256, created_at)
+    
+    async def save_audio_upload(self, upload: UploadFile, house_id: str, device_id: str) -> StoredFile:
+        """
+        Stream an uploaded audio file to storage without buffering it in memory.
         
-        # Generate unique filename
-        filename = f"{uuid.uuid4().hex}.wav"  # Assuming WAV format, adjust as needed
-        file_path = self.storage_path / filename
+        Args:
+            upload: Uploaded audio file
+            house_id: ID of the house
+            device_id: ID of the device
         
-        # Write file
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        Returns:
+            The stored file (media URL, size and SHA-256)
         
-        # Return relative path for database storage
-        relative_path = str(file_path.relative_to(self.storage_path))
-        logger.info(f"Saved audio file: {relative_path}")
+        Raises:
+            UploadTooLargeError: If the upload exceeds settings.max_upload_bytes
+        """
+        self.incoming_path.mkdir(parents=True, exist_ok=True)
+        part_path = self.incoming_path / f"{uuid.uuid4().hex}.part"
+        
+        stored = await stream_upload_to_path(upload, part_path)
+        key = self.audio_key_for(house_id, device_id, stored.sha256)
+        stored.path, deduplicated = await self.backend.put_file(
+            part_path, key, deduplicate=self.layout == "content"
+        )
         
-        return str(file_path)  # Return absolute path for inference service
+        logger.info(
+            f"Saved audio file: {key} ({stored.size_bytes} bytes"
+            + (", deduplicated)" if deduplicated else ")")
+        )
+        return stored
     
-    def get_file_path(self, relative_path: str) -> Path:
+    async def store_local_file(self, source: Path, key: str) -> str:
         """
-        Get absolute path for a stored file.
+        Move a complete local file into storage under a key.
         
         Args:
-            relative_path: Relative path stored in database
+            source: Local file (consumed)
+            key: Storage key
             
         Returns:
-            Absolute Path object
+            Media URL of the stored file
         """
-        return self.storage_path / relative_path
+        url, _ = await self.backend.put_file(source, key, deduplicate=self.layout == "content")
+        return url
+    
+    async def delete_file(self, url: str) -> int:
+        """
+        Delete a stored file if it exists.
+        
+        Args:
+            url: Media URL of the file
+            
+        Returns:
+            Bytes freed
+        """
+        return await self._backend_for(url).delete(url)
     
-    def file_exists(self, file_path: str) -> bool:
+    async def file_exists(self, url: str) -> bool:
         """
-        Check if a file exists.
+        Check if a stored file exists.
         
         Args:
-            file_path: Path to check
+            url: Media URL of the file
             
         Returns:
             True if file exists, False otherwise
         """
-        return Path(file_path).exists()
+        return await self._backend_for(url).exists(url)
+    
+    def local_copy(self, url: str):
+        """
+        Get a local file for a media URL (async context manager yielding a Path).
+        
+        Remote objects are downloaded to a temporary file removed on exit.
+        
+        Args:
+            url: Media URL of the file
+        """
+        return self._backend_for(url).local_copy(url)
+    
+    def key_for(self, url: str) -> str:
+        """
+        Get the storage key of a media URL.
+        
+        Args:
+            url: Media URL of the file
+            
+        Returns:
+            Relative key
+        """
+        return self._backend_for(url).key_for(url)
+    
+    def get_file_path(self, relative_path: str) -> Path:
+        """
+        Get absolute path for a stored file.
+        
+        Args:
+            relative_path: Relative path stored in database
+            
+        Returns:
+            Absolute Path object
+        """
+        return self.storage_path / relative_path
+    
+    def _backend_for(self, url: str) -> StorageBackend:
+        """Pick the backend that owns a media URL (local paths predate remote backends)."""
+        if url.startswith(S3_SCHEME):
+            if self.backend.name != "s3":
+                raise RuntimeError(f"{url} is stored in S3 but STORAGE_BACKEND is '{self.backend.name}'")
+            return self.backend
+        return self.local
 
 
 # Global instance
 storage_service = StorageService()
-
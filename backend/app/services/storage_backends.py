@@ -0,0 +1,305 @@
+"""Storage backends: where audio files live once they are complete."""
+import asyncio
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from app.config import settings
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # Optional dependency, only needed for STORAGE_BACKEND=s3
+    AioConfig = None
+    get_session = None
+
+logger = logging.getLogger(__name__)
+
+S3_SCHEME = "s3://"
+
+
+class StorageBackend(ABC):
+    """
+    Interface for storing complete audio files under a relative key.
+
+    Files are first written locally (streamed from the upload) and then
+    handed to the backend, which returns the media URL stored on the event.
+    """
+
+    name: str
+
+    async def start(self):
+        """Open connections or other resources."""
+
+    async def stop(self):
+        """Release connections or other resources."""
+
+    @abstractmethod
+    async def put_file(self, source: Path, key: str, deduplicate: bool = False) -> tuple[str, bool]:
+        """
+        Move a complete local file into the backend.
+
+        The local source file is consumed (moved or deleted).
+
+        Args:
+            source: Local file to store
+            key: Relative key (e.g. "1/2/2024/01/15/abc.wav")
+            deduplicate: Keep an existing object with the same key instead of overwriting
+                it (used by content-addressed keys)
+
+        Returns:
+            (media URL, whether an existing object was reused)
+        """
+
+    @abstractmethod
+    async def delete(self, url: str) -> int:
+        """
+        Delete a stored file if it exists.
+
+        Args:
+            url: Media URL returned by put_file
+
+        Returns:
+            Bytes freed (0 if the file did not exist)
+        """
+
+    @abstractmethod
+    async def exists(self, url: str) -> bool:
+        """Whether a stored file exists."""
+
+    @abstractmethod
+    def local_copy(self, url: str):
+        """
+        Async context manager yielding a local Path with the file's content.
+
+        Local files are yielded in place; remote objects are downloaded to
+        a temporary file that is removed on exit.
+        """
+
+    @abstractmethod
+    def key_for(self, url: str) -> str:
+        """Get the relative key of a media URL."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """Files on the local filesystem; the media URL is the absolute path."""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        """
+        Initialize the local backend.
+
+        Args:
+            root: Storage root directory
+        """
+        self.root = root
+
+    async def put_file(self, source: Path, key: str, deduplicate: bool = False) -> tuple[str, bool]:
+        destination = self.root / key
+        return str(destination), await asyncio.to_thread(_place_file, source, destination, deduplicate)
+
+    async def delete(self, url: str) -> int:
+        return await asyncio.to_thread(_unlink, url)
+
+    async def exists(self, url: str) -> bool:
+        return Path(url).exists()
+
+    @asynccontextmanager
+    async def local_copy(self, url: str) -> AsyncIterator[Path]:
+        yield Path(url)
+
+    def key_for(self, url: str) -> str:
+        return Path(url).relative_to(self.root).as_posix()
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Objects in an S3-compatible store (AWS S3, MinIO, Ceph RGW, ...).
+
+    One long-lived client with a connection pool is shared by all requests.
+    Files above the multipart threshold are uploaded in parallel parts read
+    from disk, so memory use is bounded by part size × concurrency. Media
+    URLs have the form s3://{bucket}/{key}.
+    """
+
+    name = "s3"
+
+    def __init__(self):
+        """Initialize the S3 backend from settings."""
+        if get_session is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the aiobotocore package (pip install -r requirements-s3.txt)")
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        self.bucket = settings.s3_bucket
+        self.multipart_threshold = settings.s3_multipart_threshold_bytes
+        # S3 rejects parts smaller than 5 MiB (except the last one)
+        self.part_size = max(settings.s3_multipart_part_bytes, 5 * 1024 * 1024)
+        self.part_concurrency = settings.s3_multipart_concurrency
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client = None
+        self._client_lock = asyncio.Lock()
+
+    async def start(self):
+        await self._get_client()
+        logger.info(f"S3 storage backend connected (bucket {self.bucket}, endpoint {settings.s3_endpoint_url or 'AWS'})")
+
+    async def stop(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._client = None
+
+    async def put_file(self, source: Path, key: str, deduplicate: bool = False) -> tuple[str, bool]:
+        url = f"{S3_SCHEME}{self.bucket}/{key}"
+        try:
+            if deduplicate and await self._head(key) is not None:
+                return url, True
+            if source.stat().st_size > self.multipart_threshold:
+                await self._multipart_upload(source, key)
+            else:
+                client = await self._get_client()
+                body = await asyncio.to_thread(source.read_bytes)
+                await client.put_object(Bucket=self.bucket, Key=key, Body=body)
+            return url, False
+        finally:
+            source.unlink(missing_ok=True)
+
+    async def delete(self, url: str) -> int:
+        key = self.key_for(url)
+        head = await self._head(key)
+        if head is None:
+            return 0
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+        return head["ContentLength"]
+
+    async def exists(self, url: str) -> bool:
+        return await self._head(self.key_for(url)) is not None
+
+    @asynccontextmanager
+    async def local_copy(self, url: str) -> AsyncIterator[Path]:
+        key = self.key_for(url)
+        fd, tmp_name = tempfile.mkstemp(suffix=Path(key).suffix)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            client = await self._get_client()
+            response = await client.get_object(Bucket=self.bucket, Key=key)
+            body = response["Body"]
+            with open(tmp_path, "wb") as f:
+                async with body:
+                    while chunk := await body.read(settings.upload_chunk_size_bytes):
+                        await asyncio.to_thread(f.write, chunk)
+            yield tmp_path
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def key_for(self, url: str) -> str:
+        prefix = f"{S3_SCHEME}{self.bucket}/"
+        if not url.startswith(prefix):
+            raise ValueError(f"{url} is not in bucket {self.bucket}")
+        return url[len(prefix):]
+
+    async def _get_client(self):
+        """Create the shared client on first use."""
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                session = get_session()
+                self._exit_stack = AsyncExitStack()
+                self._client = await self._exit_stack.enter_async_context(session.create_client(
+                    "s3",
+                    endpoint_url=settings.s3_endpoint_url,
+                    region_name=settings.s3_region,
+                    aws_access_key_id=settings.s3_access_key_id,
+                    aws_secret_access_key=settings.s3_secret_access_key,
+                    config=AioConfig(max_pool_connections=settings.s3_max_pool_connections),
+                ))
+        return self._client
+
+    async def _head(self, key: str) -> Optional[dict]:
+        """Get object metadata, or None if the object does not exist."""
+        client = await self._get_client()
+        try:
+            return await client.head_object(Bucket=self.bucket, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def _multipart_upload(self, source: Path, key: str):
+        """Upload a file in parts read from disk, aborting the upload on failure."""
+        client = await self._get_client()
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = upload["UploadId"]
+        size = source.stat().st_size
+        offsets = range(0, size, self.part_size)
+        semaphore = asyncio.Semaphore(self.part_concurrency)
+
+        async def upload_part(number: int, offset: int) -> dict:
+            async with semaphore:
+                body = await asyncio.to_thread(_read_range, source, offset, self.part_size)
+                part = await client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+                )
+                return {"PartNumber": number, "ETag": part["ETag"]}
+
+        try:
+            parts = await asyncio.gather(*(upload_part(i + 1, offset) for i, offset in enumerate(offsets)))
+            await client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": list(parts)}
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+
+def create_backend(name: str, root: Path) -> StorageBackend:
+    """
+    Create the storage backend selected by STORAGE_BACKEND.
+
+    Args:
+        name: "local" or "s3"
+        root: Local storage root (used by the local backend)
+
+    Returns:
+        The storage backend
+    """
+    if name == "local":
+        return LocalStorageBackend(root)
+    if name == "s3":
+        return S3StorageBackend()
+    raise ValueError(f"Unknown storage backend '{name}', expected 'local' or 's3'")
+
+
+def _place_file(source: Path, destination: Path, deduplicate: bool) -> bool:
+    """Move a file into place; with deduplicate, keep an existing destination instead."""
+    if deduplicate and destination.exists():
+        source.unlink(missing_ok=True)
+        return True
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, destination)
+    return False
+
+
+def _unlink(path: str) -> int:
+    """Delete a file and return the bytes freed."""
+    file_path = Path(path)
+    try:
+        size = file_path.stat().st_size
+        file_path.unlink()
+        return size
+    except FileNotFoundError:
+        return 0
+
+
+def _read_range(path: Path, offset: int, length: int) -> bytes:
+    """Read one part of a file."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
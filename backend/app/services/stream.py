@@ -0,0 +1,189 @@
+"""In-process publish/subscribe of alert and device changes for server-push clients."""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding messages to publish once the transaction commits
+PENDING_MESSAGES_KEY = "stream_pending_messages"
+
+
+@dataclass(frozen=True)
+class StreamMessage:
+    """One change pushed to subscribers."""
+    id: int
+    event: str  # alert_created, alert_status_changed, device_status_changed
+    house_id: int
+    data: dict
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A connected client and the messages waiting to be sent to it."""
+    house_ids: Optional[frozenset]  # None = all houses
+    queue: asyncio.Queue
+    overflowed: bool = False  # Set when the client fell too far behind and was dropped
+    replay: list = field(default_factory=list)
+
+    def wants(self, message: StreamMessage) -> bool:
+        return self.house_ids is None or message.house_id in self.house_ids
+
+
+class StreamBroker:
+    """
+    Fan-out of alert and device changes to subscribers, filtered per house.
+
+    Every message gets an increasing id and is kept in a bounded replay
+    buffer, so a client that reconnects with the last id it saw receives
+    what it missed instead of reloading everything. Each subscriber has a
+    bounded queue; a client that falls behind is dropped and told to
+    reload rather than holding memory for it. Ids and the buffer are per
+    process.
+    """
+
+    def __init__(self):
+        """Initialize the broker."""
+        self._next_id = 1
+        self._buffer: deque[StreamMessage] = deque(maxlen=settings.stream_replay_buffer_size)
+        self._subscribers: set[Subscription] = set()
+        self.published_total = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, house_ids: Optional[Iterable[int]] = None, last_event_id: Optional[int] = None) -> tuple[Subscription, bool]:
+        """
+        Register a subscriber.
+
+        Args:
+            house_ids: Houses to receive changes for (None = all)
+            last_event_id: Id of the last message the client received, to resume after it
+
+        Returns:
+            (subscription, whether the resume was complete). The resume is
+            incomplete when messages after last_event_id have left the replay
+            buffer; the client should then reload its state.
+        """
+        subscription = Subscription(
+            house_ids=frozenset(house_ids) if house_ids else None,
+            queue=asyncio.Queue(maxsize=settings.stream_client_queue_size),
+        )
+        resumed = True
+        if last_event_id is not None:
+            oldest = self._buffer[0].id if self._buffer else self._next_id
+            resumed = last_event_id >= oldest - 1 and last_event_id < self._next_id
+            if resumed:
+                subscription.replay = [
+                    message for message in self._buffer
+                    if message.id > last_event_id and subscription.wants(message)
+                ]
+        self._subscribers.add(subscription)
+        return subscription, resumed
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber."""
+        self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, house_id: int, data: dict) -> StreamMessage:
+        """
+        Publish a change to every subscriber of its house.
+
+        Never blocks: a subscriber whose queue is full is dropped.
+
+        Args:
+            event_type: Message type
+            house_id: House the change belongs to
+            data: JSON-serializable payload
+
+        Returns:
+            The published message
+        """
+        message = StreamMessage(id=self._next_id, event=event_type, house_id=house_id, data=data)
+        self._next_id += 1
+        self._buffer.append(message)
+        self.published_total += 1
+
+        for subscription in list(self._subscribers):
+            if not subscription.wants(message):
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self._subscribers.discard(subscription)
+                self.dropped_subscribers += 1
+                logger.warning("Dropped a stream subscriber that fell behind")
+        return message
+
+    def publish_on_commit(self, db: AsyncSession, event_type: str, house_id: int, data: dict):
+        """
+        Publish a change once the session's transaction commits.
+
+        Messages are discarded if the transaction rolls back, so clients never
+        see changes that were not persisted.
+
+        Args:
+            db: Session the change is written with
+            event_type: Message type
+            house_id: House the change belongs to
+            data: JSON-serializable payload
+        """
+        db.info.setdefault(PENDING_MESSAGES_KEY, []).append((event_type, house_id, data))
+
+    def stats(self) -> dict:
+        """Get broker statistics."""
+        return {
+            "subscribers": len(self._subscribers),
+            "published_total": self.published_total,
+            "dropped_subscribers": self.dropped_subscribers,
+            "last_event_id": self._next_id - 1,
+            "replay_buffer": len(self._buffer),
+        }
+
+
+def alert_payload(alert) -> dict[str, Any]:
+    """Serialize an alert for the stream."""
+    return {
+        "alert_id": alert.alert_id,
+        "house_id": alert.house_id,
+        "device_id": alert.device_id,
+        "event_id": alert.event_id,
+        "alert_type_id": alert.alert_type_id,
+        "rule_id": alert.rule_id,
+        "severity": alert.severity,
+        "status": alert.status,
+        "confidence_score": float(alert.confidence_score) if alert.confidence_score is not None else None,
+        "created_at": alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+def device_status_payload(device, previous_status: Optional[str]) -> dict[str, Any]:
+    """Serialize a device status change for the stream."""
+    return {
+        "device_id": device.device_id,
+        "house_id": device.house_id,
+        "status": device.status,
+        "previous_status": previous_status,
+        "last_heartbeat": device.last_heartbeat.isoformat() if device.last_heartbeat else None,
+    }
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    messages = session.info.pop(PENDING_MESSAGES_KEY, None)
+    for event_type, house_id, data in messages or ():
+        stream_broker.publish(event_type, house_id, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(PENDING_MESSAGES_KEY, None)
+
+
+# Global instance
+stream_broker = StreamBroker()
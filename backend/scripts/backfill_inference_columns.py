@@ -0,0 +1,88 @@
+"""
+Script to fill Event.inference_label and inference_score for events processed before they existed.
+
+Copies raw_data["inference"]["label"] and ["score"] into the typed columns
+added by alembic revision 0003_event_inference_columns. Events are walked in
+event_id order with one UPDATE and one commit per batch, so each transaction
+locks at most --batch-size rows and the run can be interrupted and restarted
+at any time (already filled rows are skipped). --pause-ms spaces the batches
+out to leave room for live traffic.
+
+Usage:
+    python scripts/backfill_inference_columns.py --dry-run
+    python scripts/backfill_inference_columns.py --batch-size 5000 --pause-ms 100
+"""
+import asyncio
+import argparse
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import AsyncSessionLocal
+from app.models.event import Event
+from sqlalchemy import Float, cast, func, select, update
+
+
+def pending_events(after_event_id: int, batch_size: int):
+    """Select the next batch of processed events whose inference columns are still empty."""
+    return select(Event.event_id).where(
+        Event.event_id > after_event_id,
+        Event.inference_label.is_(None),
+        Event.raw_data["inference"]["label"].is_not(None),
+    ).order_by(Event.event_id).limit(batch_size)
+
+
+async def backfill(batch_size: int, pause_ms: int, dry_run: bool) -> int:
+    """Fill the inference columns one batch of events at a time."""
+    filled = 0
+    last_event_id = 0
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            batch = pending_events(last_event_id, batch_size).subquery()
+            if dry_run:
+                result = await session.execute(
+                    select(func.count(), func.max(batch.c.event_id)).select_from(batch)
+                )
+                count, max_event_id = result.one()
+            else:
+                inference = Event.raw_data["inference"]
+                result = await session.execute(
+                    update(Event).where(Event.event_id.in_(select(batch.c.event_id))).values(
+                        inference_label=inference["label"].as_string(),
+                        inference_score=cast(inference["score"].as_string(), Float),
+                    ).returning(Event.event_id).execution_options(synchronize_session=False)
+                )
+                event_ids = result.scalars().all()
+                await session.commit()
+                count, max_event_id = len(event_ids), max(event_ids, default=None)
+
+        if not count:
+            break
+        filled += count
+        last_event_id = max_event_id
+        print(f"  Filled events up to {last_event_id}: {filled}")
+
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    return filled
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Copy inference results from raw_data into the typed event columns")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Events per transaction")
+    parser.add_argument("--pause-ms", type=int, default=50, help="Pause between batches")
+    parser.add_argument("--dry-run", action="store_true", help="Count the events to fill without changing anything")
+
+    args = parser.parse_args()
+
+    print("Backfilling events.inference_label / inference_score" + (" (dry run)" if args.dry_run else ""))
+    filled = await backfill(args.batch_size, args.pause_ms, args.dry_run)
+    print(f"✓ Done: {filled} events {'to fill' if args.dry_run else 'filled'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
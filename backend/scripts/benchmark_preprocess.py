@@ -0,0 +1,95 @@
+"""
+Microbenchmark comparing the soundfile fast path with the librosa path for audio preprocessing.
+
+Usage:
+    python scripts/benchmark_preprocess.py
+    python scripts/benchmark_preprocess.py --file ../simulator/audio/5-9032-A.wav --iterations 200
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import soundfile as sf
+from app.utils import percentile
+
+
+def make_wav(directory: Path, name: str, sample_rate: int, channels: int, seconds: float) -> Path:
+    """Write a synthetic noise + tone WAV file."""
+    samples = int(sample_rate * seconds)
+    t = np.arange(samples) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.05 * np.random.default_rng(0).standard_normal(samples)
+    data = np.repeat(signal[:, None], channels, axis=1).astype(np.float32)
+    path = directory / name
+    sf.write(str(path), data, sample_rate, subtype="PCM_16")
+    return path
+
+
+def time_calls(func, path: Path, iterations: int) -> tuple[float, list[float]]:
+    """Time the first call and repeated calls of func(path) in milliseconds."""
+    start = time.perf_counter()
+    func(path)  # First call pays lazy imports and JIT compilation
+    first_ms = (time.perf_counter() - start) * 1000.0
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(path)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return first_ms, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio preprocessing paths")
+    parser.add_argument("--file", action="append", help="Audio file to benchmark (repeatable)")
+    parser.add_argument("--iterations", type=int, default=100, help="Calls per path and file")
+    args = parser.parse_args()
+
+    from app.services.inference import (
+        AUDIO_LENGTH,
+        _fit_normalized,
+        _load_audio_fast,
+        _load_audio_librosa,
+    )
+
+    buffer = np.empty(AUDIO_LENGTH, dtype=np.float32)
+
+    def fast_path(path: Path):
+        return _fit_normalized(_load_audio_fast(str(path)), buffer)
+
+    def librosa_path(path: Path):
+        return _fit_normalized(_load_audio_librosa(str(path)), buffer)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.file:
+            files = [Path(f) for f in args.file]
+        else:
+            tmp_dir = Path(tmp)
+            files = [
+                make_wav(tmp_dir, "16k_mono_1s.wav", 16000, 1, 1.0),
+                make_wav(tmp_dir, "16k_mono_10s.wav", 16000, 1, 10.0),
+                make_wav(tmp_dir, "44k_stereo_5s.wav", 44100, 2, 5.0),
+            ]
+
+        print(f"{'file':<24} {'path':<8} {'first ms':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for path in files:
+            for name, func in (("fast", fast_path), ("librosa", librosa_path)):
+                first_ms, timings = time_calls(func, path, args.iterations)
+                timings.sort()
+                print(
+                    f"{path.name:<24} {name:<8} {first_ms:>9.1f} {statistics.mean(timings):>9.3f} "
+                    f"{percentile(timings, 0.50):>9.3f} {percentile(timings, 0.95):>9.3f}"
+                )
+
+            # Sanity check: both paths should produce nearly the same samples
+            diff = np.max(np.abs(fast_path(path).copy() - librosa_path(path)))
+            print(f"{'':<24} max abs difference between paths: {diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
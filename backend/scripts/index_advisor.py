@@ -0,0 +1,331 @@
+"""
+Script to check that the hot queries of the API are served by indexes.
+
+Seeds a tenant with houses, devices, events and alerts inside a transaction,
+runs EXPLAIN ANALYZE on the query shapes used by the routers and background
+services, flags sequential scans that read many rows, and rolls everything
+back. Nothing is left in the database.
+
+Run it against a development or staging database with the migrations applied
+(alembic upgrade head). The exit code is 1 when a query is flagged.
+
+Usage:
+    python scripts/index_advisor.py
+    python scripts/index_advisor.py --events 500000 --min-rows 5000 --verbose
+"""
+import asyncio
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+import uuid
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import engine
+from app.models.alert import Alert
+from app.models.alert_type import AlertType
+from app.models.device import Device
+from app.models.event import Event
+from app.models.house import House
+from app.services.pagination import encode_cursor, paginate
+from app.services.partitions import partition_manager
+from sqlalchemy import and_, distinct, exists, func, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+SEED_SQL = [
+    # Houses of the seed tenant
+    """
+    INSERT INTO houses (tenant_id, house_name, created_at, updated_at, is_active)
+    SELECT :tenant_id, 'advisor-house-' || g, now(), now(), true
+    FROM generate_series(1, :houses) g
+    """,
+    # Devices spread over the houses; about 80% online
+    """
+    INSERT INTO devices (house_id, device_type_id, device_name, status, created_at, updated_at, is_enabled)
+    SELECT h.house_id, :device_type_id, 'advisor-device-' || g,
+           CASE WHEN random() < 0.8 THEN 'online' ELSE 'offline' END, now(), now(), true
+    FROM houses h CROSS JOIN generate_series(1, :devices_per_house) g
+    WHERE h.tenant_id = :tenant_id
+    """,
+    """
+    CREATE TEMP TABLE advisor_devices ON COMMIT DROP AS
+    SELECT row_number() OVER (ORDER BY d.device_id) AS n, d.device_id, d.house_id
+    FROM devices d JOIN houses h ON h.house_id = d.house_id
+    WHERE h.tenant_id = :tenant_id
+    """,
+    # Events over the last 30 days; about 1% still unprocessed
+    """
+    INSERT INTO events (house_id, device_id, event_type, raw_data, inference_label, inference_score,
+                        media_url, created_at, is_processed)
+    SELECT d.house_id, d.device_id, 'audio',
+           jsonb_build_object('inference', jsonb_build_object('score', e.score, 'label', e.label)),
+           e.label, e.score,
+           '/advisor/' || g || '.wav',
+           now() - random() * interval '30 days',
+           random() > 0.01
+    FROM generate_series(1, :events) g
+    JOIN advisor_devices d ON d.n = 1 + g % (SELECT count(*) FROM advisor_devices)
+    CROSS JOIN LATERAL (
+        SELECT (ARRAY['distress', 'human', 'alarm', 'fall'])[1 + g % 4] AS label,
+               round(random()::numeric, 4)::float AS score
+    ) e
+    """,
+    # Alerts for a sample of events; about 5% still active
+    """
+    INSERT INTO alerts (house_id, device_id, event_id, alert_type_id, severity, status, confidence_score, created_at)
+    SELECT e.house_id, e.device_id, e.event_id, :alert_type_id,
+           (ARRAY['critical', 'high', 'medium', 'low'])[1 + floor(random() * 4)::int],
+           CASE WHEN random() < 0.05 THEN 'active' ELSE 'resolved' END,
+           0.9, e.created_at
+    FROM events e JOIN advisor_devices d ON d.device_id = e.device_id
+    WHERE random() < :alert_ratio
+    """,
+    "ANALYZE houses",
+    "ANALYZE devices",
+    "ANALYZE events",
+    "ANALYZE alerts",
+]
+
+
+def alert_list(*conditions, cursor=None):
+    """The list_alerts query shape (joined to House and AlertType, newest first)."""
+    query = select(Alert, House.latitude, House.longitude, AlertType.type_name).join(
+        House, House.house_id == Alert.house_id
+    ).join(
+        AlertType, AlertType.alert_type_id == Alert.alert_type_id
+    ).where(*conditions)
+    return paginate(query, Alert.created_at, Alert.alert_id, 100, cursor)
+
+
+def event_list(*conditions, cursor=None):
+    """The list_events query shape (newest first)."""
+    return paginate(select(Event).where(*conditions), Event.created_at, Event.event_id, 100, cursor)
+
+
+def alert_count(*conditions):
+    """The list_alerts total count."""
+    query = select(func.count()).select_from(Alert)
+    if conditions:
+        query = query.where(and_(*conditions))
+    return query
+
+
+def build_queries(house_id: int, device_id: int) -> list[tuple[str, object, bool]]:
+    """
+    Build the query shapes to check.
+
+    Args:
+        house_id: A seeded house
+        device_id: A seeded device
+
+    Returns:
+        (name, statement, whether a sequential scan is expected) for each query
+    """
+    now = datetime.now(timezone.utc)
+    window_start = now - timedelta(seconds=60)
+    # A cursor two weeks deep, where OFFSET pagination would read most of the table
+    deep_cursor = encode_cursor(now - timedelta(days=14), 2**31 - 1)
+    return [
+        # alerts router
+        ("alerts.list", alert_list(), False),
+        ("alerts.list status=active", alert_list(Alert.status == "active"), False),
+        ("alerts.list severity=critical", alert_list(Alert.severity == "critical"), False),
+        ("alerts.list house_id", alert_list(Alert.house_id == house_id), False),
+        ("alerts.list house_id+status=active", alert_list(Alert.house_id == house_id, Alert.status == "active"), False),
+        ("alerts.list deep cursor", alert_list(cursor=deep_cursor), False),
+        ("alerts.list status=active deep cursor", alert_list(Alert.status == "active", cursor=deep_cursor), False),
+        ("alerts.count status=active", alert_count(Alert.status == "active"), False),
+        ("alerts.count house_id", alert_count(Alert.house_id == house_id), False),
+        # events router
+        ("events.list", event_list(), False),
+        ("events.list deep cursor", event_list(cursor=deep_cursor), False),
+        ("events.list house_id", event_list(Event.house_id == house_id), False),
+        ("events.list device_id deep cursor", event_list(Event.device_id == device_id, cursor=deep_cursor), False),
+        ("events.list device_id+inference_label", event_list(
+            Event.device_id == device_id, Event.inference_label == "distress"
+        ), False),
+        ("events.label_since devices", select(Event.device_id).where(
+            Event.device_id.in_(select(Device.device_id).where(Device.house_id == house_id)),
+            Event.inference_label == "distress",
+            Event.created_at >= now - timedelta(hours=1),
+        ).distinct(), False),
+        ("events.raw_data containment", select(Event.event_id).where(
+            Event.raw_data.contains({"audio_deleted": {"reason": "quota"}})
+        ).limit(100), False),
+        # metrics router
+        ("metrics.active_houses", select(func.count(distinct(Alert.house_id))).where(Alert.status == "active"), False),
+        ("metrics.total_devices", select(func.count(Device.device_id)), True),
+        # Most devices are online, so scanning the table beats the status index here
+        ("metrics.online_devices", select(func.count(Device.device_id)).where(Device.status == "online"), True),
+        ("metrics.active_alerts", select(func.count(Alert.alert_id)).where(Alert.status == "active"), False),
+        # devices router
+        ("devices.list house_id", select(Device).where(Device.house_id == house_id), False),
+        ("devices.event_count", select(func.count(Event.event_id)).where(Event.device_id == device_id), False),
+        ("devices.alert_count", select(func.count(Alert.alert_id)).where(Alert.device_id == device_id), False),
+        # policy engine
+        ("policy.window_count", select(Event.raw_data, Event.created_at).where(
+            Event.house_id == house_id,
+            Event.device_id == device_id,
+            Event.created_at >= window_start,
+            Event.is_processed == True,
+            Event.inference_label == "distress",
+        ), False),
+        ("policy.rebuild_windows", select(
+            Event.house_id, Event.device_id, Event.inference_label, Event.raw_data, Event.created_at
+        ).where(
+            Event.created_at >= window_start,
+            Event.is_processed == True,
+            Event.inference_label.is_not(None),
+        ), False),
+        ("policy.rebuild_alert_history", select(
+            Alert.house_id, Alert.device_id, Alert.alert_type_id, Alert.created_at
+        ).where(Alert.created_at >= now - timedelta(hours=1)), False),
+        # event processor and retention
+        ("processing.unprocessed", select(Event.event_id, Event.raw_data, Event.created_at).where(
+            Event.is_processed == False
+        ).order_by(Event.event_id), False),
+        ("retention.media_url", select(Event.event_id).where(Event.media_url == "/advisor/1.wav").limit(1), False),
+        ("retention.expired", select(Event).where(
+            Event.media_url.is_not(None),
+            Event.is_processed == True,
+            ~exists().where(Alert.event_id == Event.event_id, Alert.created_at >= Event.created_at),
+            Event.created_at < now - timedelta(days=29),
+        ).order_by(Event.created_at).limit(200), False),
+    ]
+
+
+def walk(node: dict):
+    """Yield a plan node and all of its children."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def analyze_plan(plan: dict, min_rows: int) -> tuple[list[str], list[str]]:
+    """
+    Find the indexes used by a plan and the sequential scans that read many rows.
+
+    Args:
+        plan: One EXPLAIN (FORMAT JSON) result
+        min_rows: Rows read by a Seq Scan before it is flagged
+
+    Returns:
+        (indexes used, flagged sequential scans)
+    """
+    indexes, flagged = [], []
+    for node in walk(plan["Plan"]):
+        if "Index Name" in node:
+            indexes.append(node["Index Name"])
+        if node["Node Type"] == "Seq Scan":
+            loops = node.get("Actual Loops", 1)
+            rows_read = (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * loops
+            if rows_read >= min_rows:
+                flagged.append(f"Seq Scan on {node['Relation Name']} read {rows_read} rows"
+                               + (f" (filter: {node['Filter']})" if "Filter" in node else ""))
+    return indexes, flagged
+
+
+async def run(args) -> int:
+    """Seed, explain every query and roll back. Returns the number of flagged queries."""
+    flagged_queries = 0
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            suffix = uuid.uuid4().hex[:8]
+            tenant_id = (await conn.execute(text(
+                "INSERT INTO tenants (tenant_name, created_at, is_active) VALUES (:name, now(), true) RETURNING tenant_id"
+            ), {"name": f"advisor-{suffix}"})).scalar_one()
+            device_type_id = (await conn.execute(text(
+                "INSERT INTO device_types (type_name, created_at) VALUES (:name, now()) RETURNING device_type_id"
+            ), {"name": f"advisor-{suffix}"})).scalar_one()
+            alert_type_id = (await conn.execute(text(
+                "INSERT INTO alert_types (type_name, created_at) VALUES (:name, now()) RETURNING alert_type_id"
+            ), {"name": f"advisor-{suffix}"})).scalar_one()
+
+            params = {
+                "tenant_id": tenant_id,
+                "device_type_id": device_type_id,
+                "alert_type_id": alert_type_id,
+                "houses": args.houses,
+                "devices_per_house": args.devices_per_house,
+                "events": args.events,
+                "alert_ratio": args.alert_ratio,
+            }
+            # Seeded events go back 30 days, possibly into months without a partition yet
+            await partition_manager.ensure(conn, since=datetime.now(timezone.utc) - timedelta(days=31))
+            print(f"Seeding {args.houses} houses, {args.houses * args.devices_per_house} devices "
+                  f"and {args.events} events (rolled back at the end)...")
+            for statement in SEED_SQL:
+                sql = text(statement)
+                await conn.execute(sql, {k: v for k, v in params.items() if k in sql.compile().params})
+
+            house_id, device_id = (await conn.execute(text(
+                "SELECT house_id, device_id FROM advisor_devices ORDER BY n LIMIT 1"
+            ))).one()
+
+            for name, statement, seq_scan_expected in build_queries(house_id, device_id):
+                result = await conn.execute(Explain(statement))
+                plan = result.scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                plan = plan[0]
+                indexes, flagged = analyze_plan(plan, args.min_rows)
+
+                status = "ok"
+                if flagged and not seq_scan_expected:
+                    status = "SEQ SCAN"
+                    flagged_queries += 1
+                elif flagged:
+                    status = "ok (full scan expected)"
+                print(f"{name:<38} {plan['Execution Time']:>9.2f} ms  {status:<24} "
+                      f"{', '.join(dict.fromkeys(indexes)) or '-'}")
+                for line in flagged if not seq_scan_expected else []:
+                    print(f"    ! {line}")
+                if args.verbose:
+                    print(json.dumps(plan["Plan"], indent=2))
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+    return flagged_queries
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the hot queries against seeded data and flag sequential scans")
+    parser.add_argument("--houses", type=int, default=200, help="Houses to seed")
+    parser.add_argument("--devices-per-house", type=int, default=5, help="Devices per seeded house")
+    parser.add_argument("--events", type=int, default=200000, help="Events to seed")
+    parser.add_argument("--alert-ratio", type=float, default=0.1, help="Fraction of events that get an alert")
+    parser.add_argument("--min-rows", type=int, default=1000, help="Rows read by a Seq Scan before it is flagged")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+
+    args = parser.parse_args()
+
+    flagged = await run(args)
+    if flagged:
+        print(f"✗ {flagged} queries use sequential scans; add an index matching their filter and ordering")
+        sys.exit(1)
+    print("✓ All queries are served by indexes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Script to move audio files from the old flat storage directory into the configured layout.
+
+Files written by earlier versions live directly in STORAGE_PATH as {uuid}.wav.
+This script moves every such file referenced by an event to its location under
+STORAGE_LAYOUT ("sharded" or "content") and rewrites Event.media_url and
+raw_data["file_path"]. Each batch of moves is committed together; if the commit
+fails, the files of that batch are moved back.
+
+Only local files are migrated; events stored in an object store (s3:// media
+URLs) are already keyed by the layout and are left untouched.
+
+Usage:
+    python scripts/migrate_storage_layout.py --dry-run
+    python scripts/migrate_storage_layout.py --batch-size 500
+"""
+import asyncio
+import argparse
+import hashlib
+import os
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import AsyncSessionLocal
+from app.models.event import Event
+from app.services.storage import storage_service
+from app.services.storage_backends import S3_SCHEME
+from sqlalchemy import select
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_flat_file(path: Path) -> bool:
+    """Whether a path is a file directly in the storage root (the old layout)."""
+    return path.parent.resolve() == storage_service.storage_path.resolve()
+
+
+async def migrate(batch_size: int, dry_run: bool) -> dict:
+    """Move flat files into the configured layout, one batch of events at a time."""
+    counts = {"migrated": 0, "deduplicated": 0, "missing": 0, "already_migrated": 0}
+    moved_paths: dict[str, str] = {}  # Old path -> new path, for files shared by several events
+    destinations: set[str] = set()  # New paths claimed so far (dry runs never create them)
+    last_event_id = 0
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            query = select(Event).where(
+                Event.event_id > last_event_id,
+                Event.media_url.is_not(None),
+            ).order_by(Event.event_id).limit(batch_size)
+            result = await session.execute(query)
+            events = result.scalars().all()
+            if not events:
+                break
+            last_event_id = events[-1].event_id
+
+            moves: list[tuple[Path, Path]] = []  # Undone if the commit fails
+            duplicates: list[Path] = []  # Deleted only after the commit succeeds
+
+            for event in events:
+                old_path = Path(event.media_url)
+                if event.media_url.startswith(S3_SCHEME) or not is_flat_file(old_path):
+                    counts["already_migrated"] += 1
+                    continue
+
+                if str(old_path) in moved_paths:
+                    new_path = Path(moved_paths[str(old_path)])
+                else:
+                    if not old_path.exists():
+                        counts["missing"] += 1
+                        print(f"  Event {event.event_id}: file not found at {old_path}")
+                        continue
+
+                    raw_data = event.raw_data or {}
+                    sha256 = raw_data.get("sha256") or file_sha256(old_path)
+                    new_path = storage_service.audio_path_for(
+                        str(event.house_id), str(event.device_id), sha256, event.created_at
+                    )
+
+                    if storage_service.layout == "content" and (new_path.exists() or str(new_path) in destinations):
+                        duplicates.append(old_path)
+                        counts["deduplicated"] += 1
+                    elif not dry_run:
+                        new_path.parent.mkdir(parents=True, exist_ok=True)
+                        os.replace(old_path, new_path)
+                        moves.append((old_path, new_path))
+                    moved_paths[str(old_path)] = str(new_path)
+                    destinations.add(str(new_path))
+
+                raw_data = dict(event.raw_data or {})
+                raw_data["file_path"] = str(new_path)
+                event.raw_data = raw_data
+                event.media_url = str(new_path)
+                counts["migrated"] += 1
+
+            if dry_run:
+                await session.rollback()
+                continue
+
+            try:
+                await session.commit()
+            except Exception:
+                for old_path, new_path in reversed(moves):
+                    os.replace(new_path, old_path)
+                raise
+
+            for path in duplicates:
+                path.unlink(missing_ok=True)
+
+        print(f"  Processed events up to {last_event_id}: {counts}")
+
+    return counts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Move flat audio files into the configured storage layout")
+    parser.add_argument("--batch-size", type=int, default=500, help="Events per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without changing anything")
+
+    args = parser.parse_args()
+
+    print(f"Migrating {storage_service.storage_path} to the '{storage_service.layout}' layout"
+          + (" (dry run)" if args.dry_run else ""))
+    counts = await migrate(args.batch_size, args.dry_run)
+
+    leftovers = [p for p in storage_service.storage_path.glob("*.wav") if p.is_file()]
+    print(f"✓ Done: {counts}")
+    if leftovers and not args.dry_run:
+        print(f"  {len(leftovers)} flat files are not referenced by any event and were left in place")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
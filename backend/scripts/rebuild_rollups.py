@@ -0,0 +1,89 @@
+"""
+Script to rebuild the activity rollups from events and alerts.
+
+Recomputes the event and alert columns of activity_rollups_hourly and
+activity_rollups_daily (see app/services/rollups.py) one day per transaction,
+so it can fill the rollups for existing history after alembic revision
+0005_activity_rollups, or repair them after an outage. Heartbeat counts and
+uptime are not stored anywhere else and are kept as they are.
+
+Changes committed by the API while a day is being rebuilt can be counted
+twice; rebuild past days while the API runs, or stop it first.
+
+Usage:
+    python scripts/rebuild_rollups.py                 # all history
+    python scripts/rebuild_rollups.py --days 7
+    python scripts/rebuild_rollups.py --since 2026-01-01 --until 2026-02-01
+"""
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import AsyncSessionLocal
+from app.models.alert import Alert
+from app.models.event import Event
+from app.services.rollups import bucket_start, rollup_service
+from sqlalchemy import func, select
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO date or time, as UTC when no offset is given."""
+    at = datetime.fromisoformat(value)
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+
+async def first_activity() -> datetime:
+    """Time of the oldest event or alert (now if there are none)."""
+    async with AsyncSessionLocal() as session:
+        oldest = [
+            await session.scalar(select(func.min(Event.created_at))),
+            await session.scalar(select(func.min(Alert.created_at))),
+        ]
+    return min((at for at in oldest if at), default=datetime.now(timezone.utc))
+
+
+async def rebuild(since: datetime, until: datetime, pause_ms: int) -> int:
+    """Rebuild the rollups one day at a time."""
+    rebuilt = 0
+    day = bucket_start(since, "day")
+    while day < until:
+        async with AsyncSessionLocal() as session:
+            rows = await rollup_service.rebuild(session, max(day, since), min(day + timedelta(days=1), until))
+            await session.commit()
+        rebuilt += rows
+        print(f"  {day:%Y-%m-%d}: {rows} hourly rollups")
+
+        day += timedelta(days=1)
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    return rebuilt
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild the activity rollups from events and alerts")
+    parser.add_argument("--since", type=parse_time, help="Start of the period (default: oldest event or alert)")
+    parser.add_argument("--until", type=parse_time, help="End of the period (default: now)")
+    parser.add_argument("--days", type=int, help="Rebuild the last N days instead of --since")
+    parser.add_argument("--pause-ms", type=int, default=50, help="Pause between days")
+
+    args = parser.parse_args()
+
+    until = args.until or datetime.now(timezone.utc)
+    if args.days:
+        since = until - timedelta(days=args.days)
+    else:
+        since = args.since or await first_activity()
+
+    print(f"Rebuilding activity rollups from {since.isoformat()} to {until.isoformat()}")
+    rebuilt = await rebuild(since, until, args.pause_ms)
+    print(f"✓ Done: {rebuilt} hourly rollups rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
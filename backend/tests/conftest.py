@@ -0,0 +1,64 @@
+"""
+Shared fixtures for the integration tests that need the database.
+
+They run against the database in DATABASE_URL (migrated to the latest
+revision) and create their own tenant, house and device, removed afterwards.
+"""
+import uuid
+import pytest
+from sqlalchemy import delete
+
+
+@pytest.fixture
+def client():
+    """Test client with the app started."""
+    from fastapi.testclient import TestClient
+    from app.database import engine
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+        # Pooled connections belong to this client's event loop
+        client.portal.call(engine.dispose)
+
+
+@pytest.fixture
+def device(client):
+    """A device (and its house and tenant) created for the test."""
+    from app.database import AsyncSessionLocal
+    from app.models.alert import Alert
+    from app.models.device import Device
+    from app.models.device_type import DeviceType
+    from app.models.event import Event
+    from app.models.house import House
+    from app.models.tenant import Tenant
+
+    name = f"test-{uuid.uuid4().hex[:12]}"
+
+    async def create():
+        async with AsyncSessionLocal() as session:
+            tenant = Tenant(tenant_name=name)
+            device_type = DeviceType(type_name=name)
+            session.add_all([tenant, device_type])
+            await session.flush()
+            house = House(tenant_id=tenant.tenant_id, house_name=name)
+            session.add(house)
+            await session.flush()
+            device = Device(house_id=house.house_id, device_type_id=device_type.device_type_id, status="online")
+            session.add(device)
+            await session.commit()
+            return tenant, device_type, house, device
+
+    async def remove(tenant, device_type, house, device):
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Alert).where(Alert.device_id == device.device_id))
+            await session.execute(delete(Event).where(Event.device_id == device.device_id))
+            await session.execute(delete(Device).where(Device.device_id == device.device_id))
+            await session.execute(delete(House).where(House.house_id == house.house_id))
+            await session.execute(delete(DeviceType).where(DeviceType.device_type_id == device_type.device_type_id))
+            await session.execute(delete(Tenant).where(Tenant.tenant_id == tenant.tenant_id))
+            await session.commit()
+
+    rows = client.portal.call(create)
+    yield rows[3]
+    client.portal.call(remove, *rows)
@@ -0,0 +1,51 @@
+"""
+Integration tests for device heartbeats.
+
+Run against the database in DATABASE_URL (see conftest.py); skipped when
+DATABASE_URL is not set.
+"""
+import os
+import pytest
+from sqlalchemy import select, update
+
+pytestmark = pytest.mark.skipif("DATABASE_URL" not in os.environ, reason="DATABASE_URL is not set")
+
+
+def test_coalesced_heartbeat_restores_status_changed_elsewhere(client, device):
+    from app.database import AsyncSessionLocal
+    from app.models.device import Device
+    from app.services.cache import reference_cache
+    from app.services.dashboard import dashboard_metrics
+    from app.services.heartbeat import heartbeat_service
+
+    async def set_status(status: str):
+        # As another process's offline detector would: this process's cache is not told
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(Device).where(Device.device_id == device.device_id).values(status=status))
+            await session.commit()
+
+    async def load_status() -> str:
+        async with AsyncSessionLocal() as session:
+            return await session.scalar(select(Device.status).where(Device.device_id == device.device_id))
+
+    async def cached_status() -> str:
+        async with AsyncSessionLocal() as session:
+            return (await reference_cache.get_device(session, device.device_id)).status
+
+    async def online_devices(refresh: bool = False) -> int:
+        async with AsyncSessionLocal() as session:
+            if refresh:
+                await dashboard_metrics.refresh(session)
+            return (await dashboard_metrics.counts(session))["online_devices"]
+
+    assert client.portal.call(cached_status) == "online"
+    client.portal.call(set_status, "offline")
+    online_before = client.portal.call(online_devices, True)
+
+    ack = client.post(f"/api/v1/devices/{device.device_id}/heartbeat")
+    assert ack.status_code == 200
+    assert ack.json()["written_through"] is False
+
+    client.portal.call(heartbeat_service.flush)
+    assert client.portal.call(load_status) == "online"
+    assert client.portal.call(online_devices) == online_before + 1
@@ -0,0 +1,25 @@
+"""Tests for model activation in process-pool mode."""
+import asyncio
+from app.config import settings
+from app.services.inference import InferenceService
+
+
+def test_activation_before_start_rejects_missing_model(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "inference_workers", 2)
+    service = InferenceService()
+
+    assert not asyncio.run(service.activate_model(str(tmp_path / "missing.keras"), 1))
+    assert service.model_path is None
+    assert service.current_model_id is None
+
+
+def test_activation_before_start_defers_loading_to_the_workers(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "inference_workers", 2)
+    model_file = tmp_path / "model.keras"
+    model_file.write_bytes(b"")
+    service = InferenceService()
+
+    assert asyncio.run(service.activate_model(str(model_file), 1))
+    assert service.model_path == str(model_file.absolute())
+    assert service.current_model_id == 1
+    assert not service.model_loaded  # Until start() has warmed up the workers
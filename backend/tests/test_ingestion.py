@@ -0,0 +1,162 @@
+"""
+Integration tests for event ingestion.
+
+Run against the database in DATABASE_URL (see conftest.py); skipped when
+DATABASE_URL is not set.
+"""
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+import pytest
+
+pytestmark = pytest.mark.skipif("DATABASE_URL" not in os.environ, reason="DATABASE_URL is not set")
+
+CLIP = Path(__file__).resolve().parents[2] / "simulator" / "audio" / "5-9032-A.wav"
+
+
+@pytest.fixture(autouse=True)
+def content_layout(monkeypatch):
+    """Content-addressed storage, so identical clips share one file."""
+    from app.services.storage import storage_service
+
+    monkeypatch.setattr(storage_service, "layout", "content")
+
+
+@pytest.fixture
+def queue_fills_after(monkeypatch):
+    """Make the processing queue accept the first N events and then report it is full."""
+    from app.services.processing import QueueFullError, event_processor
+
+    def fill_after(accepted: int):
+        calls = []
+
+        def enqueue_nowait(event_id, event_timestamp):
+            calls.append(event_id)
+            if len(calls) > accepted:
+                raise QueueFullError("Ingestion queue is full, retry later")
+
+        # Passes the early is_full() check, so the put after commit is what fails
+        monkeypatch.setattr(event_processor, "is_full", lambda: False)
+        monkeypatch.setattr(event_processor, "free_slots", lambda: 100)
+        monkeypatch.setattr(event_processor, "enqueue_nowait", enqueue_nowait)
+
+    return fill_after
+
+
+def ingest(client, device, data: bytes):
+    return client.post(
+        "/api/v1/ingest/event",
+        data={"house_id": device.house_id, "device_id": device.device_id, "timestamp": "2026-01-01T00:00:00Z"},
+        files={"audio_file": ("clip.wav", data, "audio/wav")},
+    )
+
+
+def ingest_batch(client, device, clips: list[bytes]):
+    metadata = [
+        {"house_id": device.house_id, "device_id": device.device_id, "timestamp": "2026-01-01T00:00:00Z"}
+        for _ in clips
+    ]
+    return client.post(
+        "/api/v1/ingest/events:batch",
+        data={"metadata": json.dumps(metadata)},
+        files=[("files", (f"clip{i}.wav", data, "audio/wav")) for i, data in enumerate(clips)],
+    )
+
+
+def test_rejected_upload_deletes_its_audio(client, device, queue_fills_after):
+    from app.services.storage import storage_service
+
+    clip = CLIP.read_bytes() + uuid.uuid4().bytes
+    path = storage_service.audio_path_for(device.house_id, device.device_id, hashlib.sha256(clip).hexdigest())
+    queue_fills_after(0)
+
+    response = ingest(client, device, clip)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+    assert _stored_files(client, device) == []
+    assert not path.exists()
+
+
+def test_rejected_duplicate_upload_keeps_shared_audio(client, device, queue_fills_after):
+    clip = CLIP.read_bytes() + uuid.uuid4().bytes
+    queue_fills_after(1)
+
+    accepted = ingest(client, device, clip)
+    assert accepted.status_code == 202
+    media_url = accepted.json()["media_url"]
+
+    rejected = ingest(client, device, clip)
+    assert rejected.status_code == 429
+    assert Path(media_url).exists()
+    assert _stored_files(client, device) == [media_url]
+
+
+def test_rejected_duplicate_in_batch_keeps_shared_audio(client, device, queue_fills_after):
+    clip = CLIP.read_bytes() + uuid.uuid4().bytes
+    queue_fills_after(1)
+
+    response = ingest_batch(client, device, [clip, clip])
+    assert response.status_code == 202
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (1, 1)
+    assert [item["status"] for item in body["items"]] == ["queued", "rejected"]
+
+    media_urls = _stored_files(client, device)
+    assert len(media_urls) == 1
+    assert Path(media_urls[0]).exists()
+
+
+def test_sync_batch_keeps_results_when_one_inference_fails(client, device, monkeypatch):
+    from app.config import settings
+    from app.routers import ingestion
+    from app.schemas.inference import InferenceResponse
+
+    monkeypatch.setattr(settings, "ingest_mode", "sync")
+    failing = CLIP.read_bytes() + uuid.uuid4().bytes
+    failing_sha256 = hashlib.sha256(failing).hexdigest()
+
+    async def predict_stored(media_url):
+        if failing_sha256 in media_url:
+            raise RuntimeError("could not decode audio")
+        return InferenceResponse(label="normal", score=0.1)
+
+    monkeypatch.setattr(ingestion, "predict_stored", predict_stored)
+
+    response = ingest_batch(client, device, [failing, CLIP.read_bytes() + uuid.uuid4().bytes])
+    assert response.status_code == 201
+    body = response.json()
+    assert body["accepted"] == 2
+    assert [item["status"] for item in body["items"]] == ["ingested", "processed"]
+    assert _processed_flags(client, device) == [False, True]
+
+
+def _processed_flags(client, device) -> list[bool]:
+    """is_processed of the device's events, oldest first."""
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models.event import Event
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Event.is_processed).where(Event.device_id == device.device_id).order_by(Event.event_id)
+            )
+            return list(result.scalars().all())
+
+    return client.portal.call(load)
+
+
+def _stored_files(client, device) -> list[str]:
+    """Media URLs of the device's events that are still stored."""
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models.event import Event
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Event.media_url).where(Event.device_id == device.device_id))
+            return [url for url in result.scalars().all() if url]
+
+    return client.portal.call(load)
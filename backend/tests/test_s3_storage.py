@@ -0,0 +1,130 @@
+"""
+Integration tests for the S3 storage backend.
+
+Run against MinIO (docker compose -f docker-compose.test.yml up -d) or any
+S3-compatible server; S3_TEST_ENDPOINT_URL, S3_TEST_ACCESS_KEY_ID,
+S3_TEST_SECRET_ACCESS_KEY and S3_TEST_BUCKET override the defaults below.
+The tests are skipped when aiobotocore is not installed or the server
+cannot be reached.
+"""
+import asyncio
+import os
+import socket
+from pathlib import Path
+from urllib.parse import urlparse
+import pytest
+from app.config import settings
+from app.services.storage_backends import S3StorageBackend, get_session
+
+ENDPOINT_URL = os.getenv("S3_TEST_ENDPOINT_URL", "http://localhost:9000")
+ACCESS_KEY_ID = os.getenv("S3_TEST_ACCESS_KEY_ID", "minioadmin")
+SECRET_ACCESS_KEY = os.getenv("S3_TEST_SECRET_ACCESS_KEY", "minioadmin")
+BUCKET = os.getenv("S3_TEST_BUCKET", "smart-home-audio-test")
+
+MIB = 1024 * 1024
+
+pytestmark = pytest.mark.skipif(get_session is None, reason="aiobotocore is not installed")
+
+
+def _server_reachable() -> bool:
+    endpoint = urlparse(ENDPOINT_URL)
+    try:
+        with socket.create_connection((endpoint.hostname, endpoint.port or 80), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+@pytest.fixture
+def s3_settings(monkeypatch):
+    """Point the S3 settings at the test server; multipart starts above 1 MiB."""
+    if not _server_reachable():
+        pytest.skip(f"No S3 server at {ENDPOINT_URL}")
+    monkeypatch.setattr(settings, "s3_bucket", BUCKET)
+    monkeypatch.setattr(settings, "s3_endpoint_url", ENDPOINT_URL)
+    monkeypatch.setattr(settings, "s3_region", "us-east-1")
+    monkeypatch.setattr(settings, "s3_access_key_id", ACCESS_KEY_ID)
+    monkeypatch.setattr(settings, "s3_secret_access_key", SECRET_ACCESS_KEY)
+    monkeypatch.setattr(settings, "s3_multipart_threshold_bytes", MIB)
+    monkeypatch.setattr(settings, "s3_multipart_part_bytes", 5 * MIB)
+
+
+def run_with_backend(test):
+    """Run an async test body with a started backend and an existing bucket."""
+    async def main():
+        backend = S3StorageBackend()
+        await backend.start()
+        try:
+            client = await backend._get_client()
+            try:
+                await client.create_bucket(Bucket=BUCKET)
+            except client.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                    raise
+            await test(backend)
+        finally:
+            await backend.stop()
+
+    asyncio.run(main())
+
+
+def write_file(path: Path, size: int) -> bytes:
+    data = os.urandom(size)
+    path.write_bytes(data)
+    return data
+
+
+def test_save_exists_local_copy_delete(s3_settings, tmp_path):
+    source = tmp_path / "clip.wav"
+    data = write_file(source, 64 * 1024)
+
+    async def test(backend):
+        url, reused = await backend.put_file(source, "1/2/clip.wav")
+        assert url == f"s3://{BUCKET}/1/2/clip.wav"
+        assert not reused
+        assert not source.exists()
+        assert backend.key_for(url) == "1/2/clip.wav"
+        assert await backend.exists(url)
+
+        async with backend.local_copy(url) as path:
+            assert path.read_bytes() == data
+        assert not path.exists()
+
+        duplicate = tmp_path / "duplicate.wav"
+        write_file(duplicate, 16)
+        assert await backend.put_file(duplicate, "1/2/clip.wav", deduplicate=True) == (url, True)
+        assert not duplicate.exists()
+
+        assert await backend.delete(url) == len(data)
+        assert not await backend.exists(url)
+        assert await backend.delete(url) == 0
+
+    run_with_backend(test)
+
+
+def test_multipart_upload(s3_settings, tmp_path):
+    source = tmp_path / "long.wav"
+    data = write_file(source, 12 * MIB)
+
+    async def test(backend):
+        url, reused = await backend.put_file(source, "1/2/long.wav")
+        assert not reused
+        client = await backend._get_client()
+        head = await client.head_object(Bucket=BUCKET, Key="1/2/long.wav")
+        assert head["ContentLength"] == len(data)
+        # Multipart ETags end with the number of parts: 5 + 5 + 2 MiB
+        assert head["ETag"].strip('"').endswith("-3")
+
+        async with backend.local_copy(url) as path:
+            assert path.read_bytes() == data
+
+        assert await backend.delete(url) == len(data)
+        assert not await backend.exists(url)
+
+    run_with_backend(test)
+
+
+def test_key_for_rejects_other_buckets(s3_settings):
+    backend = S3StorageBackend()
+    with pytest.raises(ValueError):
+        backend.key_for("s3://another-bucket/1/2/clip.wav")
@@ -7,6 +7,9 @@ import { api as mockApi } from '../services/mockApi'
 import DetailsPopup from '../components/DetailsPopup'
 import { slaBadge, formatPST } from '../utils/format'
 
+// Pushed changes arriving within this window are coalesced into one reload
+const STREAM_REFRESH_DEBOUNCE_MS=1500
+
 export default function HomeOwnerDashboard(){
   const [metrics,setMetrics]=React.useState(null)
   const [alerts,setAlerts]=React.useState([])
@@ -41,8 +44,16 @@ export default function HomeOwnerDashboard(){
 
   React.useEffect(()=>{ 
     refresh()
-    const t=setInterval(refresh, 10000)
-    return ()=>clearInterval(t)
+    // Reload when the server pushes a change, once per burst of changes (trailing debounce);
+    // a reset reloads at once. The slow poll only covers a broken stream
+    let pending=null
+    const scheduleRefresh=()=>{ clearTimeout(pending); pending=setTimeout(refresh, STREAM_REFRESH_DEBOUNCE_MS) }
+    const source=api.stream.subscribe((type)=>{
+      if(type==='reset'){ clearTimeout(pending); refresh() }
+      else scheduleRefresh()
+    })
+    const t=setInterval(refresh, 60000)
+    return ()=>{ clearInterval(t); clearTimeout(pending); source.close() }
   },[])
 
   if(loading) return <div className="max-w-6xl mx-auto p-4">Loading…</div>
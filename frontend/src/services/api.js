@@ -54,7 +54,7 @@ const api = {
       if (params.status) queryParams.append('status', params.status);
       if (params.houseId) queryParams.append('house_id', params.houseId);
       if (params.limit) queryParams.append('limit', params.limit);
-      if (params.offset) queryParams.append('offset', params.offset);
+      if (params.cursor) queryParams.append('cursor', params.cursor);
 
       const queryString = queryParams.toString();
       const endpoint = `/api/v1/alerts${queryString ? `?${queryString}` : ''}`;
@@ -295,6 +295,29 @@ const api = {
       });
     },
   },
+
+  /**
+   * STREAM API (server-sent events)
+   */
+  stream: {
+    /**
+     * Subscribe to alert and device changes.
+     * onEvent(type, data) is called for alert_created, alert_status_changed,
+     * device_status_changed and reset (reload everything). EventSource
+     * reconnects on its own and resumes from the last event id.
+     * Returns the EventSource; call close() to unsubscribe.
+     */
+    subscribe(onEvent, houseIds = []) {
+      const queryParams = new URLSearchParams();
+      houseIds.forEach((id) => queryParams.append('house_id', id));
+      const queryString = queryParams.toString();
+      const source = new EventSource(`${API_BASE_URL}/api/v1/stream${queryString ? `?${queryString}` : ''}`);
+      ['alert_created', 'alert_status_changed', 'device_status_changed', 'reset'].forEach((type) => {
+        source.addEventListener(type, (e) => onEvent(type, JSON.parse(e.data)));
+      });
+      return source;
+    },
+  },
 };
 
 export default api;
@@ -6,6 +6,8 @@ This script simulates two kinds of device behavior against your FastAPI backend:
   1) AUDIO INGEST:
      Upload one or more WAV audio files to
        POST /api/v1/ingest/event
+     or, with --batch N, N files per request to
+       POST /api/v1/ingest/events:batch
 
   2) HEARTBEAT:
      Periodically send a heartbeat to
@@ -23,6 +25,9 @@ python simulate_device.py audio --file simulator/audio/5-9032-A.wav --house-id 2
 # AUDIO: send first 3 files from a folder, 5 seconds apart
 python simulate_device.py audio --dir simulator/audio --house-id 2 --device-id 2 --limit 3 --sleep 5
 
+# AUDIO: flush a whole folder 50 files per request (gateway backlog)
+python simulate_device.py audio --dir simulator/audio --house-id 2 --device-id 2 --batch 50
+
 # AUDIO: fixed timestamp (ISO 8601, UTC)
 python simulate_device.py audio --file simulator/audio/5-9032-A.wav --house-id 2 --device-id 2 --timestamp 2025-11-15T12:00:00Z
 
@@ -34,7 +39,7 @@ python simulate_device.py heartbeat --device-id 2 --interval 30
 """
 
 from __future__ import annotations
-import os, sys, time, argparse
+import os, sys, json, time, argparse
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable, Optional
@@ -71,6 +76,40 @@ def post_ingest(backend: str, house_id: int, device_id: int, timestamp: str, aud
         raise RuntimeError(f"HTTP {resp.status_code}: {payload}")
     return payload
 
+def post_ingest_batch(backend: str, house_id: int, device_id: int, timestamps: list[str], audio_paths: list[Path], timeout: int = 300) -> dict:
+    url = f"{backend.rstrip('/')}/api/v1/ingest/events:batch"
+    metadata = [{"house_id": house_id, "device_id": device_id, "timestamp": ts} for ts in timestamps]
+    handles = [open(p, "rb") for p in audio_paths]
+    try:
+        files = [("files", (p.name, f, "audio/wav")) for p, f in zip(audio_paths, handles)]
+        resp = requests.post(url, files=files, data={"metadata": json.dumps(metadata)}, timeout=timeout)
+    finally:
+        for f in handles: f.close()
+    try:
+        payload = resp.json()
+    except Exception:
+        payload = {"raw": resp.text}
+    if not resp.ok:
+        raise RuntimeError(f"HTTP {resp.status_code}: {payload}")
+    return payload
+
+def cmd_audio_batch(args: argparse.Namespace, files: list[Path]) -> int:
+    chunks = [files[i:i + args.batch] for i in range(0, len(files), args.batch)]
+    for n, chunk in enumerate(chunks, 1):
+        timestamps = [args.timestamp or iso_utc_now() for _ in chunk]
+        print(f"[{n}/{len(chunks)}] Uploading batch of {len(chunk)} ... ", end="", flush=True)
+        try:
+            payload = post_ingest_batch(args.backend, args.house_id, args.device_id, timestamps, chunk)
+            print(f"OK ({payload['accepted']} accepted, {payload['rejected']} rejected)")
+            for item in payload["items"]:
+                if item["status"] == "rejected":
+                    print(f"    {chunk[item['index']].name}: {item['error']}")
+        except Exception as e:
+            print(f"FAIL ({e})")
+            if not args.continue_on_error: return 1
+        if args.sleep and n < len(chunks): time.sleep(args.sleep)
+    return 0
+
 def cmd_audio(args: argparse.Namespace) -> int:
     if args.file:
         files = [Path(args.file)]
@@ -79,6 +118,8 @@ def cmd_audio(args: argparse.Namespace) -> int:
         files = list(iter_wavs(d))
         if args.limit is not None: files = files[: args.limit]
     print(f"[audio] Sending {len(files)} file(s) to {args.backend}")
+    if args.batch:
+        return cmd_audio_batch(args, files)
     for i, path in enumerate(files, 1):
         ts = args.timestamp or iso_utc_now()
         print(f"[{i}/{len(files)}] Uploading {path.name} ... ", end="", flush=True)
@@ -140,6 +181,7 @@ def build_parser() -> argparse.ArgumentParser:
     a.add_argument("--sleep", type=float, default=0)
     a.add_argument("--limit", type=int)
     a.add_argument("--continue-on-error", action="store_true")
+    a.add_argument("--batch", type=int, help="Upload N files per request via the batch endpoint")
     a.set_defaults(func=cmd_audio)
 
     hb = sub.add_parser("heartbeat", help="Send periodic heartbeat")